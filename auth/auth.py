@@ -1,20 +1,42 @@
 from functools import wraps
 from flask import jsonify
-from flask_jwt_extended import get_jwt_identity
+from flask_jwt_extended import get_jwt, get_jwt_identity
 from models.user import VendorStatus
 from repo.admin import admin_by_id_repo
+from repo.user import authz_version_by_id_repo
 from repo.vendor import vendor_profile_by_user_id_repo
 
 
+def authorization_claims():
+    # claims minted at login / refresh, None when the token has none
+    # or the user's roles, admin or vendor status changed after it was issued
+    # the version is served from authz_version_cache, the database is only read on a miss
+    claims = get_jwt()
+
+    if "authz_version" not in claims:
+        return None
+
+    if authz_version_by_id_repo(claims["sub"]) != claims["authz_version"]:
+        return None
+
+    return claims
+
+
 def admin_required():
     def wrapper(fn):
         @wraps(fn)
         def decorator(*args, **kwargs):
             user_id = get_jwt_identity()
 
-            admin = admin_by_id_repo(user_id)
+            claims = authorization_claims()
+
+            if claims is not None:
+                is_admin = claims["is_admin"]
 
-            if not admin:
+            else:
+                is_admin = admin_by_id_repo(user_id) is not None
+
+            if not is_admin:
                 return jsonify({"error": "Admin privileges required"}), 403
 
             else:
@@ -29,13 +51,21 @@ def vendor_required(fn):
     @wraps(fn)
     def wrapper(*args, **kwargs):
         user_id = get_jwt_identity()
-        vendor_profile = vendor_profile_by_user_id_repo(user_id)
 
-        if vendor_profile.vendor_status != VendorStatus.APPROVED.value:
+        claims = authorization_claims()
+
+        # users without a vendor profile still get the 404 from the repo
+        if claims is not None and claims["vendor_status"] is not None:
+            vendor_status = claims["vendor_status"]
+
+        else:
+            vendor_status = vendor_profile_by_user_id_repo(user_id).vendor_status
+
+        if vendor_status != VendorStatus.APPROVED.value:
             return jsonify(
                 {
                     "message": "Vendor not approved",
-                    "status": vendor_profile.vendor_status,
+                    "status": vendor_status,
                     "success": False,
                 }
             ), 403
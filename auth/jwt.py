@@ -1,14 +1,49 @@
+from flask import current_app
 from flask_jwt_extended import JWTManager
 
-from repo.user import user_by_id_repo
+from repo.user import cached_user_by_id_repo
 
 jwt = JWTManager()
 
 def init_jwt(app):
     jwt.init_app(app)
 
-# Register a callback function that loads a user from your database whenever a protected route is accessed. 
+
+# Stand-in for current_user built from the token claims (JWT_CLAIMS_PRINCIPAL = True).
+# id, username and email come from the token, any other attribute loads the full User on first use.
+class ClaimsPrincipal:
+    claim_attributes = ("username", "email")
+
+    def __init__(self, jwt_data):
+        self.__dict__["id"] = int(jwt_data["sub"])
+        self.__dict__["_jwt_data"] = jwt_data
+        self.__dict__["_user"] = None
+
+    @property
+    def user(self):
+        if self._user is None:
+            self.__dict__["_user"] = cached_user_by_id_repo(self.id)
+
+        return self._user
+
+    def __getattr__(self, name):
+        # only called for attributes the principal does not have itself
+        if self._user is None and name in self.claim_attributes and name in self._jwt_data:
+            return self._jwt_data[name]
+
+        return getattr(self.user, name)
+
+    def __setattr__(self, name, value):
+        # writes always go to the real user so they are persisted
+        setattr(self.user, name, value)
+
+
+# Register a callback function that loads a user from your database whenever a protected route is accessed.
+# Served from the identity cache while the user is unchanged, keyed by user id.
 @jwt.user_lookup_loader
 def user_lookup_callback(_jwt_header, jwt_data):
+    if current_app.config.get("JWT_CLAIMS_PRINCIPAL"):
+        return ClaimsPrincipal(jwt_data)
+
     identity = jwt_data["sub"]
-    return user_by_id_repo(identity)
+    return cached_user_by_id_repo(identity)
@@ -11,3 +11,6 @@ JWT_ACCESS_TOKEN_EXPIRES = timedelta(days=2)
 
 JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
 
+
+# web processes leave the jobs to a worker process (flask --app app worker) when false
+SCHEDULER_EMBEDDED = os.getenv("SCHEDULER_EMBEDDED", "true").lower() == "true"
@@ -1,9 +1,11 @@
 from flask import Flask, request
 from instance.database import init_db
+from instance.cache import init_cache
 from auth.jwt import init_jwt
 import models
 import router
 from config import configure_app
+from scheduled.audit import audit_log_setup
 from scheduled.jobs import scheduled_job_setup
 
 
@@ -11,9 +13,11 @@ def create_app(config_module = "config.local"):
     app = Flask(__name__)
     app.config.from_object(config_module)
     init_db(app)
+    init_cache(app)
     init_jwt(app)
     configure_app()
     scheduled_job_setup(app)
+    audit_log_setup(app)
     app.register_blueprint(router.auth_router)
     app.register_blueprint(router.user_router)
     app.register_blueprint(router.products_router)
@@ -7,3 +7,6 @@ JWT_SECRET_KEY = "testing"
 
 JWT_ACCESS_TOKEN_EXPIRES = False
 
+
+# jobs are run explicitly by the tests
+SCHEDULER_EMBEDDED = False
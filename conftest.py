@@ -1,5 +1,6 @@
 from datetime import timedelta
 import pytest
+from sqlalchemy import event
 from config.settings import cors_setup, create_app
 from instance.database import db as _db
 import models
@@ -18,6 +19,9 @@ def test_app():
 
     yield app
 
+    # queued audit entries belong to this test's database
+    app.extensions["audit_log"].close()
+
     with app.app_context():
         _db.session.rollback()
         _db.session.remove()
@@ -30,6 +34,26 @@ def db(test_app):
         yield _db
 
 
+@pytest.fixture
+def query_counter(db):
+    # counts statements sent to the database while the test runs
+    class QueryCounter:
+        def __init__(self):
+            self.count = 0
+            self.statements = []
+
+        def __call__(self, conn, cursor, statement, *args):
+            self.count += 1
+            self.statements.append(statement)
+
+    counter = QueryCounter()
+    event.listen(_db.engine, "before_cursor_execute", counter)
+
+    yield counter
+
+    event.remove(_db.engine, "before_cursor_execute", counter)
+
+
 @pytest.fixture
 def client(test_app):
     with test_app.test_client() as client:
@@ -543,6 +567,12 @@ def image_data_inject(test_app):
             image_list.append(image_model)
 
         _db.session.add_all(image_list)
+        # copy of the primary image, as the migration backfills it
+        _db.session.execute(
+            _db.update(models.Product)
+            .where(models.Product.id == 1)
+            .values(primary_image_url="https://example.com/image1.jpg")
+        )
         _db.session.commit()
 
         return image_list
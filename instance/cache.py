@@ -0,0 +1,206 @@
+from sqlalchemy import event, inspect, update
+from sqlalchemy.orm import Session
+from shared.cache import Cache
+
+
+# serialized ProductDetailResponse keyed by product id
+product_detail_cache = Cache("product_detail")
+
+# estimated product list totals keyed by normalized filters
+product_count_cache = Cache("product_count", ttl=60)
+
+# category / tag / price bucket counts keyed by normalized filters
+product_facet_cache = Cache("product_facets", ttl=60)
+
+# serialized CategoryTreeResponse, a single entry
+category_tree_cache = Cache("category_tree", maxsize=1)
+
+# authenticated user column snapshots keyed by user id, always in-process and bounded by the LRU,
+# other processes see a change once the TTL is over, authorization itself is checked against users.authz_version
+user_identity_cache = Cache("user_identity", ttl=60)
+
+# users.authz_version keyed by user id, shared between processes when a shared client is configured,
+# entries are dropped after the commit that bumps the version, the TTL bounds a read racing that commit
+authz_version_cache = Cache("authz_version", ttl=60)
+
+caches = {
+    "product_detail": product_detail_cache,
+    "product_count": product_count_cache,
+    "product_facets": product_facet_cache,
+    "category_tree": category_tree_cache,
+    "user_identity": user_identity_cache,
+    "authz_version": authz_version_cache,
+}
+
+
+def init_cache(app):
+    client = app.config.get("CACHE_SHARED_CLIENT")
+
+    if client is None and app.config.get("CACHE_REDIS_URL"):
+        # optional dependency, only needed for the shared backend
+        import redis
+
+        client = redis.Redis.from_url(app.config["CACHE_REDIS_URL"])
+
+    # fresh caches per app so entries never outlive the database they came from
+    product_detail_cache.configure(
+        maxsize=app.config.get("PRODUCT_CACHE_SIZE", 1024),
+        ttl=app.config.get("PRODUCT_CACHE_TTL", 300),
+        client=client,
+    )
+
+    product_count_cache.configure(
+        maxsize=app.config.get("PRODUCT_CACHE_SIZE", 1024),
+        ttl=app.config.get("PRODUCT_COUNT_CACHE_TTL", 60),
+        client=client,
+    )
+
+    product_facet_cache.configure(
+        maxsize=app.config.get("PRODUCT_CACHE_SIZE", 1024),
+        ttl=app.config.get("PRODUCT_COUNT_CACHE_TTL", 60),
+        client=client,
+    )
+
+    category_tree_cache.configure(
+        maxsize=1,
+        ttl=app.config.get("CATEGORY_TREE_CACHE_TTL", 3600),
+        client=client,
+    )
+
+    user_identity_cache.configure(
+        maxsize=app.config.get("USER_IDENTITY_CACHE_SIZE", 4096),
+        ttl=app.config.get("USER_IDENTITY_CACHE_TTL", 60),
+    )
+
+    authz_version_cache.configure(
+        maxsize=app.config.get("USER_IDENTITY_CACHE_SIZE", 4096),
+        ttl=app.config.get("AUTHZ_VERSION_CACHE_TTL", 60),
+        client=client,
+    )
+
+    for cache in caches.values():
+        cache.clear()
+
+
+def invalidate_user_identity(user_ids):
+    for user_id in user_ids:
+        user_identity_cache.delete(user_id)
+
+
+def invalidate_authz_version(user_ids):
+    for user_id in user_ids:
+        authz_version_cache.delete(user_id)
+
+
+def bump_authorization_version(session, user_ids):
+    # in the flushing transaction, tokens carrying the previous version stop being trusted once it commits
+    from models.user import User
+
+    if user_ids:
+        session.connection().execute(
+            update(User.__table__)
+            .where(User.__table__.c.id.in_(user_ids))
+            .values(authz_version=User.__table__.c.authz_version + 1)
+        )
+
+        invalidate_after_commit(session, authorization_user_ids=user_ids)
+
+
+def invalidate_product_cache(product_ids):
+    for product_id in product_ids:
+        product_detail_cache.delete(product_id)
+
+
+@event.listens_for(Session, "after_flush")
+def collect_cache_invalidation_after_flush(session, flush_context):
+    from models.product import Product, ProductCategory, ProductImage
+    from models.product_review import ProductRatingDelta, ProductReview
+    from models.user import AdminUser, User, VendorProfile
+
+    product_ids = set()
+    products_changed = False
+    categories_changed = False
+    user_ids = set()
+    authorization_user_ids = set()
+
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        # tag and sustainability association rows are written directly, their repo functions invalidate
+        if isinstance(obj, Product):
+            product_ids.add(obj.id)
+            products_changed = True
+
+        elif isinstance(obj, (ProductImage, ProductReview, ProductRatingDelta)):
+            product_ids.add(obj.product_id)
+
+        elif isinstance(obj, ProductCategory):
+            categories_changed = True
+
+        # profile, role (through the User collection), vendor status and admin changes
+        elif isinstance(obj, User):
+            user_ids.add(obj.id)
+
+            # last login and profile edits leave the authorization claims valid
+            if inspect(obj).attrs.role.history.has_changes():
+                authorization_user_ids.add(obj.id)
+
+        elif isinstance(obj, (VendorProfile, AdminUser)):
+            user_ids.add(obj.user_id)
+            authorization_user_ids.add(obj.user_id)
+
+    bump_authorization_version(session, authorization_user_ids)
+
+    invalidate_after_commit(
+        session,
+        product_ids=product_ids,
+        user_ids=user_ids,
+        products_changed=products_changed,
+        categories_changed=categories_changed,
+    )
+
+
+def invalidate_after_commit(
+    session,
+    product_ids=(),
+    user_ids=(),
+    authorization_user_ids=(),
+    products_changed=False,
+    categories_changed=False,
+):
+    # entries are dropped once the writes are visible to other sessions, a read between the
+    # flush and the commit would otherwise cache the old rows again; Core writes register here too
+    pending = session.info.setdefault(
+        "cache_invalidation",
+        {
+            "product_ids": set(),
+            "user_ids": set(),
+            "authorization_user_ids": set(),
+            "products_changed": False,
+            "categories_changed": False,
+        },
+    )
+    pending["product_ids"].update(product_ids)
+    pending["user_ids"].update(user_ids)
+    pending["authorization_user_ids"].update(authorization_user_ids)
+    pending["products_changed"] |= products_changed
+    pending["categories_changed"] |= categories_changed
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_caches_after_commit(session):
+    # kept across a rollback, dropping entries that did not change is harmless
+    pending = session.info.pop("cache_invalidation", None)
+    if pending is None:
+        return
+
+    invalidate_product_cache(pending["product_ids"])
+    invalidate_user_identity(pending["user_ids"])
+    invalidate_authz_version(pending["authorization_user_ids"])
+
+    # list totals and facets are estimates, only product rows themselves refresh them early
+    if pending["products_changed"]:
+        product_count_cache.clear()
+        product_facet_cache.clear()
+
+    # the tree is cached until any category write
+    if pending["categories_changed"]:
+        category_tree_cache.clear()
@@ -5,6 +5,16 @@ from flask_sqlalchemy import SQLAlchemy
 db = SQLAlchemy()
 migrate = Migrate()
 
+def dialect_insert(table):
+    # insert supporting on_conflict_do_update / on_conflict_do_nothing on postgres and sqlite
+    if db.engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    return insert(table)
+
+
 def init_db(app):
     db.init_app(app)
     migrate.init_app(app, db)
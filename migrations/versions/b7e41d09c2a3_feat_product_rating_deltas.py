@@ -0,0 +1,59 @@
+"""feat: product rating deltas
+
+Revision ID: b7e41d09c2a3
+Revises: a5219424f24c
+Create Date: 2026-10-18 09:12:31.412087
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e41d09c2a3'
+down_revision = 'a5219424f24c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('product_rating_deltas',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('review_count_delta', sa.Integer(), nullable=False),
+    sa.Column('rating_sum_delta', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('product_rating_deltas', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_product_rating_deltas_product_id'), ['product_id'], unique=False)
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('rating_sum', sa.Integer(), nullable=True))
+
+    # backfill rating stats from existing reviews
+    op.execute(
+        """
+        UPDATE products SET
+            review_count = COALESCE((SELECT COUNT(*) FROM product_reviews WHERE product_reviews.product_id = products.id), 0),
+            rating_sum = COALESCE((SELECT SUM(rating) FROM product_reviews WHERE product_reviews.product_id = products.id), 0)
+        """
+    )
+    op.execute(
+        """
+        UPDATE products SET average_rating = CASE
+            WHEN review_count > 0 THEN ROUND(CAST(rating_sum AS NUMERIC) / review_count, 2)
+            ELSE 0
+        END
+        """
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_column('rating_sum')
+
+    with op.batch_alter_table('product_rating_deltas', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_product_rating_deltas_product_id'))
+
+    op.drop_table('product_rating_deltas')
@@ -0,0 +1,69 @@
+"""feat: product search index
+
+Revision ID: d91f6c2b4a8e
+Revises: c3d8a1f5e7b2
+Create Date: 2026-10-18 11:37:05.902214
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd91f6c2b4a8e'
+down_revision = 'c3d8a1f5e7b2'
+branch_labels = None
+depends_on = None
+
+
+TAG_NAMES = (
+    "(SELECT {aggregate}(product_tags.name, ' ') FROM product_tag_association "
+    "JOIN product_tags ON product_tags.id = product_tag_association.tag_id "
+    "WHERE product_tag_association.product_id = products.id)"
+)
+
+ATTRIBUTE_NAMES = (
+    "(SELECT {aggregate}(sustainability_attributes.name, ' ') FROM product_sustainability_association "
+    "JOIN sustainability_attributes ON sustainability_attributes.id = product_sustainability_association.sustainability_attribute_id "
+    "WHERE product_sustainability_association.product_id = products.id)"
+)
+
+
+def upgrade():
+    # not expressible as alembic operations, the index is a tsvector + GIN table on postgres and an FTS5 table on sqlite
+    if op.get_bind().dialect.name == "postgresql":
+        tag_names = TAG_NAMES.format(aggregate="string_agg")
+        attribute_names = ATTRIBUTE_NAMES.format(aggregate="string_agg")
+
+        op.execute(
+            "CREATE TABLE product_search ("
+            "product_id INTEGER PRIMARY KEY REFERENCES products (id), "
+            "document TSVECTOR NOT NULL)"
+        )
+        op.execute("CREATE INDEX ix_product_search_document ON product_search USING GIN (document)")
+        op.execute(
+            "INSERT INTO product_search (product_id, document) SELECT products.id, "
+            "setweight(to_tsvector('simple', products.name), 'A') || "
+            f"setweight(to_tsvector('simple', coalesce({tag_names}, '')), 'B') || "
+            f"setweight(to_tsvector('simple', coalesce({attribute_names}, '')), 'C') || "
+            "setweight(to_tsvector('simple', coalesce(products.description, '')), 'D') "
+            "FROM products"
+        )
+
+    else:
+        tag_names = TAG_NAMES.format(aggregate="group_concat")
+        attribute_names = ATTRIBUTE_NAMES.format(aggregate="group_concat")
+
+        op.execute(
+            "CREATE VIRTUAL TABLE product_search USING fts5("
+            "name, description, tags, attributes, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            "INSERT INTO product_search (rowid, name, description, tags, attributes) "
+            "SELECT products.id, products.name, coalesce(products.description, ''), "
+            f"coalesce({tag_names}, ''), coalesce({attribute_names}, '') FROM products"
+        )
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS product_search")
@@ -5,6 +5,7 @@ from .user import (
     VendorProfile,
     AdminUser,
     AdminLog,
+    AdminLogDailyCount,
     UserRole
     )
 from .product import (
@@ -20,7 +21,8 @@ from .order import (
     CartItem, 
     Order, 
     OrderItem, 
-    OrderStatusHistory
+    OrderStatusHistory,
+    VendorSalesRollup,
     )
 from .article import (
     Article,
@@ -32,6 +34,11 @@ from .testimonial import (
 
 from .product_review import (
     ProductReview,
+    ProductRatingDelta,
+)
+
+from .scheduled_job import (
+    ScheduledJob,
 )
 
 __all__ = [
@@ -40,6 +47,7 @@ __all__ = [
     "UserPaymentMethod",
     "AdminUser",
     "AdminLog",
+    "AdminLogDailyCount",
     "VendorProfile",
     "ProductCategory",
     "SustainabilityAttribute",
@@ -53,7 +61,10 @@ __all__ = [
     "Order",
     "OrderItem",
     "OrderStatusHistory",
+    "VendorSalesRollup",
     "ProductReview",
+    "ProductRatingDelta",
+    "ScheduledJob",
     "Article",
     "VendorTestimonial",
     "UserRole",
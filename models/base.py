@@ -8,6 +8,7 @@ class BaseModel(db.Model):
     __abstract__ = True
 
     id = db.Column(db.Integer, primary_key=True)
-    created_at = db.Column(db.DateTime, default=time.now())
-    updated_at = db.Column(db.DateTime, default=time.now(), onupdate=time.now())
+    # callables, evaluated for every row
+    created_at = db.Column(db.DateTime, default=time.now)
+    updated_at = db.Column(db.DateTime, default=time.now, onupdate=time.now)
 
@@ -1,3 +1,4 @@
+from datetime import date
 from instance.database import db
 from .base import BaseModel
 from enum import Enum
@@ -12,6 +13,10 @@ class OrderStatus(Enum):
     COMPLETED = "completed"
 
 
+# orders in these statuses do not count towards vendor sales
+UNCOUNTED_ORDER_STATUSES = (OrderStatus.CANCELLED.value, OrderStatus.RETURNED.value)
+
+
 class PaymentStatus(Enum):
     PENDING = "pending"
     PAID = "paid"
@@ -37,6 +42,11 @@ class CartItem(db.Model, BaseModel):
 
 class Order(db.Model, BaseModel):
     __tablename__ = "orders"
+    __table_args__ = (
+        db.Index("ix_orders_created_at", "created_at"),
+        # a customer's order history, read backwards for newest first
+        db.Index("ix_orders_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
 
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"))
     order_number = db.Column(db.String(20), unique=True, nullable=False)
@@ -58,6 +68,12 @@ class Order(db.Model, BaseModel):
 
 class OrderItem(db.Model, BaseModel):
     __tablename__ = "order_items"
+    __table_args__ = (
+        # a vendor's order lines, joined to their orders
+        db.Index("ix_order_items_vendor_id_order_id", "vendor_id", "order_id"),
+        # a vendor's latest order lines, read backwards for newest first
+        db.Index("ix_order_items_vendor_id_created_at_id", "vendor_id", "created_at", "id"),
+    )
 
     order_id = db.Column(db.Integer, db.ForeignKey("orders.id"), nullable=False)
     product_id = db.Column(db.Integer, db.ForeignKey("products.id"))
@@ -74,3 +90,22 @@ class OrderStatusHistory(db.Model, BaseModel):
     status = db.Column(db.String(20), nullable=False)
     changed_by = db.Column(db.Integer, db.ForeignKey("users.id"))
     notes = db.Column(db.Text)
+
+
+# vendor sales totals per day, per month and over the vendor's lifetime, kept up to date at checkout
+# and when an order is cancelled or returned, so the stats never scan order history
+class VendorSalesRollup(db.Model):
+    __tablename__ = "vendor_sales_rollups"
+
+    # period_start of the lifetime row
+    LIFETIME_START = date(1970, 1, 1)
+
+    vendor_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    period = db.Column(db.String(10), primary_key=True)  # day, month, lifetime
+    period_start = db.Column(db.Date, primary_key=True)
+    revenue = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    # order lines, what the vendor stats report as orders
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    # hyperloglog sketch of the customers, see shared.hll
+    customer_sketch = db.Column(db.LargeBinary, nullable=False)
@@ -1,5 +1,6 @@
 from datetime import timezone
 from enum import Enum
+from sqlalchemy import DDL, event
 from instance.database import db
 from shared.time import now
 from .base import BaseModel
@@ -11,6 +12,10 @@ class PromotionType(Enum):
     FIXED_DISCOUNT = "fixed_discount"
 
 
+# joins tag names when they are aggregated into a single column, cannot be typed into a tag name
+TAG_NAME_SEPARATOR = "\x1f"
+
+
 #------------------- assosiation tables for many to many relationship----------------------
 product_tag_association = db.Table(
     "product_tag_association",
@@ -88,6 +93,10 @@ class ProductCategory(db.Model, BaseModel):
 
 class SustainabilityAttribute(db.Model, BaseModel):
     __tablename__ = "sustainability_attributes"
+    __table_args__ = (
+        # names are resolved in bulk and inserted with ON CONFLICT DO NOTHING
+        db.Index("ix_sustainability_attributes_name", "name", unique=True),
+    )
 
     name = db.Column(db.String(50), nullable=False)
     description = db.Column(db.Text)
@@ -96,6 +105,10 @@ class SustainabilityAttribute(db.Model, BaseModel):
 
 class ProductTag(db.Model, BaseModel):
     __tablename__ = "product_tags"
+    __table_args__ = (
+        # names are resolved in bulk and inserted with ON CONFLICT DO NOTHING
+        db.Index("ix_product_tags_name", "name", unique=True),
+    )
 
     name = db.Column(db.String(50), nullable=False)
     description = db.Column(db.Text)
@@ -103,6 +116,11 @@ class ProductTag(db.Model, BaseModel):
 
 class Product(db.Model, BaseModel):
     __tablename__ = "products"
+    __table_args__ = (
+        # seek indexes for cursor pagination of the product list
+        db.Index("ix_products_active_created_at_id", "is_active", "created_at", "id"),
+        db.Index("ix_products_active_price_id", "is_active", "price", "id"),
+    )
 
     vendor_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     category_id = db.Column(db.Integer, db.ForeignKey("product_categories.id"))
@@ -113,7 +131,11 @@ class Product(db.Model, BaseModel):
     min_order_quantity = db.Column(db.Integer, default=1)
     average_rating = db.Column(db.Numeric(3, 2), default=0.00)
     review_count = db.Column(db.Integer, default=0)
+    # running total of review ratings, kept so rating deltas can be applied without rescanning reviews
+    rating_sum = db.Column(db.Integer, default=0)
     is_active = db.Column(db.Boolean, default=True)
+    # copy of the primary ProductImage url, kept by the product image repo functions
+    primary_image_url = db.Column(db.String(255))
 
     # Relationships
     images = db.relationship("ProductImage", backref="product", lazy=True)
@@ -124,17 +146,6 @@ class Product(db.Model, BaseModel):
     cart_items = db.relationship("CartItem", backref="product", lazy=True)
     order_items = db.relationship("OrderItem", backref="product", lazy=True)
 
-    def update_rating_stats(self):
-        # Recalculates average rating and review count
-        reviews = self.reviews
-        if reviews:
-            total = sum(review.rating for review in reviews)
-            self.average_rating = round(total / len(reviews), 2)
-            self.review_count = len(reviews)
-        else:
-            self.average_rating = 0.00
-            self.review_count = 0
-
 
 class ProductImage(db.Model, BaseModel):
     __tablename__ = "product_images"
@@ -187,6 +198,8 @@ class Promotion(db.Model, BaseModel):
     image_url = db.Column(db.String(255))
     max_discount = db.Column(db.Numeric(10, 2))  # For percentage discounts
     usage_limit = db.Column(db.Integer)  # Max number of uses (optional)
+    # orders the promotion was applied to, kept so usage limits need no COUNT over orders
+    usage_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     # Relationships
     products = db.relationship(
@@ -225,4 +238,33 @@ class Currency(db.Model, BaseModel):
 
     code = db.Column(db.String(3), primary_key=True)  # ISO 4217 (USD, EUR, etc.)
     name = db.Column(db.String(50))
-    conversion_rate = db.Column(db.Numeric(10, 6))  # Relative to base currency
\ No newline at end of file
+    conversion_rate = db.Column(db.Numeric(10, 6))  # Relative to base currency
+
+# ------------------------------------------------------- Full-text search index ------------------------------------------------
+
+# inverted index over name, description, tag and sustainability attribute names, maintained by repo.product_search
+# postgres keeps a weighted tsvector per product behind a GIN index, sqlite (tests, local dev) an FTS5 table keyed by product id
+PRODUCT_SEARCH_DDL = {
+    "postgresql": [
+        "CREATE TABLE IF NOT EXISTS product_search ("
+        "product_id INTEGER PRIMARY KEY REFERENCES products (id), "
+        "document TSVECTOR NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS ix_product_search_document ON product_search USING GIN (document)",
+    ],
+    "sqlite": [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS product_search USING fts5("
+        "name, description, tags, attributes, tokenize = 'unicode61 remove_diacritics 2')",
+    ],
+}
+
+for dialect_name, statements in PRODUCT_SEARCH_DDL.items():
+    for statement in statements:
+        event.listen(
+            Product.__table__, "after_create", DDL(statement).execute_if(dialect=dialect_name)
+        )
+
+    event.listen(
+        Product.__table__,
+        "before_drop",
+        DDL("DROP TABLE IF EXISTS product_search").execute_if(dialect=dialect_name),
+    )
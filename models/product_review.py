@@ -15,3 +15,14 @@ class ProductReview(db.Model, BaseModel):
 
     def __repr__(self):
         return f"<Review {self.id} for Product {self.product_id}>"
+
+
+# pending (count, sum) changes to a product's rating stats, written in the same transaction as the review change
+# the scheduled job folds them into products in batches and deletes them
+class ProductRatingDelta(db.Model):
+    __tablename__ = 'product_rating_deltas'
+
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False, index=True)
+    review_count_delta = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum_delta = db.Column(db.Integer, nullable=False, default=0)
@@ -0,0 +1,24 @@
+from instance.database import db
+
+
+# one row per periodic job, the lease makes sure a single process runs it at a time
+# and the run columns are the history shown by /task-status
+class ScheduledJob(db.Model):
+    __tablename__ = "scheduled_jobs"
+
+    name = db.Column(db.String(50), primary_key=True)
+    # due time shared by every process, moved forward by whoever ran the job
+    next_run_at = db.Column(db.DateTime, nullable=False)
+    # process holding the lease, until lease_until
+    owner = db.Column(db.String(100))
+    lease_until = db.Column(db.DateTime)
+
+    last_started_at = db.Column(db.DateTime)
+    last_finished_at = db.Column(db.DateTime)
+    last_duration_ms = db.Column(db.Float)
+    # succeeded, failed or timeout
+    last_status = db.Column(db.String(20))
+    last_error = db.Column(db.Text)
+    last_failed_at = db.Column(db.DateTime)
+    run_count = db.Column(db.Integer, nullable=False, default=0)
+    failure_count = db.Column(db.Integer, nullable=False, default=0)
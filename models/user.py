@@ -36,6 +36,8 @@ class User(db.Model, BaseModel):
     profile_image_url = db.Column(db.String(255))
     bio = db.Column(db.Text)
     last_login = db.Column(db.DateTime)
+    # raised with every role, admin or vendor status change, access tokens carry the version they were issued at
+    authz_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     # Relationships
     addresses = db.relationship("UserAddress", backref="user", lazy=True)
@@ -144,9 +146,27 @@ class AdminUser(db.Model):
 
 # logs of admin actions
 class AdminLog(db.Model):
+    __table_args__ = (
+        # newest first browsing, overall and per admin, with keyset pagination on (timestamp, id)
+        db.Index("ix_admin_log_timestamp_id", "timestamp", "id"),
+        db.Index("ix_admin_log_admin_id_timestamp_id", "admin_id", "timestamp", "id"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     admin_id = db.Column(db.Integer, db.ForeignKey("users.id"))
     action = db.Column(db.String(50))  # route path
+    status_code = db.Column(db.Integer)
+    duration_ms = db.Column(db.Float)
     timestamp = db.Column(db.DateTime, default=time.now())
+
+
+# admin actions per admin and day, admin logs past the retention period are compacted into it
+class AdminLogDailyCount(db.Model):
+    __tablename__ = "admin_log_daily_counts"
+
+    day = db.Column(db.Date, primary_key=True)
+    admin_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    action = db.Column(db.String(50), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
     
     
@@ -1,8 +1,12 @@
-from instance.database import db
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import Session
+from instance.cache import invalidate_after_commit
+from instance.database import db, dialect_insert
 from models.product import Product, ProductCategory, Promotion
-from models.user import AdminLog, User
+from models.user import AdminLog, AdminLogDailyCount, User
 from models.article import Article
 from repo.product import get_category_by_id_repo
+from shared.cursor import encode_cursor
 from shared.time import now, datetime_from_string
 
 
@@ -19,19 +23,107 @@ def admin_by_id_repo(user_id):
         return None
 
 
-def log_admin_action_repo(user, request):
-    log = AdminLog(
-        admin_id=user.id,
-        action=f"{request.method} {request.path}",
-        timestamp=datetime_from_string(str(now())),
+def admin_log_entry(user, request, response, duration_ms):
+    return {
+        "admin_id": user.id,
+        "action": f"{request.method} {request.path}",
+        "status_code": response.status_code,
+        "duration_ms": duration_ms,
+        "timestamp": datetime_from_string(str(now())),
+    }
+
+
+def insert_admin_logs_repo(entries):
+    # own session, a batch never commits request state
+    with Session(db.engine) as session:
+        session.execute(db.insert(AdminLog), entries)
+        session.commit()
+
+
+def filtered_admin_logs_query(log_filters):
+    logs = db.select(AdminLog)
+
+    if log_filters.admin_id is not None:
+        logs = logs.where(AdminLog.admin_id == log_filters.admin_id)
+
+    if log_filters.action:
+        logs = logs.where(AdminLog.action.startswith(log_filters.action, autoescape=True))
+
+    if log_filters.start:
+        logs = logs.where(AdminLog.timestamp >= log_filters.start)
+
+    if log_filters.end:
+        logs = logs.where(AdminLog.timestamp < log_filters.end)
+
+    return logs
+
+
+def get_admin_logs_repo(log_filters):
+    # newest first, page and per_page are read from the request
+    return db.paginate(
+        filtered_admin_logs_query(log_filters).order_by(
+            AdminLog.timestamp.desc(), AdminLog.id.desc()
+        )
     )
 
-    db.session.add(log)
-    db.session.commit()
 
+def get_admin_logs_cursor_page_repo(log_filters):
+    per_page = log_filters.per_page or 50
+
+    logs = filtered_admin_logs_query(log_filters)
+
+    if log_filters.after:
+        # seek past the last row of the previous page, served by the (timestamp, id) indexes
+        logs = logs.where(
+            tuple_(AdminLog.timestamp, AdminLog.id) < tuple_(*log_filters.after)
+        )
+
+    # newest first, one extra row tells if there is a next page
+    rows = db.session.execute(
+        logs.order_by(AdminLog.timestamp.desc(), AdminLog.id.desc()).limit(per_page + 1)
+    ).scalars().all()
+
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
 
-def get_admin_logs_repo():
-    return db.paginate(db.select(AdminLog))
+    next_cursor = None
+    if has_next:
+        next_cursor = encode_cursor(rows[-1].timestamp.isoformat(), rows[-1].id)
+
+    return {
+        "logs": rows,
+        "has_next": has_next,
+        "next_cursor": next_cursor,
+        "per_page": per_page,
+    }
+
+
+def rollup_admin_logs_repo(before):
+    # compacts logs older than before into per admin, action and day counts
+    day = func.date(AdminLog.timestamp)
+
+    daily_counts = (
+        db.select(day, AdminLog.admin_id, AdminLog.action, func.count())
+        .where(AdminLog.timestamp < before)
+        .group_by(day, AdminLog.admin_id, AdminLog.action)
+    )
+
+    insert = dialect_insert(AdminLogDailyCount).from_select(
+        ["day", "admin_id", "action", "count"], daily_counts
+    )
+    # a day already compacted by an earlier run is added to
+    insert = insert.on_conflict_do_update(
+        index_elements=["day", "admin_id", "action"],
+        set_={"count": AdminLogDailyCount.count + insert.excluded["count"]},
+    )
+
+    db.session.execute(insert)
+    compacted = db.session.execute(
+        db.delete(AdminLog).where(AdminLog.timestamp < before)
+    ).rowcount
+    db.session.commit()
+
+    return compacted
 
 
 # ------------------ CATEGORY -----------------
@@ -73,16 +165,34 @@ def update_category_repo(category_id, category_data):
     db.session.commit()
 
 
-def soft_delete_category_repo(category_id):
+def soft_delete_category_tree_repo(category_id):
     category = get_category_by_id_repo(category_id)
 
-    category.is_active = False
+    # the category and all of its descendants
+    subtree = (
+        db.select(ProductCategory.id)
+        .filter_by(id=category.id)
+        .cte("category_subtree", recursive=True)
+    )
+    subtree = subtree.union(
+        db.select(ProductCategory.id).join(
+            subtree, ProductCategory.parent_category_id == subtree.c.id
+        )
+    )
 
+    # one UPDATE for the whole subtree
     # parent category none to prevent being queried in get tree
-    category.parent_category_id = None
+    db.session.execute(
+        db.update(ProductCategory)
+        .where(ProductCategory.id.in_(db.select(subtree.c.id)))
+        .values(is_active=False, parent_category_id=None)
+        .execution_options(synchronize_session=False)
+    )
+
+    # bulk update does not go through the flush, the tree cache is dropped on commit
+    invalidate_after_commit(db.session, categories_changed=True)
 
     db.session.commit()
-    return category
 
 
 # ------------------ ARTICLE ------------------
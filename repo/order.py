@@ -1,8 +1,18 @@
-from sqlalchemy import and_, func
+from sqlalchemy import case, or_, tuple_
+from instance.cache import invalidate_after_commit
 from instance.database import db
-from models.order import Order, OrderItem, OrderStatus, OrderStatusHistory, PaymentStatus, ShoppingCart, CartItem
-from sqlalchemy.orm import contains_eager, joinedload
-from models.product import Product, ProductImage, Promotion, promotion_order_association
+from models.order import Order, OrderItem, OrderStatus, OrderStatusHistory, PaymentStatus, ShoppingCart, CartItem, UNCOUNTED_ORDER_STATUSES
+from sqlalchemy.orm import contains_eager, joinedload, selectinload
+from models.product import (
+    Product,
+    Promotion,
+    promotion_category_association,
+    promotion_order_association,
+    promotion_product_association,
+)
+from repo.product import verify_product_repo
+from repo.vendor_sales import order_sales_lines_repo, record_vendor_sales_repo
+from shared.cursor import encode_cursor
 
 
 def get_shopping_cart_repo(user):
@@ -23,23 +33,10 @@ def get_cart_items_repo(cart_id):
             CartItem.quantity,
             Product.name.label("product_name"),
             Product.price,
-            func.max(ProductImage.image_url).label("image_url"),
+            Product.primary_image_url.label("image_url"),
         )
         .join(CartItem.product)
-        .outerjoin(
-            ProductImage,
-            and_(
-                ProductImage.product_id == Product.id,
-                ProductImage.is_primary == True,  # noqa: E712
-            ),
-        )
         .filter(CartItem.cart_id == cart_id)
-        .group_by(
-            CartItem.product_id,
-            CartItem.quantity,
-            Product.name,
-            Product.price,
-        )
         .all()
     )
 
@@ -107,6 +104,12 @@ def get_cart_with_items_and_product_repo(user_id):
     ).scalars().first()
 
 
+def get_cart_by_user_id_repo(user_id):
+    return db.session.execute(
+        db.select(ShoppingCart).filter_by(user_id=user_id)
+    ).scalar_one_or_none()
+
+
 def checkout_order_repo(cart, order_data_validated, user_id, order_number):
     order = Order(
         user_id=user_id,
@@ -125,23 +128,80 @@ def checkout_order_repo(cart, order_data_validated, user_id, order_number):
     return order
 
 
-def process_order_items(order, item, product):
-    # create order item
-    order_item = OrderItem(
-        order_id=order.id,
-        product_id=item.product_id,
-        quantity=item.quantity,
-        unit_price=product.price,
-        total_price=product.price * item.quantity,
-        vendor_id=product.vendor_id,
-    )
-    db.session.add(order_item)
+def checkout_cart_items_repo(order, cart):
+    # turns the cart into order items inside the caller's transaction,
+    # returns an (issue, product name) pair when the cart cannot be ordered, nothing is written then
+    cart_items = db.session.execute(
+        db.select(CartItem.product_id, CartItem.quantity).filter_by(cart_id=cart.id)
+    ).all()
+    quantities = {item.product_id: item.quantity for item in cart_items}
+
+    if not quantities:
+        return None
+
+    # lock every product of the cart, always in id order so concurrent checkouts cannot deadlock
+    products = db.session.execute(
+        db.select(Product)
+        .where(Product.id.in_(quantities))
+        .order_by(Product.id)
+        .with_for_update()
+    ).scalars().all()
+
+    for product in products:
+        issue, status = verify_product_repo(product, quantities[product.id])
+
+        if status is False:
+            return (issue, product.name)
+
+    # decrement all stock at once, a product another checkout drained in the meantime is not updated
+    ordered_quantity = case(quantities, value=Product.id)
+    updated = db.session.execute(
+        db.update(Product)
+        .where(
+            Product.id.in_(quantities),
+            Product.is_active == True,  # noqa: E712
+            Product.stock_quantity >= ordered_quantity,
+        )
+        .values(stock_quantity=Product.stock_quantity - ordered_quantity)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    if updated != len(quantities):
+        return ("Not enough stock", None)
+
+    # order items in one insert
+    order_items = [
+        {
+            "order_id": order.id,
+            "product_id": product.id,
+            "quantity": quantities[product.id],
+            "unit_price": product.price,
+            "total_price": product.price * quantities[product.id],
+            "vendor_id": product.vendor_id,
+        }
+        for product in products
+    ]
+    db.session.execute(db.insert(OrderItem), order_items)
 
-    # update product stock
-    product.stock_quantity -= item.quantity
+    # vendor sales rollups, in the same transaction as the order lines
+    record_vendor_sales_repo(order, order_items)
+
+    # empty the cart in one delete
+    db.session.execute(db.delete(CartItem).filter_by(cart_id=cart.id))
 
     # update order total amount
-    order.total_amount += order_item.total_price
+    order.total_amount = sum(item["total_price"] for item in order_items)
+
+    # stock and items were written around the session, reload them on next access
+    for product in products:
+        db.session.expire(product, ["stock_quantity"])
+    db.session.expire(order, ["items"])
+    db.session.expire(cart, ["items"])
+
+    # the stock update skipped the flush listener, cached details are dropped once the order commits
+    invalidate_after_commit(db.session, product_ids=quantities)
+
+    return None
 
 
 def add_order_status_history_repo(order, user_id):
@@ -154,10 +214,6 @@ def add_order_status_history_repo(order, user_id):
     db.session.add(order_status_history)
 
 
-def clear_shopping_cart_item_repo(item):
-   db.session.delete(item)
-
-
 def get_order_repo(user, order_number):
     return db.session.execute(
         db.select(Order)
@@ -170,7 +226,16 @@ def get_order_repo(user, order_number):
 
 
 def update_order_status_repo(order, status_request, user):
+    was_counted = order.status not in UNCOUNTED_ORDER_STATUSES
     order.status = status_request.status
+    is_counted = order.status not in UNCOUNTED_ORDER_STATUSES
+
+    # cancelling or returning takes the order out of the vendor sales, reopening puts it back
+    if was_counted != is_counted:
+        db.session.flush()
+        record_vendor_sales_repo(
+            order, order_sales_lines_repo(order.id), sign=1 if is_counted else -1
+        )
 
     status_history = OrderStatusHistory(
         order_id=order.id,
@@ -185,14 +250,59 @@ def update_order_status_repo(order, status_request, user):
     return order
 
 
-def get_all_orders_repo(user):
-    return (
-        db.session.execute(
-            db.select(Order).filter_by(user_id=user.id)
+def get_all_orders_repo(user, order_filters):
+    # paged once per_page or after is given, every order of the user otherwise as before
+    per_page = order_filters.per_page
+    if per_page is None and order_filters.after:
+        per_page = 20
+
+    orders = db.select(Order).where(Order.user_id == user.id)
+
+    if order_filters.status:
+        orders = orders.where(Order.status == order_filters.status)
+
+    if order_filters.from_:
+        orders = orders.where(Order.created_at >= order_filters.from_)
+
+    if order_filters.to:
+        orders = orders.where(Order.created_at < order_filters.to)
+
+    if order_filters.after:
+        # seek past the last order of the previous page, served by the (user_id, created_at, id) index
+        orders = orders.where(
+            tuple_(Order.created_at, Order.id) < tuple_(*order_filters.after)
         )
-        .scalars()
-    )
-    
+
+    # items with their products and the status history of the whole page are loaded in one query each
+    orders = orders.options(
+        selectinload(Order.items).joinedload(OrderItem.product),
+        selectinload(Order.status_history),
+    ).order_by(Order.created_at.desc(), Order.id.desc())
+
+    if per_page is None:
+        return {
+            "orders": db.session.execute(orders).scalars().all(),
+            "has_next": False,
+            "next_cursor": None,
+            "per_page": None,
+        }
+
+    # one extra row tells if there is a next page
+    rows = db.session.execute(orders.limit(per_page + 1)).scalars().all()
+
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+
+    next_cursor = None
+    if has_next:
+        next_cursor = encode_cursor(rows[-1].created_at.isoformat(), rows[-1].id)
+
+    return {
+        "orders": rows,
+        "has_next": has_next,
+        "next_cursor": next_cursor,
+        "per_page": per_page,
+    }
 
 
 # ----------------------------------------------------------- Promotions -----------------------------------------------------------
@@ -209,23 +319,11 @@ def validate_promotion_repo(promo_code, cart_items):
     if not active:
         return {"valid": False, "error": "Promotion not active"}
 
-    # Get eligible product IDs for this promotion
-    eligible_product_ids = set()
-
-    # Products directly added to promotion
-    if promotion.products:
-        eligible_product_ids.update(product.id for product in promotion.products)
-
-    # Products from promotion categories
-    if promotion.categories:
-        for category in promotion.categories:
-            eligible_product_ids.update(product.id for product in category.products)
-
     # convert to list
     cart_product_ids = {item.product_id for item in cart_items}
 
-    # finds the intersection
-    eligible_items = list(cart_product_ids & eligible_product_ids)
+    # only the cart's products are checked against the promotion
+    eligible_items = get_promotion_eligible_product_ids_repo(promotion.id, cart_product_ids)
 
     # No eligible items
     if not eligible_items:
@@ -233,7 +331,7 @@ def validate_promotion_repo(promo_code, cart_items):
 
     usage_limit = promotion.usage_limit
 
-    if (usage_limit or usage_limit == 0) and promotion.orders.count() >= usage_limit:
+    if usage_limit is not None and promotion.usage_count >= usage_limit:
         return {"valid": False, "error": "Promo usage limit reached"}
 
     return {
@@ -243,6 +341,54 @@ def validate_promotion_repo(promo_code, cart_items):
     }
 
 
+def get_promotion_eligible_product_ids_repo(promotion_id, product_ids):
+    # products linked to the promotion directly or through their category,
+    # looked up by the promotion link primary keys so the cost follows the number of products asked about
+    linked_directly = (
+        db.select(promotion_product_association.c.product_id)
+        .where(
+            promotion_product_association.c.promotion_id == promotion_id,
+            promotion_product_association.c.product_id == Product.id,
+        )
+        .exists()
+    )
+
+    linked_by_category = (
+        db.select(promotion_category_association.c.category_id)
+        .where(
+            promotion_category_association.c.promotion_id == promotion_id,
+            promotion_category_association.c.category_id == Product.category_id,
+        )
+        .exists()
+    )
+
+    return db.session.execute(
+        db.select(Product.id)
+        .where(Product.id.in_(product_ids), or_(linked_directly, linked_by_category))
+        .order_by(Product.id)
+    ).scalars().all()
+
+
+def claim_promotion_usage_repo(promotion):
+    # counts the use only while under the limit, two checkouts cannot both take the last use
+    claimed = db.session.execute(
+        db.update(Promotion)
+        .where(
+            Promotion.id == promotion.id,
+            or_(
+                Promotion.usage_limit.is_(None),
+                Promotion.usage_count < Promotion.usage_limit,
+            ),
+        )
+        .values(usage_count=Promotion.usage_count + 1)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    db.session.expire(promotion, ["usage_count"])
+
+    return claimed == 1
+
+
 def pre_checkout_promotion_calculation(cart_items, promotion, eligible_item_ids, total_amount):
     # convert to list
     eligible_order_items = [
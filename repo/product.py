@@ -1,13 +1,21 @@
-from instance.database import db
+from sqlalchemy import Boolean, Integer, Numeric, bindparam, case, cast, column, func, literal_column, tuple_, values
+from instance.cache import invalidate_after_commit, product_count_cache, product_facet_cache
+from instance.database import db, dialect_insert
 from models.product import (
+    TAG_NAME_SEPARATOR,
     Product,
     ProductCategory,
     ProductImage,
     SustainabilityAttribute,
     ProductTag,
     Wishlist,
+    product_sustainability_association,
+    product_tag_association,
 )
 from models.user import VendorProfile
+from shared.cursor import encode_cursor
+from shared.pagination import paginate_ids
+from shared.time import now
 
 
 def create_product_repo(product_data, user_id):
@@ -28,21 +36,24 @@ def create_product_repo(product_data, user_id):
     return product
 
 
-def process_product_images_repo(primary_image, images_list, product_id):
+def process_product_images_repo(primary_image, images_list, product):
     for image_url in images_list:
         product_image = ProductImage(
-            product_id=product_id,
+            product_id=product.id,
             image_url=image_url,
         )
 
         db.session.add(product_image)
 
     product_image = ProductImage(
-        product_id=product_id, image_url=primary_image, is_primary=True
+        product_id=product.id, image_url=primary_image, is_primary=True
     )
 
     db.session.add(product_image)
 
+    # copy on the product, read paths never need the images table for it
+    product.primary_image_url = primary_image
+
 
 def update_product_image_repo(product, primary_image, images_list):
     if primary_image:
@@ -54,6 +65,8 @@ def update_product_image_repo(product, primary_image, images_list):
 
         db.session.add(product_image)
 
+        product.primary_image_url = primary_image
+
     if images_list:
         # delete non-primary images
         db.session.execute(
@@ -73,56 +86,247 @@ def update_product_image_repo(product, primary_image, images_list):
             db.session.add(product_image)
 
 
+def existing_category_ids_repo(category_ids):
+    if not category_ids:
+        return set()
+
+    return set(
+        db.session.execute(
+            db.select(ProductCategory.id).where(ProductCategory.id.in_(category_ids))
+        ).scalars()
+    )
+
+
+def import_products_repo(products_data, user_id):
+    # a chunk of validated products written with one multi-row statement per table, returns their ids
+    # postgres matches returned ids to their rows itself, on sqlite that would cost a statement per row;
+    # sqlite has a single writer and numbers the rows of a multi-row insert in order, so sorting matches them
+    sort_by_parameter_order = db.engine.dialect.name == "postgresql"
+
+    product_ids = db.session.execute(
+        db.insert(Product).returning(Product.id, sort_by_parameter_order=sort_by_parameter_order),
+        [
+            {
+                "name": product_data.name,
+                "description": product_data.description,
+                "price": float(product_data.price),
+                "category_id": product_data.category_id,
+                "vendor_id": user_id,
+                "stock_quantity": product_data.stock_quantity,
+                "min_order_quantity": product_data.min_order_quantity,
+                "primary_image_url": product_data.primary_image_url,
+            }
+            for product_data in products_data
+        ],
+    ).scalars().all()
+
+    if not sort_by_parameter_order:
+        product_ids.sort()
+
+    products = list(zip(product_ids, products_data))
+
+    db.session.execute(
+        db.insert(ProductImage),
+        [
+            {"product_id": product_id, "image_url": image_url, "is_primary": is_primary}
+            for product_id, product_data in products
+            for image_url, is_primary in [
+                *((image_url, False) for image_url in product_data.images or []),
+                (product_data.primary_image_url, True),
+            ]
+        ],
+    )
+
+    # names of the whole chunk are resolved together
+    tags = resolve_names_repo(
+        ProductTag, [tag for _, product_data in products for tag in product_data.tags]
+    )
+    attributes = resolve_names_repo(
+        SustainabilityAttribute,
+        [
+            attribute
+            for _, product_data in products
+            for attribute in product_data.sustainability_attributes
+        ],
+    )
+
+    tag_rows = [
+        {"product_id": product_id, "tag_id": tags[tag]}
+        for product_id, product_data in products
+        for tag in dict.fromkeys(product_data.tags)
+    ]
+    if tag_rows:
+        db.session.execute(db.insert(product_tag_association), tag_rows)
+
+    attribute_rows = [
+        {"product_id": product_id, "sustainability_attribute_id": attributes[attribute]}
+        for product_id, product_data in products
+        for attribute in dict.fromkeys(product_data.sustainability_attributes)
+    ]
+    if attribute_rows:
+        db.session.execute(db.insert(product_sustainability_association), attribute_rows)
+
+    # rows written directly do not pass the flush listener
+    invalidate_after_commit(db.session, products_changed=True)
+
+    return product_ids
+
+
+def resolve_names_repo(model, names):
+    # name -> id for every name, missing ones are created, in at most three statements
+    names = list(dict.fromkeys(names))
+    if not names:
+        return {}
+
+    resolved = dict(
+        db.session.execute(
+            db.select(model.name, model.id).where(model.name.in_(names))
+        ).all()
+    )
+
+    missing = [name for name in names if name not in resolved]
+    if missing:
+        # only rows actually inserted come back, names taken by a concurrent write are read again
+        resolved.update(
+            db.session.execute(
+                dialect_insert(model)
+                .on_conflict_do_nothing(index_elements=["name"])
+                .returning(model.name, model.id),
+                [{"name": name} for name in missing],
+            ).all()
+        )
+
+    missing = [name for name in names if name not in resolved]
+    if missing:
+        resolved.update(
+            db.session.execute(
+                db.select(model.name, model.id).where(model.name.in_(missing))
+            ).all()
+        )
+
+    return {name: resolved[name] for name in names}
+
+
+def replace_product_names_repo(association, column, product, names_by_id):
+    # association rows of the product are rewritten with one delete and one executemany insert
+    db.session.execute(
+        db.delete(association).where(association.c.product_id == product.id)
+    )
+
+    if names_by_id:
+        db.session.execute(
+            db.insert(association),
+            [{"product_id": product.id, column: name_id} for name_id in names_by_id.values()],
+        )
+
+    # tags and facets are read from the rows written here, not from the Product collections
+    invalidate_after_commit(db.session, product_ids=[product.id], products_changed=True)
+
+
 def process_tags_repo(tags_list, product):
-    for tag_name in tags_list:
-        tag = db.session.execute(
-            db.select(ProductTag).filter_by(name=tag_name)
-        ).scalar_one_or_none()
+    # pending product changes go first, the association rows below are written directly
+    db.session.flush()
 
-        if not tag:
-            tag = ProductTag(name=tag_name)
-            db.session.add(tag)
+    tags = resolve_names_repo(ProductTag, tags_list)
+    replace_product_names_repo(product_tag_association, "tag_id", product, tags)
 
-        # create many to many bi-directional relationship
-        # appends product.id and tag.id to association table
-        product.tags.append(tag)
+    # reloaded on next access
+    db.session.expire(product, ["tags"])
 
 
 def process_sustainability_repo(sustainability_attributes, product):
-    for sustainability_attribute in sustainability_attributes:
-        attribute = db.session.execute(
-            db.select(SustainabilityAttribute).filter_by(name=sustainability_attribute)
-        ).scalar_one_or_none()
+    db.session.flush()
 
-        if not attribute:
-            attribute = SustainabilityAttribute(name=sustainability_attribute)
-            db.session.add(attribute)
+    attributes = resolve_names_repo(SustainabilityAttribute, sustainability_attributes)
+    replace_product_names_repo(
+        product_sustainability_association, "sustainability_attribute_id", product, attributes
+    )
 
-        # create many to many bi-directional relationship
-        # appends product.id and attribute.id to association table
-        product.sustainability_attributes.append(attribute)
+    db.session.expire(product, ["sustainability_attributes"])
 
 
 def get_products_list_repo(product_filter, request_args):
-    # base query
-    products = (
+    # phase 1 pages over product ids, tag filter is an EXISTS so every product is one row
+    product_ids = (
+        filtered_products_query(product_filter)
+        .with_only_columns(Product.id)
+        .order_by(Product.id)
+    )
+
+    # phase 2 projects the list columns for exactly the ids of the page
+    paginated_products = paginate_ids(
+        product_ids,
+        lambda ids: db.session.execute(
+            product_list_projection(db.select(Product).where(Product.id.in_(ids)))
+        ).all(),
+    )
+
+    return paginated_products
+
+
+def product_children_options():
+    # one extra statement per collection for the whole batch, instead of one per product
+    return (
+        db.selectinload(Product.images),
+        db.selectinload(Product.tags),
+        db.selectinload(Product.sustainability_attributes),
+    )
+
+
+def load_products_repo(product_ids):
+    return db.session.execute(
         db.select(Product)
-        .options(
-            db.joinedload(Product.images),
-            db.joinedload(Product.tags),
-            db.joinedload(Product.sustainability_attributes),
+        .where(Product.id.in_(product_ids))
+        .options(*product_children_options())
+    ).scalars().all()
+
+
+def product_list_projection(products):
+    # only the columns the list response needs, vendor name, primary image and tags included,
+    # so a page is a single statement however many products it holds
+    tag_names = (
+        db.select(func.aggregate_strings(ProductTag.name, TAG_NAME_SEPARATOR))
+        .join(
+            product_tag_association,
+            product_tag_association.c.tag_id == ProductTag.id,
         )
-        .filter_by(is_active=True)
+        .where(product_tag_association.c.product_id == Product.id)
+        .scalar_subquery()
     )
 
-    # extra filters if any
+    return products.with_only_columns(
+        Product.id,
+        Product.name,
+        Product.price,
+        Product.category_id,
+        Product.vendor_id,
+        Product.review_count,
+        Product.average_rating,
+        Product.created_at,
+        Product.primary_image_url,
+        tag_names.label("tag_names"),
+        VendorProfile.business_name,
+    ).outerjoin(VendorProfile, VendorProfile.user_id == Product.vendor_id)
+
+
+# sort name -> (column, descending)
+PRODUCT_SORTS = {
+    "newest": (Product.created_at, True),
+    "price_asc": (Product.price, False),
+    "price_desc": (Product.price, True),
+}
+
+
+def filtered_products_query(product_filter):
+    products = db.select(Product).filter_by(is_active=True)
+
     if product_filter.category_id:
         products = products.filter_by(category_id=product_filter.category_id)
 
     if product_filter.tags:
-        # assuming that it joins with the help of association
-        products = products.join(Product.tags, isouter=True).filter(
-            ProductTag.name.in_(product_filter.tags)
+        # EXISTS keeps one row per product, no GROUP BY needed
+        products = products.filter(
+            Product.tags.any(ProductTag.name.in_(product_filter.tags))
         )
 
     if product_filter.min_price:
@@ -131,13 +335,181 @@ def get_products_list_repo(product_filter, request_args):
     if product_filter.max_price:
         products = products.filter(Product.price <= product_filter.max_price)
 
-    # prevent duplicates from join
-    products = products.group_by(Product.id)
+    return products
 
-    # pagination of query
-    paginated_products = db.paginate(products)
 
-    return paginated_products
+def product_filter_key(product_filter):
+    return (
+        product_filter.category_id,
+        product_filter.min_price,
+        product_filter.max_price,
+        tuple(sorted(product_filter.tags or [])),
+    )
+
+
+def count_products_repo(product_filter):
+    # served from a short-lived cache, exact counts over the whole catalog are not worth a COUNT per page
+    filter_key = product_filter_key(product_filter)
+
+    total = product_count_cache.get(filter_key)
+
+    if total is None:
+        total = db.session.execute(
+            db.select(func.count()).select_from(
+                filtered_products_query(product_filter).subquery()
+            )
+        ).scalar()
+
+        product_count_cache.set(filter_key, total)
+
+    return total
+
+
+def get_products_cursor_page_repo(product_filter):
+    sort_name = product_filter.sort or "newest"
+    sort_column, descending = PRODUCT_SORTS[sort_name]
+    per_page = product_filter.per_page or 20
+
+    products = product_list_projection(filtered_products_query(product_filter))
+
+    if product_filter.after:
+        # seek past the last row of the previous page, served by the (is_active, sort key, id) indexes
+        _, last_value, last_id = product_filter.after
+        seek_key = tuple_(sort_column, Product.id)
+        last_key = tuple_(last_value, last_id)
+
+        products = products.filter(seek_key < last_key if descending else seek_key > last_key)
+
+    if descending:
+        products = products.order_by(sort_column.desc(), Product.id.desc())
+    else:
+        products = products.order_by(sort_column, Product.id)
+
+    # one extra row tells if there is a next page
+    rows = db.session.execute(products.limit(per_page + 1)).all()
+
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+
+    next_cursor = None
+    if has_next:
+        last_row = rows[-1]
+        next_cursor = encode_cursor(sort_name, getattr(last_row, sort_column.key), last_row.id)
+
+    return {
+        "products": rows,
+        "has_next": has_next,
+        "next_cursor": next_cursor,
+        "per_page": per_page,
+        "total": count_products_repo(product_filter) if product_filter.include_total else None,
+    }
+
+
+# ----------------------------------------------------------- Facets -----------------------------------------------------------
+
+
+# lower bounds of the price buckets, the last bucket is open ended
+PRICE_BUCKET_BOUNDS = [0, 10, 25, 50, 100, 250]
+
+
+def price_bucket_column():
+    # index of the bucket the price falls into, constants are inlined so the
+    # expression is identical wherever it appears in the select and the grouping sets
+    return case(
+        *[
+            (Product.price >= literal_column(str(lower_bound)), literal_column(str(index)))
+            for index, lower_bound in reversed(list(enumerate(PRICE_BUCKET_BOUNDS)))
+        ],
+        else_=literal_column("0"),
+    )
+
+
+def product_facet_counts(product_filter):
+    products = filtered_products_query(product_filter)
+    tag_name = ProductTag.name
+    price_bucket = price_bucket_column()
+
+    if db.engine.dialect.name == "postgresql":
+        # all three facets in one aggregated pass, distinct ids since the tag join repeats products
+        # grouping() tells which set a row belongs to, one bit per column not grouped on
+        facet_set = func.grouping(Product.category_id, tag_name, price_bucket)
+
+        rows = db.session.execute(
+            products.with_only_columns(
+                facet_set.label("facet_set"),
+                Product.category_id,
+                tag_name,
+                price_bucket.label("price_bucket"),
+                func.count(Product.id.distinct()).label("count"),
+            )
+            .outerjoin(product_tag_association, product_tag_association.c.product_id == Product.id)
+            .outerjoin(ProductTag, ProductTag.id == product_tag_association.c.tag_id)
+            .group_by(
+                func.grouping_sets(
+                    tuple_(Product.category_id), tuple_(tag_name), tuple_(price_bucket)
+                )
+            )
+        ).all()
+
+        return (
+            [(row.category_id, row.count) for row in rows if row.facet_set == 0b011],
+            [(row.name, row.count) for row in rows if row.facet_set == 0b101 and row.name],
+            [(row.price_bucket, row.count) for row in rows if row.facet_set == 0b110],
+        )
+
+    # no GROUPING SETS (sqlite), one grouped query per facet over the same filters
+    categories = db.session.execute(
+        products.with_only_columns(Product.category_id, func.count(Product.id))
+        .group_by(Product.category_id)
+    ).all()
+
+    tags = db.session.execute(
+        products.with_only_columns(tag_name, func.count(Product.id))
+        .join(product_tag_association, product_tag_association.c.product_id == Product.id)
+        .join(ProductTag, ProductTag.id == product_tag_association.c.tag_id)
+        .group_by(tag_name)
+    ).all()
+
+    price_buckets = db.session.execute(
+        products.with_only_columns(price_bucket, func.count(Product.id))
+        .group_by(price_bucket)
+    ).all()
+
+    return categories, tags, price_buckets
+
+
+def get_product_facets_repo(product_filter):
+    filter_key = product_filter_key(product_filter)
+
+    facets = product_facet_cache.get(filter_key)
+
+    if facets is None:
+        categories, tags, price_buckets = product_facet_counts(product_filter)
+
+        facets = {
+            "categories": [
+                {"category_id": category_id, "count": count}
+                for category_id, count in sorted(categories, key=lambda row: -row[1])
+            ],
+            "tags": [
+                {"name": name, "count": count}
+                for name, count in sorted(tags, key=lambda row: (-row[1], row[0]))
+            ],
+            "price_buckets": [
+                {
+                    "min_price": PRICE_BUCKET_BOUNDS[index],
+                    "max_price": PRICE_BUCKET_BOUNDS[index + 1]
+                    if index + 1 < len(PRICE_BUCKET_BOUNDS)
+                    else None,
+                    "count": count,
+                }
+                for index, count in sorted(price_buckets)
+            ],
+        }
+
+        product_facet_cache.set(filter_key, facets)
+
+    return facets
 
 
 def get_product_detail_repo(product_id):
@@ -181,6 +553,72 @@ def update_product_repo(user_id, product_id, update_data):
     return product
 
 
+def vendor_product_ids_repo(user_id, product_ids):
+    # ownership of the whole batch in one query
+    return set(
+        db.session.execute(
+            db.select(Product.id).where(Product.id.in_(product_ids), Product.vendor_id == user_id)
+        ).scalars()
+    )
+
+
+def bulk_update_products_repo(updates):
+    # fields left out of an update keep their value
+    rows = [
+        {
+            "product_id": update.product_id,
+            "stock_quantity": update.stock_quantity,
+            "price": update.price,
+            "is_active": update.is_active,
+        }
+        for update in updates
+    ]
+    products = Product.__table__
+
+    if db.engine.dialect.name == "postgresql":
+        # UPDATE ... FROM (VALUES ...), a single statement for the whole batch
+        product_updates = values(
+            column("product_id", Integer),
+            column("stock_quantity", Integer),
+            column("price", Numeric(10, 2)),
+            column("is_active", Boolean),
+            name="product_updates",
+        ).data([tuple(row.values()) for row in rows])
+
+        db.session.execute(
+            db.update(products)
+            .where(products.c.id == product_updates.c.product_id)
+            .values(
+                # a column left out of every row is untyped NULL in VALUES, hence the casts
+                stock_quantity=func.coalesce(
+                    cast(product_updates.c.stock_quantity, Integer), products.c.stock_quantity
+                ),
+                price=func.coalesce(cast(product_updates.c.price, Numeric(10, 2)), products.c.price),
+                is_active=func.coalesce(cast(product_updates.c.is_active, Boolean), products.c.is_active),
+                updated_at=now(),
+            )
+        )
+
+    else:
+        # one executemany on sqlite
+        db.session.execute(
+            db.update(products)
+            .where(products.c.id == bindparam("product_id"))
+            .values(
+                stock_quantity=func.coalesce(bindparam("stock_quantity", type_=Integer), products.c.stock_quantity),
+                price=func.coalesce(bindparam("price", type_=Numeric(10, 2)), products.c.price),
+                is_active=func.coalesce(bindparam("is_active", type_=Boolean), products.c.is_active),
+                updated_at=now(),
+            ),
+            rows,
+        )
+
+    # rows written directly do not pass the flush listener, every derived cache is dropped on commit
+    invalidate_after_commit(
+        db.session, product_ids=[update.product_id for update in updates], products_changed=True
+    )
+
+
 def soft_delete_product_repo(product):
     product.is_active = False
     db.session.commit()
@@ -227,10 +665,32 @@ def get_wishlist_by_user_id_repo(user_id):
 # ----------------------------------------------------------- Categories -----------------------------------------------------------
 
 
-def get_top_level_categories_repo():
+def get_category_tree_repo():
+    # every active category reachable from an active top level one, in a single recursive query
+    # UNION instead of UNION ALL so a parent cycle cannot recurse forever
+    category_tree = (
+        db.select(ProductCategory.id)
+        .filter_by(parent_category_id=None, is_active=True)
+        .cte("category_tree", recursive=True)
+    )
+    category_tree = category_tree.union(
+        db.select(ProductCategory.id)
+        .join(category_tree, ProductCategory.parent_category_id == category_tree.c.id)
+        .filter(ProductCategory.is_active == True)  # noqa: E712
+    )
+
+    # plain rows, the tree is assembled by the caller without touching subcategories
     return db.session.execute(
-        db.select(ProductCategory).filter_by(parent_category_id=None, is_active=True)
-    ).scalars()
+        db.select(
+            ProductCategory.id,
+            ProductCategory.parent_category_id,
+            ProductCategory.name,
+            ProductCategory.description,
+            ProductCategory.is_active,
+        )
+        .join(category_tree, ProductCategory.id == category_tree.c.id)
+        .order_by(ProductCategory.id)
+    ).all()
 
 
 def get_category_by_id_repo(category_id):
@@ -241,9 +701,11 @@ def get_category_by_id_repo(category_id):
 
 
 def get_vendor_products_repo(user_id):
-    products = db.select(Product).filter_by(vendor_id=user_id)
+    product_ids = (
+        db.select(Product.id).filter_by(vendor_id=user_id).order_by(Product.id)
+    )
 
-    paginated_products = db.paginate(products)
+    paginated_products = paginate_ids(product_ids, load_products_repo)
     return paginated_products
 
 
@@ -264,6 +726,7 @@ def get_public_vendor_products_repo(params):
     if params.category_name is not None and params.business_name is not None:
         return db.session.execute(
             db.select(Product)
+            .options(*product_children_options())
             .filter_by(is_active=True)
             .join(ProductCategory, Product.category_id == ProductCategory.id)
             .join(VendorProfile, Product.vendor_id == VendorProfile.user_id)
@@ -276,6 +739,7 @@ def get_public_vendor_products_repo(params):
     if params.category_name is not None:
         return db.session.execute(
             db.select(Product)
+            .options(*product_children_options())
             .filter_by(is_active=True)
             .join(ProductCategory, Product.category_id == ProductCategory.id)
             .filter(
@@ -286,6 +750,7 @@ def get_public_vendor_products_repo(params):
     if params.business_name is not None:
         return db.session.execute(
             db.select(Product)
+            .options(*product_children_options())
             .filter_by(is_active=True)
             .join(VendorProfile, Product.vendor_id == VendorProfile.user_id)
             .filter(VendorProfile.business_name == params.business_name)
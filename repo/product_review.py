@@ -1,4 +1,6 @@
-from models.product_review import ProductReview 
+from sqlalchemy import bindparam, case, func, text
+from models.product import Product
+from models.product_review import ProductRatingDelta, ProductReview
 from instance.database import db
 
 def create_review(product_id, user_id, rating, comment=None):
@@ -9,6 +11,7 @@ def create_review(product_id, user_id, rating, comment=None):
         comment=comment
     )
     db.session.add(review)
+    add_rating_delta_repo(product_id, 1, rating)
     db.session.commit()
     return review
 
@@ -22,6 +25,9 @@ def update_review(review_id, rating=None, comment=None):
     review = db.session.execute(db.select(ProductReview).filter_by(id=review_id)).scalar()
     if review:
         if rating is not None:
+            # only the difference in rating changes the product stats
+            if rating != review.rating:
+                add_rating_delta_repo(review.product_id, 0, rating - review.rating)
             review.rating = rating
         if comment is not None:
             review.comment = comment
@@ -31,6 +37,156 @@ def update_review(review_id, rating=None, comment=None):
 def delete_review(review_id):
     review = db.session.execute(db.select(ProductReview).filter_by(id=review_id)).scalar()
     if review:
+        add_rating_delta_repo(review.product_id, -1, -review.rating)
         db.session.delete(review)
         db.session.commit()
     return review
+
+
+# ----------------------------------------------------------- Rating stats -----------------------------------------------------------
+
+
+def add_rating_delta_repo(product_id, review_count_delta, rating_sum_delta):
+    # committed together with the review change by the caller
+    db.session.add(
+        ProductRatingDelta(
+            product_id=product_id,
+            review_count_delta=review_count_delta,
+            rating_sum_delta=rating_sum_delta,
+        )
+    )
+
+
+def rating_stats_values(review_count, rating_sum):
+    # average is computed in sql so the whole batch is a single UPDATE
+    average_rating = case(
+        (
+            review_count > 0,
+            func.round(
+                db.cast(db.cast(rating_sum, db.Float) / review_count, db.Numeric(10, 4)),
+                2,
+            ),
+        ),
+        else_=0,
+    )
+
+    return {
+        "review_count": review_count,
+        "rating_sum": rating_sum,
+        "average_rating": average_rating,
+    }
+
+
+def has_pending_rating_deltas_repo(product_id):
+    # review-change marker, stats are stale while deltas are waiting to be applied
+    return db.session.execute(
+        db.select(
+            db.select(ProductRatingDelta.id)
+            .filter_by(product_id=product_id)
+            .exists()
+        )
+    ).scalar()
+
+
+def apply_rating_deltas_repo(batch_size=1000, product_id=None):
+    batch_filter = [ProductRatingDelta.product_id == product_id] if product_id else []
+
+    # deltas are claimed by deleting them, concurrent appliers (the job and product reads)
+    # each get a disjoint set of rows back so no delta is counted twice
+    claimed = db.session.execute(
+        db.delete(ProductRatingDelta)
+        .where(
+            ProductRatingDelta.id.in_(
+                db.select(ProductRatingDelta.id)
+                .where(*batch_filter)
+                .order_by(ProductRatingDelta.id)
+                .limit(batch_size)
+            )
+        )
+        .returning(
+            ProductRatingDelta.product_id,
+            ProductRatingDelta.review_count_delta,
+            ProductRatingDelta.rating_sum_delta,
+        )
+    ).all()
+
+    if not claimed:
+        db.session.commit()
+        return 0
+
+    # net change per product
+    pending = {}
+    for delta in claimed:
+        review_count_delta, rating_sum_delta = pending.get(delta.product_id, (0, 0))
+        pending[delta.product_id] = (
+            review_count_delta + delta.review_count_delta,
+            rating_sum_delta + delta.rating_sum_delta,
+        )
+
+    # increments of the current row values, a concurrent update of the same product is added to, not overwritten
+    products = Product.__table__
+    db.session.execute(
+        db.update(products)
+        .where(products.c.id == bindparam("delta_product_id"))
+        .values(
+            **rating_stats_values(
+                func.coalesce(products.c.review_count, 0) + bindparam("review_count_delta"),
+                func.coalesce(products.c.rating_sum, 0) + bindparam("rating_sum_delta"),
+            )
+        ),
+        [
+            {
+                "delta_product_id": delta_product_id,
+                "review_count_delta": review_count_delta,
+                "rating_sum_delta": rating_sum_delta,
+            }
+            for delta_product_id, (review_count_delta, rating_sum_delta) in sorted(pending.items())
+        ],
+    )
+    db.session.commit()
+
+    return len(claimed)
+
+
+def reconcile_rating_stats_repo():
+    # recount every product from the reviews table, pending deltas are covered by the recount
+    if db.engine.dialect.name == "postgresql":
+        # a review adds its delta in the same transaction, holding the delta table until commit
+        # keeps reviews from landing between the delete and the recount and being counted twice;
+        # sqlite already serializes the transaction from its first write
+        db.session.execute(
+            text(f"LOCK TABLE {ProductRatingDelta.__tablename__} IN SHARE ROW EXCLUSIVE MODE")
+        )
+
+    db.session.execute(db.delete(ProductRatingDelta))
+
+    totals = (
+        db.select(
+            ProductReview.product_id,
+            func.count(ProductReview.id).label("review_count"),
+            func.sum(ProductReview.rating).label("rating_sum"),
+        )
+        .group_by(ProductReview.product_id)
+        .subquery()
+    )
+
+    updated = db.session.execute(
+        db.update(Product)
+        .where(Product.id == totals.c.product_id)
+        .values(**rating_stats_values(totals.c.review_count, totals.c.rating_sum))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    # products whose reviews were all removed
+    db.session.execute(
+        db.update(Product)
+        .where(
+            Product.id.not_in(db.select(totals.c.product_id)),
+            func.coalesce(Product.review_count, 0) != 0,
+        )
+        .values(review_count=0, rating_sum=0, average_rating=0)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+    return updated
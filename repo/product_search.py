@@ -0,0 +1,120 @@
+from sqlalchemy import column, text
+from instance.database import db
+from models.product import Product
+from repo.product import product_list_projection
+
+
+# column weights, a hit in the name counts more than one in the description
+# fts5 bm25 takes one weight per column: name, description, tags, attributes
+FTS5_RANK = "bm25(product_search, 10.0, 1.0, 5.0, 3.0)"
+# postgres weight classes: A name, B tags, C attributes, D description
+TSVECTOR_DOCUMENT = (
+    "setweight(to_tsvector('simple', :name), 'A') || "
+    "setweight(to_tsvector('simple', :tags), 'B') || "
+    "setweight(to_tsvector('simple', :attributes), 'C') || "
+    "setweight(to_tsvector('simple', :description), 'D')"
+)
+
+
+# the test suite runs on sqlite, only the fts5 path is exercised by it
+def is_postgresql():
+    return db.engine.dialect.name == "postgresql"
+
+
+def product_search_document(product):
+    return {
+        "product_id": product.id,
+        "name": product.name,
+        "description": product.description or "",
+        "tags": " ".join(tag.name for tag in product.tags),
+        "attributes": " ".join(
+            attribute.name for attribute in product.sustainability_attributes
+        ),
+    }
+
+
+def index_product_repo(product):
+    # upsert of a single document, committed together with the product change by the caller
+    index_products_repo([product_search_document(product)])
+
+
+def index_products_repo(documents):
+    # one executemany per statement, however many documents
+    if is_postgresql():
+        db.session.execute(
+            text(
+                f"INSERT INTO product_search (product_id, document) VALUES (:product_id, {TSVECTOR_DOCUMENT}) "
+                "ON CONFLICT (product_id) DO UPDATE SET document = excluded.document"
+            ),
+            documents,
+        )
+        return
+
+    db.session.execute(
+        text("DELETE FROM product_search WHERE rowid = :product_id"), documents
+    )
+    db.session.execute(
+        text(
+            "INSERT INTO product_search (rowid, name, description, tags, attributes) "
+            "VALUES (:product_id, :name, :description, :tags, :attributes)"
+        ),
+        documents,
+    )
+
+
+def ranked_matches(terms):
+    # every term is a prefix and all of them must match
+    if is_postgresql():
+        return text(
+            "SELECT product_id, ts_rank_cd(document, query) AS rank "
+            "FROM product_search, to_tsquery('simple', :query) query "
+            "WHERE document @@ query"
+        ).bindparams(query=" & ".join(f"{term}:*" for term in terms))
+
+    return text(
+        f"SELECT rowid AS product_id, {FTS5_RANK} AS rank "
+        "FROM product_search WHERE product_search MATCH :query"
+    ).bindparams(query=" ".join(f'"{term}"*' for term in terms))
+
+
+def search_products_repo(search_params):
+    page = search_params.page or 1
+    per_page = search_params.per_page or 20
+
+    matches = ranked_matches(search_params.q).columns(
+        column("product_id", db.Integer), column("rank", db.Float)
+    ).subquery()
+
+    # bm25 scores are negative in fts5, the best match is the lowest
+    rank_order = matches.c.rank.desc() if is_postgresql() else matches.c.rank
+
+    # one extra row tells if there is a next page
+    product_ids = db.session.execute(
+        db.select(matches.c.product_id)
+        .join(Product, Product.id == matches.c.product_id)
+        .where(Product.is_active == True)  # noqa: E712
+        .order_by(rank_order, matches.c.product_id)
+        .limit(per_page + 1)
+        .offset((page - 1) * per_page)
+    ).scalars().all()
+
+    has_next = len(product_ids) > per_page
+    product_ids = product_ids[:per_page]
+
+    rows_by_id = {}
+    if product_ids:
+        rows_by_id = {
+            row.id: row
+            for row in db.session.execute(
+                product_list_projection(
+                    db.select(Product).where(Product.id.in_(product_ids))
+                )
+            ).all()
+        }
+
+    return {
+        "products": [rows_by_id[product_id] for product_id in product_ids],
+        "has_next": has_next,
+        "page": page,
+        "per_page": per_page,
+    }
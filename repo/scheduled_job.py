@@ -0,0 +1,74 @@
+from sqlalchemy import or_
+from instance.database import db, dialect_insert
+from models.scheduled_job import ScheduledJob
+
+
+def register_scheduled_jobs_repo(first_run_at):
+    # rows already written by another process keep their schedule
+    db.session.execute(
+        dialect_insert(ScheduledJob).on_conflict_do_nothing(),
+        [{"name": name, "next_run_at": run_at} for name, run_at in first_run_at.items()],
+    )
+    db.session.commit()
+
+
+def acquire_scheduled_job_repo(name, owner, started_at, lease_until):
+    # compare and set on the row, only one process wins a due job
+    acquired = db.session.execute(
+        db.update(ScheduledJob)
+        .where(
+            ScheduledJob.name == name,
+            ScheduledJob.next_run_at <= started_at,
+            or_(ScheduledJob.lease_until.is_(None), ScheduledJob.lease_until < started_at),
+        )
+        .values(owner=owner, lease_until=lease_until, last_started_at=started_at)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+
+    return acquired == 1
+
+
+def renew_scheduled_job_lease_repo(name, owner, lease_until):
+    renewed = db.session.execute(
+        db.update(ScheduledJob)
+        .where(ScheduledJob.name == name, ScheduledJob.owner == owner)
+        .values(lease_until=lease_until)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+
+    return renewed == 1
+
+
+def finish_scheduled_job_repo(name, owner, started_at, finished_at, next_run_at, status, error=None):
+    failed = status != "succeeded"
+    values = {
+        "owner": None,
+        "lease_until": None,
+        "next_run_at": next_run_at,
+        "last_finished_at": finished_at,
+        "last_duration_ms": (finished_at - started_at).total_seconds() * 1000,
+        "last_status": status,
+        "last_error": error,
+        "run_count": ScheduledJob.run_count + 1,
+        "failure_count": ScheduledJob.failure_count + int(failed),
+    }
+
+    if failed:
+        values["last_failed_at"] = finished_at
+
+    # a lease that expired and was taken over belongs to the new owner
+    db.session.execute(
+        db.update(ScheduledJob)
+        .where(ScheduledJob.name == name, ScheduledJob.owner == owner)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+
+def get_scheduled_jobs_repo():
+    return db.session.execute(
+        db.select(ScheduledJob).order_by(ScheduledJob.name)
+    ).scalars().all()
@@ -1,3 +1,5 @@
+from sqlalchemy.orm import make_transient_to_detached
+from instance.cache import authz_version_cache, user_identity_cache
 from instance.database import db
 from models.user import User, UserAddress, UserPaymentMethod, UserRole
 from shared.time import now, datetime_from_string
@@ -9,6 +11,51 @@ def user_by_id_repo(user_id):
     )
 
 
+def authz_version_by_id_repo(user_id):
+    user_id = int(user_id)
+
+    authz_version = authz_version_cache.get(user_id)
+
+    if authz_version is None:
+        authz_version = db.session.execute(
+            db.select(User.authz_version).where(User.id == user_id)
+        ).scalar_one_or_none()
+
+        # deleted users are not cached, their tokens keep failing the lookup
+        if authz_version is not None:
+            authz_version_cache.set(user_id, authz_version)
+
+    return authz_version
+
+
+# column values kept for an authenticated user, the password hash stays out of the cache
+USER_IDENTITY_COLUMNS = [
+    column.key for column in User.__mapper__.column_attrs if column.key != "password_hash"
+]
+
+
+def cached_user_by_id_repo(user_id):
+    user_id = int(user_id)
+
+    columns = user_identity_cache.get(user_id)
+
+    if columns is None:
+        user = user_by_id_repo(user_id)
+
+        user_identity_cache.set(
+            user_id, {key: getattr(user, key) for key in USER_IDENTITY_COLUMNS}
+        )
+
+        return user
+
+    # rebuild the user as if loaded from the database, no query is made
+    # relationships and the password hash are loaded lazily if a view touches them
+    user = User(**columns)
+    make_transient_to_detached(user)
+
+    return db.session.merge(user, load=False)
+
+
 def user_by_email_repo(email):
     return db.one_or_404(
         db.select(User).filter_by(email=email),
@@ -1,11 +1,17 @@
-from sqlalchemy import and_, distinct, extract, func
+from sqlalchemy import tuple_
 from instance.database import db
 from models.order import Order, OrderItem
-from models.product import Product, ProductImage
+from models.product import Product
 from models.user import User, UserRole, VendorProfile, VendorStatus
+from repo.vendor_sales import get_vendor_sales_repo
+from shared.cursor import encode_cursor
+from shared.hll import sketch_count
 from shared.time import now
 
 
+# rows fetched from the database cursor at a time while exporting
+EXPORT_BATCH_SIZE = 1000
+
 
 def vendor_register_repo(user, vendor_data_validated):
     vendor_profile = VendorProfile(
@@ -81,76 +87,34 @@ def update_vendor_profile_repo(vendor_profile, vendor_data_validated):
 
 
 def get_vendor_stats_repo(user_id_):
-    now_ = now()
-    current_year = now_.year
-
-    # total orders = sum of order items
-    # total sales = sum of order items * quantity
-    # total revenue = sum of total price
-    # total customers = count of distinct users in order
-
-    all_time_stats = (
-        db.session.query(
-            func.sum(OrderItem.total_price).label("total_revenue"),
-            func.sum(OrderItem.quantity).label("total_sales"),
-            func.count(OrderItem.id).label("total_orders"),
-            func.count(distinct(Order.user_id)).label("total_customers"),
-        )
-        .join(Order, OrderItem.order_id == Order.id)
-        .filter(OrderItem.vendor_id == user_id_)
-        .first()
-    )
+    # total orders = count of order lines
+    # total sales = sum of order line quantities
+    # total revenue = sum of order line prices
+    # total customers = estimated distinct buyers
+    # read from the sales rollups, cancelled and returned orders are not counted
+    rollups = get_vendor_sales_repo(user_id_, now().year)
 
-    monthly_revenue = db.session.query(
-        extract('month', Order.created_at).label('month'),
-        func.sum(OrderItem.total_price).label('total_revenue'),
-    ).join(
-        OrderItem, Order.id == OrderItem.order_id
-    ).filter(
-        OrderItem.vendor_id == user_id_,
-        extract('year', Order.created_at) == current_year,
-    ).group_by(
-        extract('month', Order.created_at)
-    ).order_by(
-        extract('month', Order.created_at)
-    ).all()
-
-    monthly_orders = db.session.query(
-        extract('month', Order.created_at).label('month'),
-        func.count(Order.id).label('total_orders'),
-    ).join(
-        OrderItem, Order.id == OrderItem.order_id
-    ).filter(
-        OrderItem.vendor_id == user_id_,
-        extract('year', Order.created_at) == current_year,
-    ).group_by(
-        extract('month', Order.created_at)
-    ).order_by(
-        extract('month', Order.created_at)
-    ).all()
+    lifetime = next(rollup for rollup in rollups if rollup.period == "lifetime")
+    months = [rollup for rollup in rollups if rollup.period == "month" and rollup.order_count]
 
     return {
-        "total_revenue": round(float(all_time_stats.total_revenue), 2) if all_time_stats.total_revenue else 0.0, 
-        "total_sales": int(all_time_stats.total_sales) if all_time_stats.total_sales else 0,
-        "total_orders": int(all_time_stats.total_orders) if all_time_stats.total_orders else 0,
-        "total_customers": int(all_time_stats.total_customers) if all_time_stats.total_customers else 0, 
+        "total_revenue": round(float(lifetime.revenue), 2),
+        "total_sales": int(lifetime.units),
+        "total_orders": int(lifetime.order_count),
+        "total_customers": sketch_count(lifetime.customer_sketch),
         "monthly_revenue": [
             {
-                "month": int(sale.month),
-                "total_revenue": round(float(sale.total_revenue), 2)
-                if sale.total_revenue
-                else 0.0,
+                "month": month.period_start.month,
+                "total_revenue": round(float(month.revenue), 2),
             }
-            for sale in monthly_revenue
+            for month in months
         ],
         "monthly_orders": [
             {
-                "month": int(sale.month),
-                "total_orders": int(sale.total_orders)
-                if sale.total_orders
-                else 0,
+                "month": month.period_start.month,
+                "total_orders": int(month.order_count),
             }
-            for sale in monthly_orders
+            for month in months
         ],
     }
 
@@ -158,40 +122,91 @@ def get_vendor_stats_repo(user_id_):
 # ----------------------------------------------------------------------------------------------------------------------------- vendor recent orders -----------------------------------------------------------------------------------------------------------------------------
 
 
-def get_vendor_recent_orders_repo(user):
-    # return specific needed fields only to speed up query
-    return (
-        db.session.query(
+def get_vendor_recent_orders_repo(user, limit, after=None):
+    # the latest order lines of the vendor come from the (vendor_id, created_at, id) index alone,
+    # only those rows are joined to their order, product and customer
+    latest_lines = db.select(OrderItem.id, OrderItem.created_at).where(
+        OrderItem.vendor_id == user.id
+    )
+
+    if after:
+        latest_lines = latest_lines.where(tuple_(OrderItem.created_at, OrderItem.id) < tuple_(*after))
+
+    # one extra row tells if there is more to load
+    latest_lines = (
+        latest_lines.order_by(OrderItem.created_at.desc(), OrderItem.id.desc())
+        .limit(limit + 1)
+        .subquery()
+    )
+
+    rows = db.session.execute(
+        db.select(
             Order.id,
             Order.created_at,
             Order.status,
             Product.name.label("product_name"),
-            func.max(ProductImage.image_url).label("image_url"),
+            Product.primary_image_url.label("image_url"),
             User.username.label("customer_username"),
             OrderItem.quantity,
             OrderItem.total_price,
             Order.order_number,
+            latest_lines.c.id.label("order_line_id"),
+            latest_lines.c.created_at.label("order_line_created_at"),
         )
-        .join(OrderItem, Order.id == OrderItem.order_id)
-        .join(Product, OrderItem.product_id == Product.id)
-        .join(User, Order.user_id == User.id)
-        .outerjoin(
-            ProductImage,
-            and_(
-                ProductImage.product_id == Product.id, ProductImage.is_primary == True  # noqa: E712
-            ),
-        )
-        .filter(OrderItem.vendor_id == user.id)
-        .group_by(
-            Order.id,
+        .select_from(latest_lines)
+        .join(OrderItem, OrderItem.id == latest_lines.c.id)
+        .join(Order, OrderItem.order_id == Order.id)
+        .outerjoin(Product, OrderItem.product_id == Product.id)
+        .outerjoin(User, Order.user_id == User.id)
+        .order_by(latest_lines.c.created_at.desc(), latest_lines.c.id.desc())
+    ).all()
+
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_next:
+        next_cursor = encode_cursor(rows[-1].order_line_created_at.isoformat(), rows[-1].order_line_id)
+
+    return {"orders": rows, "has_next": has_next, "next_cursor": next_cursor}
+
+
+# ----------------------------------------------------------- Orders export -----------------------------------------------------------
+
+
+def stream_vendor_order_lines_repo(user_id_, export_params):
+    # every order line of the vendor, oldest first, read through a server-side cursor in batches
+    order_lines = (
+        db.select(
+            OrderItem.id.label("order_line_id"),
+            Order.order_number,
             Order.created_at,
             Order.status,
-            Product.name,
-            User.username,
+            Order.user_id.label("customer_id"),
+            OrderItem.product_id,
+            Product.name.label("product_name"),
             OrderItem.quantity,
+            OrderItem.unit_price,
             OrderItem.total_price,
         )
-        .order_by(Order.created_at.desc())
-        .limit(5)
-        .all()
-    )
\ No newline at end of file
+        .join(Order, OrderItem.order_id == Order.id)
+        .outerjoin(Product, OrderItem.product_id == Product.id)
+        .where(OrderItem.vendor_id == user_id_)
+    )
+
+    if export_params.from_:
+        order_lines = order_lines.where(Order.created_at >= export_params.from_)
+
+    if export_params.to:
+        order_lines = order_lines.where(Order.created_at < export_params.to)
+
+    if export_params.after:
+        order_lines = order_lines.where(
+            tuple_(Order.created_at, OrderItem.id) > tuple_(*export_params.after)
+        )
+
+    return db.session.execute(
+        order_lines.order_by(Order.created_at, OrderItem.id).execution_options(
+            yield_per=EXPORT_BATCH_SIZE
+        )
+    )
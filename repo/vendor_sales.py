@@ -0,0 +1,349 @@
+from datetime import date, datetime
+from decimal import Decimal
+from sqlalchemy import and_, case, distinct, func, or_, tuple_
+from instance.database import db, dialect_insert
+from models.order import Order, OrderItem, UNCOUNTED_ORDER_STATUSES, VendorSalesRollup
+from shared.hll import empty_sketch, sketch_add
+
+
+def rollup_periods(day):
+    return [
+        ("day", day),
+        ("month", day.replace(day=1)),
+        ("lifetime", VendorSalesRollup.LIFETIME_START),
+    ]
+
+
+def as_date(value):
+    # date() of a timestamp comes back as a string from sqlite
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+def empty_rollup(vendor_id, period, period_start):
+    return {
+        "vendor_id": vendor_id,
+        "period": period,
+        "period_start": period_start,
+        "revenue": Decimal(0),
+        "units": 0,
+        "order_count": 0,
+        "customer_sketch": empty_sketch(),
+    }
+
+
+def backfill_vendor_sales_repo(vendor_id):
+    # rebuilds the rollups of a vendor from order history, only needed once per vendor
+    # grouped per day and customer, the customer sketches need every buyer
+    day = func.date(Order.created_at)
+
+    sales = db.session.execute(
+        db.select(
+            day.label("day"),
+            Order.user_id,
+            func.sum(OrderItem.total_price).label("revenue"),
+            func.sum(OrderItem.quantity).label("units"),
+            func.count(OrderItem.id).label("order_count"),
+        )
+        .join(Order, OrderItem.order_id == Order.id)
+        .where(
+            OrderItem.vendor_id == vendor_id,
+            Order.status.not_in(UNCOUNTED_ORDER_STATUSES),
+        )
+        .group_by(day, Order.user_id)
+    ).all()
+
+    rollups = {
+        ("lifetime", VendorSalesRollup.LIFETIME_START): empty_rollup(
+            vendor_id, "lifetime", VendorSalesRollup.LIFETIME_START
+        )
+    }
+
+    for sale in sales:
+        for period, period_start in rollup_periods(as_date(sale.day)):
+            rollup = rollups.setdefault(
+                (period, period_start), empty_rollup(vendor_id, period, period_start)
+            )
+            rollup["revenue"] += sale.revenue or 0
+            rollup["units"] += sale.units or 0
+            rollup["order_count"] += sale.order_count
+            rollup["customer_sketch"] = sketch_add(rollup["customer_sketch"], sale.user_id)
+
+    # rows a concurrent backfill of the same vendor already wrote are skipped, only the keys
+    # inserted here are returned, those rows are the ones that count this transaction's order lines
+    inserted = db.session.execute(
+        dialect_insert(VendorSalesRollup)
+        .on_conflict_do_nothing()
+        .returning(VendorSalesRollup.vendor_id, VendorSalesRollup.period, VendorSalesRollup.period_start),
+        list(rollups.values()),
+    ).all()
+
+    return {tuple(key) for key in inserted}
+
+
+def ensure_vendor_sales_repo(vendor_ids):
+    # vendors without a lifetime row are backfilled, returns the (vendor id, period, period start)
+    # keys of the rollup rows actually written
+    rolled_up = set(
+        db.session.execute(
+            db.select(VendorSalesRollup.vendor_id).where(
+                VendorSalesRollup.vendor_id.in_(vendor_ids),
+                VendorSalesRollup.period == "lifetime",
+            )
+        ).scalars()
+    )
+
+    backfilled = set()
+    for vendor_id in vendor_ids:
+        if vendor_id not in rolled_up:
+            backfilled |= backfill_vendor_sales_repo(vendor_id)
+
+    return backfilled
+
+
+def record_vendor_sales_repo(order, order_items, sign=1):
+    # adds (sign=1) or removes (sign=-1) the order lines of an order in the caller's transaction
+    # order lines must already be written, vendors rolled up for the first time are rebuilt from them
+    sales = {}
+    for item in order_items:
+        if item["vendor_id"] is None:
+            continue
+
+        sale = sales.setdefault(
+            item["vendor_id"], {"revenue": Decimal(0), "units": 0, "order_count": 0}
+        )
+        sale["revenue"] += item["total_price"]
+        sale["units"] += item["quantity"]
+        sale["order_count"] += 1
+
+    if not sales:
+        return
+
+    backfilled = ensure_vendor_sales_repo(sorted(sales))
+    periods = rollup_periods(order.created_at.date())
+
+    # rows backfilled here already count the order lines, a backfill that lost the race to a
+    # concurrent one had its rows dropped and the winner was built without them, so those get the increment
+    keys = [
+        (vendor_id, period, period_start)
+        for vendor_id in sorted(sales)
+        for period, period_start in periods
+        if (vendor_id, period, period_start) not in backfilled
+    ]
+
+    if not keys:
+        return
+
+    db.session.execute(
+        dialect_insert(VendorSalesRollup).on_conflict_do_nothing(),
+        [empty_rollup(*key) for key in keys],
+    )
+
+    # locked in key order so concurrent checkouts cannot deadlock, the sketches are merged here
+    rollups = db.session.execute(
+        db.select(VendorSalesRollup)
+        .where(
+            tuple_(
+                VendorSalesRollup.vendor_id,
+                VendorSalesRollup.period,
+                VendorSalesRollup.period_start,
+            ).in_(keys)
+        )
+        .order_by(
+            VendorSalesRollup.vendor_id,
+            VendorSalesRollup.period,
+            VendorSalesRollup.period_start,
+        )
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    ).scalars().all()
+
+    for rollup in rollups:
+        sale = sales[rollup.vendor_id]
+        rollup.revenue += sign * sale["revenue"]
+        rollup.units += sign * sale["units"]
+        rollup.order_count += sign * sale["order_count"]
+
+        # customers cannot be taken out of a sketch, a removed order keeps counting its customer
+        if sign > 0:
+            rollup.customer_sketch = sketch_add(rollup.customer_sketch, order.user_id)
+
+
+def order_sales_lines_repo(order_id):
+    return [
+        line._asdict()
+        for line in db.session.execute(
+            db.select(OrderItem.vendor_id, OrderItem.quantity, OrderItem.total_price)
+            .where(OrderItem.order_id == order_id)
+        ).all()
+    ]
+
+
+def get_vendor_sales_repo(vendor_id, year):
+    if ensure_vendor_sales_repo([vendor_id]):
+        db.session.commit()
+
+    return get_vendor_sales_rows_repo(vendor_id, year)
+
+
+def get_vendor_sales_rows_repo(vendor_id, year):
+    # at most twelve monthly rows and the lifetime row
+    rows = (
+        db.select(VendorSalesRollup)
+        .where(
+            VendorSalesRollup.vendor_id == vendor_id,
+            or_(
+                and_(
+                    VendorSalesRollup.period == "month",
+                    VendorSalesRollup.period_start >= date(year, 1, 1),
+                    VendorSalesRollup.period_start < date(year + 1, 1, 1),
+                ),
+                VendorSalesRollup.period == "lifetime",
+            ),
+        )
+        .order_by(VendorSalesRollup.period_start)
+    )
+
+    return db.session.execute(rows).scalars().all()
+
+
+# ----------------------------------------------------------- History -----------------------------------------------------------
+
+
+def vendor_sales_history_repo(vendor_id, year):
+    # lifetime and per month totals of a year in a single scan of the vendor's order lines
+    # months are half-open created_at ranges, plain comparisons instead of extract() on every row
+    month_starts = [datetime(year, month, 1) for month in range(1, 13)] + [datetime(year + 1, 1, 1)]
+
+    columns = [
+        func.coalesce(func.sum(OrderItem.total_price), 0).label("revenue"),
+        func.coalesce(func.sum(OrderItem.quantity), 0).label("units"),
+        func.count(OrderItem.id).label("order_count"),
+        func.count(distinct(Order.user_id)).label("customer_count"),
+        func.min(Order.created_at).label("first_sale_at"),
+    ]
+
+    for month, (start, end) in enumerate(zip(month_starts, month_starts[1:]), start=1):
+        in_month = and_(Order.created_at >= start, Order.created_at < end)
+
+        columns += [
+            func.coalesce(func.sum(case((in_month, OrderItem.total_price))), 0).label(f"revenue_{month}"),
+            func.coalesce(func.sum(case((in_month, OrderItem.quantity))), 0).label(f"units_{month}"),
+            func.count(case((in_month, OrderItem.id))).label(f"order_count_{month}"),
+        ]
+
+    totals = db.session.execute(
+        db.select(*columns)
+        .select_from(OrderItem)
+        .join(Order, OrderItem.order_id == Order.id)
+        .where(
+            OrderItem.vendor_id == vendor_id,
+            Order.status.not_in(UNCOUNTED_ORDER_STATUSES),
+        )
+    ).one()._asdict()
+
+    return {
+        "lifetime": {
+            "revenue": totals["revenue"],
+            "units": totals["units"],
+            "order_count": totals["order_count"],
+            "customer_count": totals["customer_count"],
+        },
+        "months": {
+            month: {
+                "revenue": totals[f"revenue_{month}"],
+                "units": totals[f"units_{month}"],
+                "order_count": totals[f"order_count_{month}"],
+            }
+            for month in range(1, 13)
+        },
+        "first_sale_at": totals["first_sale_at"],
+    }
+
+
+def vendor_sales_days_repo(vendor_id, year):
+    # per day totals of a year, the half-open created_at range is served by ix_orders_created_at
+    day = func.date(Order.created_at)
+
+    days = db.session.execute(
+        db.select(
+            day.label("day"),
+            func.sum(OrderItem.total_price).label("revenue"),
+            func.sum(OrderItem.quantity).label("units"),
+            func.count(OrderItem.id).label("order_count"),
+        )
+        .join(Order, OrderItem.order_id == Order.id)
+        .where(
+            OrderItem.vendor_id == vendor_id,
+            Order.status.not_in(UNCOUNTED_ORDER_STATUSES),
+            Order.created_at >= datetime(year, 1, 1),
+            Order.created_at < datetime(year + 1, 1, 1),
+        )
+        .group_by(day)
+    ).all()
+
+    return {
+        as_date(row.day): {"revenue": row.revenue, "units": row.units, "order_count": row.order_count}
+        for row in days
+    }
+
+
+def reconcile_vendor_sales_repo(year):
+    # corrects the day, month and lifetime rows from order history, from the vendor's first sale up to year
+    # customer sketches are kept, a row created here starts with an empty one
+    vendor_ids = db.session.execute(
+        db.select(VendorSalesRollup.vendor_id).where(VendorSalesRollup.period == "lifetime")
+    ).scalars().all()
+
+    for vendor_id in vendor_ids:
+        # rollup rows are locked first, checkouts of this vendor wait until the correction is committed
+        rows = {
+            (rollup.period, rollup.period_start): rollup
+            for rollup in db.session.execute(
+                db.select(VendorSalesRollup)
+                .where(VendorSalesRollup.vendor_id == vendor_id)
+                .order_by(VendorSalesRollup.period, VendorSalesRollup.period_start)
+                .with_for_update()
+                .execution_options(populate_existing=True)
+            ).scalars()
+        }
+
+        current = vendor_sales_history_repo(vendor_id, year)
+        expected = {("lifetime", VendorSalesRollup.LIFETIME_START): current["lifetime"]}
+
+        # earlier years one statement each, only back to the first sale
+        first_year = current["first_sale_at"].year if current["first_sale_at"] else year
+
+        for history_year in range(first_year, year + 1):
+            history = current if history_year == year else vendor_sales_history_repo(vendor_id, history_year)
+
+            expected.update(
+                (("month", date(history_year, month, 1)), totals)
+                for month, totals in history["months"].items()
+                if totals["order_count"]
+            )
+            expected.update(
+                (("day", day), totals)
+                for day, totals in vendor_sales_days_repo(vendor_id, history_year).items()
+            )
+
+        for (period, period_start), totals in expected.items():
+            rollup = rows.get((period, period_start))
+
+            if rollup is None:
+                rollup = VendorSalesRollup(**empty_rollup(vendor_id, period, period_start))
+                db.session.add(rollup)
+
+            rollup.revenue = totals["revenue"]
+            rollup.units = totals["units"]
+            rollup.order_count = totals["order_count"]
+
+        # periods whose orders were all cancelled or removed
+        for key, rollup in rows.items():
+            if key not in expected:
+                rollup.revenue = 0
+                rollup.units = 0
+                rollup.order_count = 0
+
+        db.session.commit()
+
+    return len(vendor_ids)
@@ -1,7 +1,8 @@
-from flask import Blueprint, request
+import time
+from flask import Blueprint, current_app, g, request
 from flask_jwt_extended import current_user, jwt_required
 from auth.auth import admin_required
-from repo.admin import log_admin_action_repo
+from repo.admin import admin_log_entry
 from views.admin import (
     create_article_view,
     create_category_view,
@@ -12,6 +13,7 @@ from views.admin import (
     update_article_view,
     update_category_view,
     get_admin_logs_view,
+    get_cache_stats_view,
     get_vendors_view,
     review_vendor_application_view,
     update_promotion_view,
@@ -58,7 +60,14 @@ def review_vendor_application(user_id):
 @jwt_required()
 @admin_required()
 def get_admin_logs():
-    return get_admin_logs_view()
+    return get_admin_logs_view(request.args)
+
+
+@admin_router.route("/cache-stats", methods=["GET"])
+@jwt_required()
+@admin_required()
+def get_cache_stats():
+    return get_cache_stats_view()
 
 
 # ------------------------------------------------------ Management Article --------------------------------------------------
@@ -102,11 +111,20 @@ def update_promotion(promotion_id):
 # ------------------ Admin Logs ------------------
 
 
-# logs admin actions after every request
+@admin_router.before_request
+def start_admin_request_timer():
+    g.admin_request_started = time.perf_counter()
+
+
+# queues admin actions after every request, written in batches by the audit log writer
 @admin_router.after_request
 @jwt_required()
 def log_admin_actions_after_request(response):
     if request.method in ["PUT", "DELETE", "POST"]:
-        log_admin_action_repo(current_user, request)
+        duration_ms = (time.perf_counter() - g.admin_request_started) * 1000
+
+        current_app.extensions["audit_log"].record(
+            admin_log_entry(current_user, request, response, duration_ms)
+        )
 
     return response
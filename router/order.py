@@ -61,4 +61,4 @@ def update_order_status(order_number):
 @order_router.route("", methods=["GET"])
 @jwt_required()
 def get_all_orders():
-    return get_all_orders_view(current_user)
\ No newline at end of file
+    return get_all_orders_view(current_user, request.args)
\ No newline at end of file
@@ -2,7 +2,7 @@ from flask import Blueprint, request
 from flask_jwt_extended import current_user, jwt_required
 from auth.auth import vendor_required
 from views.admin import get_article_by_id_view, get_articles_view
-from views.product import add_product_to_wishlist_view, create_product_view, get_category_detail_view, get_category_tree_view, get_product_detail_view, get_promotion_detail_view, get_promotions_view, get_public_vendor_products_view, get_wishlist_view, list_products_view, remove_product_from_wishlist_view, soft_delete_product_view, update_product_view
+from views.product import add_product_to_wishlist_view, bulk_update_products_view, create_product_view, get_category_detail_view, get_category_tree_view, get_product_detail_view, get_promotion_detail_view, get_promotions_view, get_public_vendor_products_view, get_wishlist_view, import_products_view, list_products_view, remove_product_from_wishlist_view, search_products_view, soft_delete_product_view, update_product_view
 
 
 products_router = Blueprint("products_router", __name__, url_prefix="/products")
@@ -17,6 +17,18 @@ products_router = Blueprint("products_router", __name__, url_prefix="/products")
 def create_product():
     return create_product_view(current_user, request.json)
 
+# vendor private path, csv or ndjson upload to create and a json list of changes to update
+@products_router.route("/bulk", methods=["POST", "PATCH"])
+@jwt_required()
+@vendor_required
+def bulk_products_route():
+    match request.method.lower():
+        case "post":
+            return import_products_view(current_user, request)
+
+        case "patch":
+            return bulk_update_products_view(current_user, request.json)
+
 # vendor private path
 @products_router.route("/<int:product_id>", methods=["PUT", "DELETE"])
 @jwt_required()
@@ -37,6 +49,11 @@ def specific_product_route(product_id):
 def list_products():
     return list_products_view(request.args)
 
+# public path
+@products_router.route("/search", methods=["GET"])
+def search_products():
+    return search_products_view(request.args)
+
 # public path
 @products_router.route("/<int:product_id>", methods=["GET"])
 def get_product_detail(product_id):
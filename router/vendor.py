@@ -1,7 +1,7 @@
 from flask import Blueprint, request
 from flask_jwt_extended import current_user, jwt_required
 from auth.auth import vendor_required
-from views.vendor import get_vendor_products_view, get_vendor_profile_view, get_vendor_recent_orders_view, get_vendor_stats_view, update_vendor_profile_view, vendor_register_view
+from views.vendor import export_vendor_orders_view, get_vendor_products_view, get_vendor_profile_view, get_vendor_recent_orders_view, get_vendor_stats_view, update_vendor_profile_view, vendor_register_view
 
 vendor_router = Blueprint("vendor_router", __name__, url_prefix="/vendor")
 
@@ -40,4 +40,13 @@ def get_vendor_stats():
 @jwt_required()
 @vendor_required
 def get_vendor_recent_orders():
-    return get_vendor_recent_orders_view(current_user)
\ No newline at end of file
+    return get_vendor_recent_orders_view(current_user, request.args)
+
+
+@vendor_router.route("/orders/export", methods=["GET"])
+@jwt_required()
+@vendor_required
+def export_vendor_orders():
+    return export_vendor_orders_view(
+        current_user, request.args, request.accept_encodings["gzip"] > 0
+    )
@@ -0,0 +1,146 @@
+import atexit
+import queue
+import threading
+import time
+
+
+# admin audit entries are queued by the request and written in batches by a background flusher
+# the flusher only runs while entries are pending and stops after being idle for a while
+class AuditLogWriter:
+    def __init__(self, app, maxsize=10000, batch_size=100, flush_interval=0.5, enqueue_timeout=0.05):
+        self.app = app
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        # one flush at a time, so batches are written in the order they were queued
+        self._flush_lock = threading.Lock()
+        # wakes the flusher early for a full batch or on close
+        self._wakeup = threading.Condition()
+        self._thread = None
+        self._closed = False
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def record(self, entry):
+        if self._closed:
+            with self._lock:
+                self.dropped += 1
+            return False
+
+        # a full queue holds the request back briefly, then the entry is dropped
+        try:
+            self._queue.put(entry, timeout=self.enqueue_timeout)
+
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+
+        if self._queue.qsize() >= self.batch_size:
+            with self._wakeup:
+                self._wakeup.notify()
+
+        self._start_flusher()
+        return True
+
+    def _start_flusher(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, daemon=True, name="AuditLogWriter"
+                )
+                self._thread.start()
+
+    def _run(self):
+        idle_since = time.monotonic()
+
+        while not self._closed:
+            # wait until a batch is full or the interval is over
+            with self._wakeup:
+                self._wakeup.wait_for(
+                    lambda: self._closed or self._queue.qsize() >= self.batch_size,
+                    timeout=self.flush_interval,
+                )
+
+            if self.flush():
+                idle_since = time.monotonic()
+
+            elif time.monotonic() - idle_since > self.flush_interval * 10:
+                with self._lock:
+                    # an entry queued while stopping starts a new flusher
+                    if self._queue.empty():
+                        self._thread = None
+                        return
+
+    def flush(self):
+        from repo.admin import insert_admin_logs_repo
+
+        written = 0
+
+        with self._flush_lock:
+            while True:
+                entries = []
+                while len(entries) < self.batch_size:
+                    try:
+                        entries.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                if not entries:
+                    return written
+
+                try:
+                    with self.app.app_context():
+                        insert_admin_logs_repo(entries)
+
+                    written += len(entries)
+                    with self._lock:
+                        self.written += len(entries)
+
+                except Exception as e:
+                    self.app.logger.error(f"Admin audit log flush failed: {str(e)}")
+                    with self._lock:
+                        self.failed += len(entries)
+
+    def close(self):
+        # stop taking entries and write whatever is still queued
+        self._closed = True
+        atexit.unregister(self.close)
+
+        with self._wakeup:
+            self._wakeup.notify_all()
+
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=self.flush_interval * 2)
+
+        self.flush()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queued": self._queue.qsize(),
+                "written": self.written,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "running": self._thread is not None and self._thread.is_alive(),
+            }
+
+
+def audit_log_setup(app):
+    writer = AuditLogWriter(
+        app,
+        maxsize=app.config.get("AUDIT_LOG_QUEUE_SIZE", 10000),
+        batch_size=app.config.get("AUDIT_LOG_BATCH_SIZE", 100),
+        flush_interval=app.config.get("AUDIT_LOG_FLUSH_INTERVAL", 0.5),
+        enqueue_timeout=app.config.get("AUDIT_LOG_ENQUEUE_TIMEOUT", 0.05),
+    )
+    app.extensions["audit_log"] = writer
+
+    # flush on shutdown
+    atexit.register(writer.close)
+
+    return writer
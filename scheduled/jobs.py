@@ -1,55 +1,107 @@
-import os
+from datetime import datetime, timedelta
 import threading
-import time
 
 from flask_jwt_extended import jwt_required
 from auth.auth import admin_required
+from scheduled.scheduler import Scheduler
 from shared.time import now
-from instance.database import db
+
+# seconds
+RATING_DELTAS_INTERVAL = 300
+DAILY = 24 * 60 * 60
+
+
+def apply_rating_deltas_job(app):
+    from repo.product_review import apply_rating_deltas_repo
+
+    # only products with pending review changes are touched
+    applied = 0
+    while batch := apply_rating_deltas_repo():
+        applied += batch
+    app.logger.info(f"Applied {applied} rating changes")
+
+
+def reconcile_ratings_job(app):
+    from repo.product_review import reconcile_rating_stats_repo
+
+    # recompute from scratch to repair any drift
+    updated = reconcile_rating_stats_repo()
+    app.logger.info(f"Reconciled ratings of {updated} products")
+
+
+def reconcile_vendor_sales_job(app):
+    from repo.vendor_sales import reconcile_vendor_sales_repo
+
+    # every period up to the current year, from order history
+    reconciled = reconcile_vendor_sales_repo(now().year)
+    app.logger.info(f"Reconciled sales of {reconciled} vendors")
+
+
+def rollup_admin_logs_job(app):
+    from repo.admin import rollup_admin_logs_repo
+
+    # logs past retention only survive as daily counts
+    retention_days = app.config.get("ADMIN_LOG_RETENTION_DAYS", 90)
+    compacted = rollup_admin_logs_repo(
+        now().replace(tzinfo=None) - timedelta(days=retention_days)
+    )
+    app.logger.info(f"Compacted {compacted} admin logs")
+
+
+def serialize_scheduled_job(job):
+    serialized = {}
+    for column in job.__table__.columns:
+        value = getattr(job, column.name)
+        serialized[column.name] = value.isoformat() if isinstance(value, datetime) else value
+
+    return serialized
+
 
 def scheduled_job_setup(app):
-    def background_worker():
-        # Runs in a loop forever
-        while True:
-            with app.app_context():
-                try:
-                    app.logger.info(f"Starting background task at {now()}")
-
-                    # update product ratings
-                    from models.product import Product
-
-                    products = Product.query.all()
-                    for product in products:
-                        product.update_rating_stats()
-                    db.session.commit()
-                    app.logger.info(f"Updated {len(products)} products")
-
-                except Exception as e:
-                    app.logger.error(f"Background task failed: {str(e)}")
-                    db.session.rollback()
-
-            time.sleep(300)  # 5 minutes
-
-    # New way to initialize worker in Flask 2.3+
-    if not app.debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
-        # Check if thread already exists
-        if not any(t.name == "BackgroundWorker" for t in threading.enumerate()):
-            thread = threading.Thread(
-                target=background_worker, daemon=True, name="BackgroundWorker"
-            )
-            thread.start()
-            app.logger.info("Background worker initialized")
+    scheduler = Scheduler(
+        app,
+        poll_interval=app.config.get("SCHEDULER_POLL_INTERVAL", 5),
+        max_poll_interval=app.config.get("SCHEDULER_MAX_POLL_INTERVAL", 60),
+    )
+
+    scheduler.add_job("apply_rating_deltas", apply_rating_deltas_job, RATING_DELTAS_INTERVAL, jitter=30)
+    scheduler.add_job("reconcile_ratings", reconcile_ratings_job, DAILY, jitter=600, timeout=3600)
+    scheduler.add_job("reconcile_vendor_sales", reconcile_vendor_sales_job, DAILY, jitter=600, timeout=3600)
+    scheduler.add_job("rollup_admin_logs", rollup_admin_logs_job, DAILY, jitter=600, timeout=3600)
+
+    app.extensions["scheduler"] = scheduler
+
+    # web processes run the jobs in background threads unless SCHEDULER_EMBEDDED is off,
+    # started on the first request so cli commands like flask db never run them
+    if app.config.get("SCHEDULER_EMBEDDED", True):
+
+        @app.before_request
+        def start_embedded_scheduler():
+            if not scheduler.is_running():
+                scheduler.start()
+
+    # dedicated process: flask --app app worker
+    @app.cli.command("worker")
+    def worker():
+        """Run the scheduled jobs in the foreground."""
+        scheduler.run_forever()
 
     # Monitoring endpoint
     @app.route("/task-status")
     @jwt_required()
     @admin_required()
     def task_status():
-        is_alive = any(
-            t.name == "BackgroundWorker" and t.is_alive() for t in threading.enumerate()
-        )
+        from repo.scheduled_job import get_scheduled_jobs_repo
+
         return {
-            "status": "running" if is_alive else "stopped",
+            # scheduler of this process, jobs are run by whichever process holds their lease
+            "status": "running" if scheduler.is_running() else "stopped",
+            "scheduler": {
+                "owner": scheduler.owner,
+                "embedded": app.config.get("SCHEDULER_EMBEDDED", True),
+            },
+            "jobs": [serialize_scheduled_job(job) for job in get_scheduled_jobs_repo()],
             "thread_count": threading.active_count(),
             "threads": [t.name for t in threading.enumerate()],
-        }
\ No newline at end of file
+            "audit_log": app.extensions["audit_log"].stats(),
+        }
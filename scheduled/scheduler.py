@@ -0,0 +1,209 @@
+from datetime import timedelta
+import os
+import random
+import socket
+import threading
+import uuid
+
+from instance.database import db
+from shared.time import now
+
+
+class ScheduledJobSpec:
+    def __init__(self, name, func, interval, jitter=0, timeout=None):
+        self.name = name
+        self.func = func
+        # seconds between runs, plus up to jitter seconds so processes do not line up
+        self.interval = interval
+        self.jitter = jitter
+        # a run going over this is recorded as timed out, its lease is renewed until it exits
+        self.timeout = timeout or interval
+
+
+# named periodic jobs, any number of processes may run a scheduler and each due job
+# is run by whichever of them takes its lease row first
+class Scheduler:
+    def __init__(self, app, poll_interval=5, max_poll_interval=60):
+        self.app = app
+        # polls are spaced between these, as far apart as the next due job allows
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.jobs = {}
+        self.next_poll_at = None
+        self._running_jobs = {}
+        self._registered = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_job(self, name, func, interval, jitter=0, timeout=None):
+        self.jobs[name] = ScheduledJobSpec(name, func, interval, jitter, timeout)
+
+    def run_pending(self):
+        # starts every due job this process wins on a thread of its own, returns their names
+        from repo.scheduled_job import (
+            acquire_scheduled_job_repo,
+            get_scheduled_jobs_repo,
+            register_scheduled_jobs_repo,
+        )
+
+        started = []
+
+        with self.app.app_context():
+            if not self._registered:
+                # a job seen for the first time is due one interval later
+                register_scheduled_jobs_repo(
+                    {
+                        job.name: utc_now() + timedelta(seconds=job.interval)
+                        for job in self.jobs.values()
+                    }
+                )
+                self._registered = True
+
+            # one read per poll, leases are only contended for the jobs that are due
+            polled_at = utc_now()
+            rows = {row.name: row for row in get_scheduled_jobs_repo()}
+            next_poll_at = polled_at + timedelta(seconds=self.max_poll_interval)
+            due = []
+
+            for job in self.jobs.values():
+                row = rows.get(job.name)
+                if row is None:
+                    continue
+
+                # a run of this process, even one past its timeout, is still going
+                running = self._running_jobs.get(job.name)
+                if running is not None and running.is_alive():
+                    continue
+
+                available_at = max(row.next_run_at, row.lease_until or row.next_run_at)
+                if available_at <= polled_at:
+                    due.append(job)
+                else:
+                    next_poll_at = min(next_poll_at, available_at)
+
+            self.next_poll_at = next_poll_at
+
+            for job in due:
+                started_at = utc_now()
+                if not acquire_scheduled_job_repo(
+                    job.name, self.owner, started_at, started_at + timedelta(seconds=job.timeout)
+                ):
+                    continue
+
+                # own thread per job, a long daily run does not hold back the others
+                thread = threading.Thread(
+                    target=self._run_job, args=(job, started_at), daemon=True, name=f"ScheduledJob:{job.name}"
+                )
+                self._running_jobs[job.name] = thread
+                thread.start()
+                started.append(job.name)
+
+        return started
+
+    def _run_job(self, job, started_at):
+        from repo.scheduled_job import finish_scheduled_job_repo, renew_scheduled_job_lease_repo
+
+        result = {}
+
+        def target():
+            with self.app.app_context():
+                try:
+                    job.func(self.app)
+                except Exception as e:
+                    db.session.rollback()
+                    result["error"] = str(e)
+
+        run = threading.Thread(target=target, daemon=True, name=f"ScheduledJob:{job.name}:run")
+        run.start()
+
+        with self.app.app_context():
+            # a thread cannot be stopped, the lease is held until the run exits so no other
+            # process starts the job next to it
+            timed_out = False
+            while True:
+                run.join(job.timeout / 2)
+                if not run.is_alive():
+                    break
+
+                if not timed_out and utc_now() - started_at >= timedelta(seconds=job.timeout):
+                    timed_out = True
+                    self.app.logger.error(f"Scheduled job {job.name} still running after {job.timeout} seconds")
+
+                if not renew_scheduled_job_lease_repo(
+                    job.name, self.owner, utc_now() + timedelta(seconds=job.timeout)
+                ):
+                    self.app.logger.error(f"Scheduled job {job.name} lost its lease")
+
+            finished_at = utc_now()
+            duration = (finished_at - started_at).total_seconds()
+
+            if duration >= job.timeout:
+                status, error = "timeout", f"Ran for {duration:.0f} seconds, over its {job.timeout} second timeout"
+            elif "error" in result:
+                status, error = "failed", result["error"]
+            else:
+                status, error = "succeeded", None
+
+            if error:
+                self.app.logger.error(f"Scheduled job {job.name} {status}: {error}")
+
+            finish_scheduled_job_repo(
+                job.name,
+                self.owner,
+                started_at,
+                finished_at,
+                finished_at + timedelta(seconds=job.interval + random.uniform(0, job.jitter)),
+                status,
+                error,
+            )
+
+    def join(self, timeout=None):
+        # waits for the runs this process started
+        for thread in list(self._running_jobs.values()):
+            thread.join(timeout)
+
+    def run_forever(self):
+        self.app.logger.info(f"Scheduler {self.owner} started with jobs {sorted(self.jobs)}")
+
+        while not self._stop.is_set():
+            try:
+                self.run_pending()
+            except Exception as e:
+                self.app.logger.error(f"Scheduler run failed: {str(e)}")
+
+            # idle processes back off until the next job is due, jittered so schedulers
+            # started together do not race for every lease
+            wait = self.poll_interval
+            if self.next_poll_at is not None:
+                wait = (self.next_poll_at - utc_now()).total_seconds()
+            wait = min(max(wait, self.poll_interval), self.max_poll_interval)
+
+            self._stop.wait(wait * random.uniform(0.8, 1.2))
+
+    def start(self):
+        # background thread of a web process, started once
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(
+                    target=self.run_forever, daemon=True, name="Scheduler"
+                )
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=self.poll_interval * 2)
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+
+def utc_now():
+    # job timestamps are stored as naive utc
+    return now().replace(tzinfo=None)
+
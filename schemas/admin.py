@@ -1,10 +1,11 @@
 from datetime import date, datetime
 import re
 from typing import List, Optional
-from pydantic import BaseModel, ConfigDict, field_validator
+from pydantic import BaseModel, ConfigDict, field_validator, model_validator
 
 from models.product import PromotionType
-from shared.time import datetime_from_date_string
+from shared.cursor import decode_time_cursor, page_size
+from shared.time import datetime_from_date_string, naive_utc
 
 
 class CategoryCreate(BaseModel):
@@ -114,10 +115,55 @@ class VendorApprovalRequest(BaseModel):
     )
 
 
+class AdminLogFilters(BaseModel):
+    admin_id: List[int] = None
+    # prefix of the action, e.g. "DELETE /admin/category"
+    action: List[str] = None
+    start: List[datetime] = None
+    end: List[datetime] = None
+    # cursor (keyset) pagination, opt in with pagination=cursor
+    pagination: List[str] = None
+    after: List[str] = None
+    per_page: List[int] = None
+
+    @field_validator("admin_id", "action")
+    def validate_single(cls, value):
+        return value[0]
+
+    @field_validator("start", "end")
+    def validate_time_range(cls, value):
+        return naive_utc(value[0])
+
+    @field_validator("pagination")
+    def validate_pagination(cls, value):
+        if value[0] not in ("offset", "cursor"):
+            raise ValueError("Pagination must be 'offset' or 'cursor'")
+        return value[0]
+
+    @field_validator("after")
+    def validate_after(cls, value):
+        # [timestamp, id]
+        return decode_time_cursor(value[0])
+
+    @field_validator("per_page")
+    def validate_per_page(cls, value):
+        return page_size(value[0])
+
+    @model_validator(mode="after")
+    def validate_cursor_pagination(self):
+        if self.after:
+            self.pagination = "cursor"
+        return self
+
+    model_config = ConfigDict(extra="ignore")
+
+
 class AdminLogsResponse(BaseModel):
     id: int
     admin_id: int
     action: str
+    status_code: Optional[int] = None
+    duration_ms: Optional[float] = None
     timestamp: datetime
 
     model_config = ConfigDict(
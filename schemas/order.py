@@ -1,8 +1,10 @@
 from datetime import datetime
-from typing import Optional
-from pydantic import BaseModel, ConfigDict, field_validator
+from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 from models.order import OrderStatus
+from shared.cursor import decode_time_cursor, page_size
+from shared.time import naive_utc
 
 
 class CartItemCreate(BaseModel):
@@ -112,14 +114,7 @@ class OrderResponse(BaseModel):
             [
                 {
                     "name": item.product.name,
-                    "image_url": next(
-                        (
-                            img.image_url
-                            for img in item.product.images
-                            if img.is_primary
-                        ),
-                        None,
-                    ),
+                    "image_url": item.product.primary_image_url,
                 }
                 for item in value
             ]
@@ -135,6 +130,40 @@ class OrderResponse(BaseModel):
     )
 
 
+class OrderHistoryParams(BaseModel):
+    status: List[str] = None
+    # half-open created_at range, from is inclusive and to exclusive
+    from_: List[datetime] = Field(None, alias="from")
+    to: List[datetime] = None
+    after: List[str] = None
+    per_page: List[int] = None
+
+    @field_validator("status")
+    def validate_status(cls, value):
+        valid_values = [enum.value for enum in OrderStatus]
+
+        if value[0] not in valid_values:
+            raise ValueError(
+                f"Invalid status '{value[0]}'. Must be one of: {valid_values}"
+            )
+        return value[0]
+
+    @field_validator("from_", "to")
+    def validate_range(cls, value):
+        return naive_utc(value[0])
+
+    @field_validator("after")
+    def validate_after(cls, value):
+        # [order created_at, order id]
+        return decode_time_cursor(value[0])
+
+    @field_validator("per_page")
+    def validate_per_page(cls, value):
+        return page_size(value[0])
+
+    model_config = ConfigDict(extra="ignore", populate_by_name=True)
+
+
 class OrderStatusUpdate(BaseModel):
     status: str
     notes: Optional[str] = None
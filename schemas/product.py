@@ -1,8 +1,9 @@
 from datetime import datetime
 import re
-from pydantic import BaseModel, ConfigDict, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 from typing import List, Optional
 from decimal import Decimal
+from shared.cursor import decode_cursor, page_size
 
 # -------------------------------------------------- Create Product --------------------------------------------------
 
@@ -133,14 +134,37 @@ class ProductCreatedResponse(BaseModel):
     )
 
 
+class ProductImportParams(BaseModel):
+    # taken from the content type when not given
+    format: List[str] = None
+
+    @field_validator("format")
+    def validate_format(cls, value):
+        if value[0] not in ("csv", "ndjson"):
+            raise ValueError("Format must be 'csv' or 'ndjson'")
+        return value[0]
+
+    model_config = ConfigDict(extra="ignore")
+
+
 # -------------------------------------------------- Get Products List --------------------------------------------------
 
 
+PRODUCT_SORT_OPTIONS = ["newest", "price_asc", "price_desc"]
+
+
 class ProductListFilters(BaseModel):
     category_id: List[int] = None
     min_price: List[float] = None
     max_price: List[float] = None
     tags: List[str] = None
+    # cursor (keyset) pagination, opt in with pagination=cursor
+    pagination: List[str] = None
+    after: List[str] = None
+    sort: List[str] = None
+    per_page: List[int] = None
+    include_total: List[str] = None
+    facets: List[str] = None
 
     @field_validator("min_price", "max_price")
     def validate_prices(cls, value):
@@ -152,6 +176,63 @@ class ProductListFilters(BaseModel):
     def validate_category_id(cls, value):
         return value[0]
 
+    @field_validator("pagination")
+    def validate_pagination(cls, value):
+        if value[0] not in ("offset", "cursor"):
+            raise ValueError("Pagination must be 'offset' or 'cursor'")
+        return value[0]
+
+    @field_validator("after")
+    def validate_after(cls, value):
+        # [sort, sort key, id]
+        cursor = decode_cursor(value[0])
+
+        if len(cursor) != 3 or cursor[0] not in PRODUCT_SORT_OPTIONS:
+            raise ValueError("Invalid cursor")
+
+        sort, sort_value, last_id = cursor
+        if not isinstance(sort_value, str) or type(last_id) is not int:
+            raise ValueError("Invalid cursor")
+
+        # sort keys are json strings, converted back to the column type here so an edited cursor is a 400
+        try:
+            if sort == "newest":
+                sort_value = datetime.fromisoformat(sort_value)
+            else:
+                sort_value = Decimal(sort_value)
+        except (ValueError, ArithmeticError) as e:
+            raise ValueError("Invalid cursor") from e
+
+        if isinstance(sort_value, Decimal) and not sort_value.is_finite():
+            raise ValueError("Invalid cursor")
+        return [sort, sort_value, last_id]
+
+    @field_validator("sort")
+    def validate_sort(cls, value):
+        if value[0] not in PRODUCT_SORT_OPTIONS:
+            raise ValueError(f"Invalid sort '{value[0]}'. Must be one of: {PRODUCT_SORT_OPTIONS}")
+        return value[0]
+
+    @field_validator("per_page")
+    def validate_per_page(cls, value):
+        return page_size(value[0])
+
+    @field_validator("include_total", "facets")
+    def validate_flags(cls, value):
+        return value[0].lower() in ("1", "true")
+
+    @model_validator(mode="after")
+    def validate_cursor_sort(self):
+        if self.after:
+            # a cursor is only valid for the sort order it was issued for
+            if self.sort and self.sort != self.after[0]:
+                raise ValueError("Cursor does not match sort")
+
+            self.sort = self.after[0]
+            self.pagination = "cursor"
+
+        return self
+
     model_config = ConfigDict(extra="ignore")
 
 
@@ -165,12 +246,12 @@ class ProductListResponse(BaseModel):
     primary_image_url: list | str | None = None
     review_count: int | None
     average_rating: float | None
-    business_name: str
+    business_name: str | None
 
     @field_validator("tags")
     def validate_tags(cls, value):
-        # repr to convert class object to string
-        return repr([tag.name for tag in value])
+        # repr to convert class object or tag names to string
+        return repr([getattr(tag, "name", tag) for tag in value])
     
     @field_validator("average_rating")
     def validate_average_rating(cls, value):
@@ -182,6 +263,42 @@ class ProductListResponse(BaseModel):
     )
 
 
+# -------------------------------------------------- Search Products --------------------------------------------------
+
+
+SEARCH_TERM_PATTERN = re.compile(r"\w+")
+
+
+class ProductSearchParams(BaseModel):
+    q: List[str]
+    page: List[int] = None
+    per_page: List[int] = None
+
+    @field_validator("q")
+    def validate_q(cls, value):
+        # words only, every term is matched as a prefix
+        terms = SEARCH_TERM_PATTERN.findall(value[0].lower())
+
+        if not terms:
+            raise ValueError("Search query must contain at least one word")
+
+        if len(terms) > 10:
+            raise ValueError("Maximum of 10 search terms allowed")
+        return terms
+
+    @field_validator("page")
+    def validate_page(cls, value):
+        if value[0] < 1:
+            raise ValueError("page must be at least 1")
+        return value[0]
+
+    @field_validator("per_page")
+    def validate_per_page(cls, value):
+        return page_size(value[0])
+
+    model_config = ConfigDict(extra="ignore")
+
+
 # -------------------------------------------------- Get Product Detail --------------------------------------------------
 
 
@@ -340,6 +457,35 @@ class ProductUpdateRequest(BaseModel):
         return value
 
 
+class ProductBulkUpdateItem(BaseModel):
+    product_id: int
+    stock_quantity: Optional[int] = Field(None, ge=0)
+    price: Optional[Decimal] = Field(None, gt=0, decimal_places=2)
+    is_active: Optional[bool] = None
+
+    @model_validator(mode="after")
+    def validate_has_changes(self):
+        if self.stock_quantity is None and self.price is None and self.is_active is None:
+            raise ValueError("Nothing to update")
+
+        return self
+
+
+class ProductBulkUpdateRequest(BaseModel):
+    products: List[ProductBulkUpdateItem]
+
+    @field_validator("products")
+    def validate_products(cls, value):
+        if not value or len(value) > 5000:
+            raise ValueError("Between 1 and 5000 products allowed")
+
+        product_ids = [item.product_id for item in value]
+        if len(set(product_ids)) != len(product_ids):
+            raise ValueError("Each product can only be listed once")
+
+        return value
+
+
 # -------------------------------------------------- Delete Product --------------------------------------------------
 
 
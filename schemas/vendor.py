@@ -1,7 +1,9 @@
 from datetime import datetime
 import re
-from typing import Optional
-from pydantic import BaseModel, ConfigDict, field_validator
+from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from shared.cursor import decode_time_cursor, page_size
+from shared.time import naive_utc
 
 
 class VendorCreateRequest(BaseModel):
@@ -205,4 +207,46 @@ class VendorUpdateRequest(BaseModel):
     model_config = ConfigDict(
         from_attributes=True,  # Can read SQLAlchemy model
         extra="ignore",  # ignore extra fields
-    )
\ No newline at end of file
+    )
+
+
+class VendorOrdersExportParams(BaseModel):
+    format: List[str] = None
+    # half-open created_at range, from is inclusive and to exclusive
+    from_: List[datetime] = Field(None, alias="from")
+    to: List[datetime] = None
+    # resume after the row the cursor was taken from
+    after: List[str] = None
+
+    @field_validator("format")
+    def validate_format(cls, value):
+        if value[0] not in ("csv", "ndjson"):
+            raise ValueError("Format must be 'csv' or 'ndjson'")
+        return value[0]
+
+    @field_validator("from_", "to")
+    def validate_range(cls, value):
+        return naive_utc(value[0])
+
+    @field_validator("after")
+    def validate_after(cls, value):
+        # [order created_at, order line id]
+        return decode_time_cursor(value[0])
+
+    model_config = ConfigDict(extra="ignore", populate_by_name=True)
+
+
+class VendorRecentOrdersParams(BaseModel):
+    limit: List[int] = None
+    after: List[str] = None
+
+    @field_validator("limit")
+    def validate_limit(cls, value):
+        return page_size(value[0], 50, "limit")
+
+    @field_validator("after")
+    def validate_after(cls, value):
+        # [order line created_at, order line id]
+        return decode_time_cursor(value[0])
+
+    model_config = ConfigDict(extra="ignore")
@@ -0,0 +1,98 @@
+from collections import OrderedDict
+import pickle
+import threading
+import time
+
+
+# response cache with hit / miss / eviction counters
+# entries live in an in-process LRU with a TTL, unless a shared client (redis-style get/set/delete/scan_iter)
+# is configured, then they are stored there so every process sees the same entries
+class Cache:
+    def __init__(self, name, maxsize=1024, ttl=300):
+        self.name = name
+        self._lock = threading.Lock()
+        self.configure(maxsize=maxsize, ttl=ttl)
+
+    def configure(self, maxsize=1024, ttl=300, client=None):
+        with self._lock:
+            self.maxsize = maxsize
+            self.ttl = ttl
+            self.client = client
+            self._entries = OrderedDict()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def _shared_key(self, key):
+        return f"{self.name}:{key}"
+
+    def get(self, key):
+        if self.client is not None:
+            raw = self.client.get(self._shared_key(key))
+            value = pickle.loads(raw) if raw is not None else None
+
+        else:
+            with self._lock:
+                entry = self._entries.get(key)
+                value = None
+
+                if entry is not None:
+                    expires_at, value = entry
+
+                    if expires_at < time.monotonic():
+                        # expired entries count as evictions
+                        del self._entries[key]
+                        self.evictions += 1
+                        value = None
+
+                    else:
+                        self._entries.move_to_end(key)
+
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        return value
+
+    def set(self, key, value):
+        if self.client is not None:
+            self.client.set(self._shared_key(key), pickle.dumps(value), ex=self.ttl)
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+
+            # drop least recently used entries
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        if self.client is not None:
+            self.client.delete(self._shared_key(key))
+            return
+
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        if self.client is not None:
+            for shared_key in self.client.scan_iter(match=f"{self.name}:*"):
+                self.client.delete(shared_key)
+            return
+
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": "shared" if self.client is not None else "local",
+                "size": len(self._entries) if self.client is None else None,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,42 @@
+import base64
+import json
+from datetime import datetime
+
+
+# opaque keyset pagination tokens, a url-safe encoding of the last row's (sort key, id)
+def encode_cursor(*values):
+    raw = json.dumps(values, default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+
+    return values
+
+
+def decode_time_cursor(token):
+    # [timestamp, id] of the last row of a page ordered by (timestamp, id)
+    values = decode_cursor(token)
+
+    if len(values) != 2 or not isinstance(values[0], str) or type(values[1]) is not int:
+        raise ValueError("Invalid cursor")
+
+    try:
+        return datetime.fromisoformat(values[0]), values[1]
+    except ValueError as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def page_size(value, maximum=100, name="per_page"):
+    # larger pages are clamped rather than refused
+    if value < 1:
+        raise ValueError(f"{name} must be at least 1")
+    return min(value, maximum)
@@ -0,0 +1,47 @@
+import hashlib
+import math
+
+
+# hyperloglog distinct counter, stored as one byte per register so sketches can be saved and merged
+# 2 ** 10 registers keep the standard error around 3% in 1 KiB
+HLL_PRECISION = 10
+HLL_REGISTERS = 1 << HLL_PRECISION
+HLL_ALPHA = 0.7213 / (1 + 1.079 / HLL_REGISTERS)
+
+
+def empty_sketch():
+    return bytes(HLL_REGISTERS)
+
+
+def sketch_add(sketch, value):
+    hashed = int.from_bytes(
+        hashlib.blake2b(str(value).encode(), digest_size=8).digest(), "big"
+    )
+
+    # first bits pick the register, the position of the first set bit in the rest is its rank
+    register = hashed >> (64 - HLL_PRECISION)
+    remainder = hashed & ((1 << (64 - HLL_PRECISION)) - 1)
+    rank = (64 - HLL_PRECISION) - remainder.bit_length() + 1
+
+    if sketch[register] >= rank:
+        return sketch
+
+    registers = bytearray(sketch)
+    registers[register] = rank
+    return bytes(registers)
+
+
+def sketch_merge(*sketches):
+    # union of the counted sets
+    return bytes(max(registers) for registers in zip(*sketches))
+
+
+def sketch_count(sketch):
+    estimate = HLL_ALPHA * HLL_REGISTERS**2 / sum(2.0**-rank for rank in sketch)
+    empty_registers = sketch.count(0)
+
+    # linear counting is more accurate for small sets
+    if estimate <= 2.5 * HLL_REGISTERS and empty_registers:
+        estimate = HLL_REGISTERS * math.log(HLL_REGISTERS / empty_registers)
+
+    return round(estimate)
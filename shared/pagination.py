@@ -0,0 +1,16 @@
+from instance.database import db
+
+
+# two-phase db.paginate, the select pages over ids only and load(ids) fetches exactly those rows,
+# so filters, offsets and the total never run against joined or projected columns
+def paginate_ids(select, load):
+    # page and per_page are read from the request args, items are the ids of the page
+    pagination = db.paginate(select)
+    ids = pagination.items
+
+    if ids:
+        # keep the order of the id page
+        rows_by_id = {row.id: row for row in load(ids)}
+        pagination.items = [rows_by_id[id_] for id_ in ids if id_ in rows_by_id]
+
+    return pagination
@@ -40,4 +40,10 @@ def parse_mm_yy_date(value):
             return date(full_year + 1, 1, 1) - timedelta(days=1)
         return date(full_year, month + 1, 1) - timedelta(days=1)
     except Exception as e:
-        raise ValueError(f"Invalid MM/YY format: {str(e)}") from e
\ No newline at end of file
+        raise ValueError(f"Invalid MM/YY format: {str(e)}") from e
+
+def naive_utc(value):
+    # timestamps are stored as naive utc, aware query params are converted first
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
@@ -1,4 +1,5 @@
 import models
+from instance.cache import caches
 
 # uv run pytest -v -s --cov=.
 # uv run pytest tests/test_admin.py -v -s --cov=. --cov-report term-missing
@@ -17,6 +18,50 @@ def test_admin_required(client, mock_user_data, mock_token_data, roles_data_inje
     assert admin_route.status_code == 403
 
 
+def test_admin_required_from_token_claims(
+    client, db, mock_user_data, mock_login_data, roles_data_inject, query_counter
+):
+    register_user = client.post("/auth/register", json=mock_user_data)
+
+    assert register_user.status_code == 201
+
+    db.session.add(models.AdminUser(user_id=1, access_level="admin"))
+    db.session.commit()
+
+    login_user = client.post("/auth/login", json=mock_login_data)
+    headers = {"Authorization": f"Bearer {login_user.json['access_token']}"}
+
+    # admin access comes from the token claims
+    query_counter.statements.clear()
+    admin_route = client.get("/admin/cache-stats", headers=headers)
+
+    assert admin_route.status_code == 200
+    assert not any("admin_users" in statement for statement in query_counter.statements)
+
+    # the authorization version is cached, the guarded route runs no query once it is warm
+    query_counter.statements.clear()
+    admin_route = client.get("/admin/cache-stats", headers=headers)
+
+    assert admin_route.status_code == 200
+    assert query_counter.statements == []
+
+    # revoking admin access invalidates the claims of tokens issued before
+    db.session.delete(db.session.get(models.AdminUser, 1))
+    db.session.commit()
+
+    admin_route = client.get("/admin/cache-stats", headers=headers)
+
+    assert admin_route.status_code == 403
+
+    # kept in the database, so other processes and restarts see the revocation too
+    for cache in caches.values():
+        cache.clear()
+
+    admin_route = client.get("/admin/cache-stats", headers=headers)
+
+    assert admin_route.status_code == 403
+
+
 # ---------------------------------------------------------------------------- Create category Tests ----------------------------------------------------------------------------
 
 
@@ -242,6 +287,7 @@ def test_delete_category_tree(
     admins_data_inject,
     db,
     roles_data_inject,
+    query_counter,
 ):
     register_user = client.post("/auth/register", json=mock_user_data)
 
@@ -261,10 +307,25 @@ def test_delete_category_tree(
 
     assert create_subcategory.status_code == 201
 
+    # cache the tree before deleting
+    category_tree = client.get("/products/category")
+
+    assert len(category_tree.json["data"]["categories"]) == 1
+
+    query_counter.statements.clear()
     delete_category = client.delete("/admin/category/1", headers=mock_token_data)
 
     assert delete_category.status_code == 200
 
+    # the whole subtree in one statement
+    category_updates = [
+        statement
+        for statement in query_counter.statements
+        if "UPDATE product_categories" in statement
+    ]
+
+    assert len(category_updates) == 1
+
     categories = (
         db.session.execute(db.select(models.ProductCategory).filter_by(is_active=False))
         .scalars()
@@ -273,6 +334,10 @@ def test_delete_category_tree(
 
     assert len(categories) == 2
 
+    category_tree = client.get("/products/category")
+
+    assert category_tree.json["data"]["categories"] == []
+
 
 def test_delete_category_invalid_id(
     client, mock_user_data, mock_token_data, admins_data_inject, roles_data_inject
@@ -317,6 +382,172 @@ def test_get_admin_logs(
     assert get_admin_logs.json["message"] == "Admin logs fetched successfully"
     assert len(get_admin_logs.json["logs"]) == 1
     assert get_admin_logs.json["logs"][0]["action"] == "POST /admin/category"
+    assert get_admin_logs.json["logs"][0]["status_code"] == 201
+    assert get_admin_logs.json["logs"][0]["duration_ms"] > 0
+    # offset paging by default
+    assert get_admin_logs.json["pagination"]["total"] == 1
+    assert get_admin_logs.json["pagination"]["pages"] == 1
+    assert get_admin_logs.json["pagination"]["current_page"] == 1
+
+
+def test_get_admin_logs_filtered_keyset(
+    client, mock_user_data, mock_token_data, admins_data_inject, db, roles_data_inject
+):
+    from datetime import datetime
+
+    register_user = client.post("/auth/register", json=mock_user_data)
+
+    assert register_user.status_code == 201
+
+    actions = ["POST /admin/category"] * 3 + ["DELETE /admin/category/1"] * 2
+    db.session.add_all(
+        models.AdminLog(admin_id=1, action=action, timestamp=datetime(2026, 1, day + 1))
+        for day, action in enumerate(actions)
+    )
+    db.session.commit()
+
+    # newest first, pages follow the cursor
+    seen = []
+    next_cursor = None
+    while True:
+        query = f"/admin/logs?per_page=2&after={next_cursor}" if next_cursor else "/admin/logs?per_page=2&pagination=cursor"
+        get_admin_logs = client.get(query, headers=mock_token_data)
+
+        assert get_admin_logs.status_code == 200
+        seen += [log["id"] for log in get_admin_logs.json["logs"]]
+        next_cursor = get_admin_logs.json["pagination"]["next_cursor"]
+
+        if not get_admin_logs.json["pagination"]["has_next"]:
+            break
+
+    assert seen == [5, 4, 3, 2, 1]
+
+    # filters apply to offset pages as well
+    offset_page = client.get("/admin/logs?action=POST&per_page=2&page=2", headers=mock_token_data)
+
+    assert [log["id"] for log in offset_page.json["logs"]] == [1]
+    assert offset_page.json["pagination"]["total"] == 3
+
+    by_action = client.get("/admin/logs?action=DELETE", headers=mock_token_data)
+
+    assert [log["id"] for log in by_action.json["logs"]] == [5, 4]
+
+    by_time = client.get(
+        "/admin/logs?start=2026-01-02T00:00:00&end=2026-01-04T00:00:00", headers=mock_token_data
+    )
+
+    assert [log["id"] for log in by_time.json["logs"]] == [3, 2]
+
+    by_admin = client.get("/admin/logs?admin_id=2", headers=mock_token_data)
+
+    assert by_admin.json["logs"] == []
+
+    invalid_cursor = client.get("/admin/logs?after=invalid", headers=mock_token_data)
+
+    assert invalid_cursor.status_code == 400
+    assert invalid_cursor.json["location"] == "view get admin logs request validation"
+
+
+def test_rollup_admin_logs(db, users_data_inject):
+    from datetime import date, datetime
+    from repo.admin import rollup_admin_logs_repo
+
+    def add_logs(timestamps):
+        db.session.add_all(
+            models.AdminLog(admin_id=1, action="POST /admin/category", timestamp=timestamp)
+            for timestamp in timestamps
+        )
+        db.session.commit()
+
+    add_logs([datetime(2026, 1, 1, 8), datetime(2026, 1, 1, 20), datetime(2026, 1, 2, 8), datetime(2026, 3, 1)])
+
+    assert rollup_admin_logs_repo(datetime(2026, 2, 1)) == 3
+
+    # a later run adds to days compacted before
+    add_logs([datetime(2026, 1, 1, 12)])
+
+    assert rollup_admin_logs_repo(datetime(2026, 2, 1)) == 1
+
+    daily_counts = db.session.execute(
+        db.select(models.AdminLogDailyCount.day, models.AdminLogDailyCount.count)
+        .order_by(models.AdminLogDailyCount.day)
+    ).all()
+
+    assert daily_counts == [(date(2026, 1, 1), 3), (date(2026, 1, 2), 1)]
+    assert db.session.scalar(db.select(db.func.count(models.AdminLog.id))) == 1
+
+
+def test_admin_log_writer_batches(test_app, db, users_data_inject, query_counter):
+    from scheduled.audit import AuditLogWriter
+
+    writer = AuditLogWriter(test_app, maxsize=2, enqueue_timeout=0)
+    entry = {"admin_id": 1, "action": "POST /admin/category", "status_code": 201, "duration_ms": 1.5}
+
+    # the third entry does not fit the queue and is dropped
+    assert writer.record(entry) is True
+    assert writer.record(entry) is True
+    assert writer.record(entry) is False
+
+    query_counter.statements.clear()
+    writer.close()
+
+    # both entries in a single insert
+    assert len([s for s in query_counter.statements if s.startswith("INSERT INTO admin_log")]) == 1
+    assert db.session.scalar(db.select(db.func.count(models.AdminLog.id))) == 2
+    assert writer.stats()["written"] == 2
+    assert writer.stats()["dropped"] == 1
+
+
+
+def test_admin_log_writer_full_batch_wakes_flusher(test_app, db, users_data_inject):
+    import time
+    from scheduled.audit import AuditLogWriter
+
+    # the interval alone would hold the entries for a minute
+    writer = AuditLogWriter(test_app, batch_size=2, flush_interval=60)
+    entry = {"admin_id": 1, "action": "POST /admin/category", "status_code": 201, "duration_ms": 1.5}
+
+    writer.record(entry)
+    writer.record(entry)
+
+    deadline = time.monotonic() + 5
+    while writer.stats()["written"] < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert writer.stats()["written"] == 2
+
+    # close wakes the idle flusher instead of waiting out the interval
+    started = time.monotonic()
+    writer.close()
+
+    assert time.monotonic() - started < 5
+    assert not writer.stats()["running"]
+
+# ---------------------------------------------------------------------------- Cache stats Tests ----------------------------------------------------------------------------
+
+
+def test_get_cache_stats(
+    client,
+    mock_user_data,
+    mock_token_data,
+    admins_data_inject,
+    roles_data_inject,
+    products_data_inject,
+):
+    register_user = client.post("/auth/register", json=mock_user_data)
+
+    assert register_user.status_code == 201
+
+    client.get("/products/1")
+    client.get("/products/1")
+
+    cache_stats = client.get("/admin/cache-stats", headers=mock_token_data)
+
+    assert cache_stats.status_code == 200
+    assert cache_stats.json["success"] is True
+    assert cache_stats.json["caches"]["product_detail"]["hits"] == 1
+    assert cache_stats.json["caches"]["product_detail"]["misses"] == 1
+    assert cache_stats.json["caches"]["product_detail"]["backend"] == "local"
 
 
 # ---------------------------------------------------------------------------- Get all vendors test ----------------------------------------------------------------------------
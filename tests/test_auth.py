@@ -213,6 +213,66 @@ def test_get_current_user_missing_user(client, mock_token_data):
     assert get_current_user.status_code == 404
 
 
+def test_get_current_user_identity_cached(
+    client, mock_user_data, mock_token_data, mock_update_user_data, roles_data_inject, query_counter
+):
+    register_user = client.post("/auth/register", json=mock_user_data)
+
+    assert register_user.status_code == 201
+
+    first_call = client.get("/auth/me", headers=mock_token_data)
+
+    assert first_call.status_code == 200
+
+    # same token, user served from the identity cache
+    query_counter.statements.clear()
+    second_call = client.get("/auth/me", headers=mock_token_data)
+
+    assert second_call.json == first_call.json
+    assert not any("FROM users" in statement for statement in query_counter.statements)
+
+    # profile changes drop the cached identity
+    update_user = client.put("/user/me", json=mock_update_user_data, headers=mock_token_data)
+
+    assert update_user.status_code == 200
+
+    query_counter.statements.clear()
+    get_current_user = client.get("/auth/me", headers=mock_token_data)
+
+    assert get_current_user.json["user"]["first_name"] == mock_update_user_data["first_name"]
+    assert any("FROM users" in statement for statement in query_counter.statements)
+
+
+def test_get_current_user_claims_principal(
+    client, test_app, mock_user_data, mock_token_data, roles_data_inject, query_counter
+):
+    from auth.jwt import ClaimsPrincipal
+    from flask_jwt_extended import decode_token
+
+    register_user = client.post("/auth/register", json=mock_user_data)
+
+    assert register_user.status_code == 201
+
+    test_app.config["JWT_CLAIMS_PRINCIPAL"] = True
+
+    # claims are served without loading the user
+    principal = ClaimsPrincipal(
+        decode_token(mock_token_data["Authorization"].removeprefix("Bearer "))
+    )
+    query_counter.statements.clear()
+
+    assert principal.id == 1
+    assert principal.username == mock_user_data["username"]
+    assert query_counter.statements == []
+
+    # anything else loads the full user
+    get_current_user = client.get("/auth/me", headers=mock_token_data)
+
+    assert get_current_user.status_code == 200
+    assert get_current_user.json["user"]["email"] == mock_user_data["email"]
+    assert get_current_user.json["user"]["id"] == 1
+
+
 #  ---------------------------------------------------------------------------- refresh token Tests ----------------------------------------------------------------------------
 
 def test_refresh_token(client, mock_user_data, mock_token_data, mock_refresh_token_data, roles_data_inject):
@@ -0,0 +1,138 @@
+import fnmatch
+from shared.cache import Cache
+
+# uv run pytest -v -s --cov=.
+# uv run pytest tests/test_cache.py -v -s --cov=. --cov-report term-missing
+
+
+class FakeSharedClient:
+    # stands in for a redis client
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def set(self, key, value, ex=None):
+        self.store[key] = value
+
+    def delete(self, key):
+        self.store.pop(key, None)
+
+    def scan_iter(self, match):
+        return [key for key in list(self.store) if fnmatch.fnmatch(key, match)]
+
+
+# ---------------------------------------------------------------------------- Local cache Tests ----------------------------------------------------------------------------
+
+
+def test_cache_lru_eviction():
+    cache = Cache("test", maxsize=2)
+
+    cache.set(1, "one")
+    cache.set(2, "two")
+
+    # touch 1 so 2 is the least recently used
+    assert cache.get(1) == "one"
+
+    cache.set(3, "three")
+
+    assert cache.get(2) is None
+    assert cache.get(3) == "three"
+    assert cache.stats() == {
+        "backend": "local",
+        "size": 2,
+        "hits": 2,
+        "misses": 1,
+        "evictions": 1,
+    }
+
+
+def test_cache_ttl_expiry():
+    cache = Cache("test", ttl=-1)
+
+    cache.set(1, "one")
+
+    assert cache.get(1) is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_delete_and_clear():
+    cache = Cache("test")
+
+    cache.set(1, "one")
+    cache.set(2, "two")
+    cache.delete(1)
+
+    assert cache.get(1) is None
+
+    cache.clear()
+
+    assert cache.get(2) is None
+
+
+# ---------------------------------------------------------------------------- Shared cache Tests ----------------------------------------------------------------------------
+
+
+def test_shared_cache_backend():
+    client = FakeSharedClient()
+    cache = Cache("test")
+    cache.configure(client=client)
+
+    cache.set(1, {"id": 1, "tags": ["eco"]})
+
+    assert "test:1" in client.store
+    assert cache.get(1) == {"id": 1, "tags": ["eco"]}
+
+    # another process sharing the client sees the entry
+    other_process_cache = Cache("test")
+    other_process_cache.configure(client=client)
+
+    assert other_process_cache.get(1) == {"id": 1, "tags": ["eco"]}
+
+    other_process_cache.delete(1)
+
+    assert cache.get(1) is None
+    assert cache.stats()["backend"] == "shared"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+    cache.set(2, "two")
+    client.store["other:2"] = "kept"
+    cache.clear()
+
+    assert client.store == {"other:2": "kept"}
+
+
+def test_product_detail_shared_cache(client, test_app, products_data_inject, roles_data_inject):
+    from instance.cache import init_cache, product_detail_cache
+
+    shared_client = FakeSharedClient()
+    test_app.config["CACHE_SHARED_CLIENT"] = shared_client
+    init_cache(test_app)
+
+    product = client.get("/products/1")
+
+    assert product.status_code == 200
+    assert "product_detail:1" in shared_client.store
+    assert client.get("/products/1").json == product.json
+    assert product_detail_cache.stats()["hits"] == 1
+
+
+def test_product_detail_cache_invalidated_after_commit(client, db, products_data_inject, roles_data_inject):
+    import models
+    from instance.cache import product_detail_cache
+
+    assert client.get("/products/1").status_code == 200
+
+    product = db.session.get(models.Product, 1)
+    product.name = "Renamed product"
+    db.session.flush()
+
+    # a read before the commit would cache the old row again, the entry stays until then
+    assert product_detail_cache.get(1) is not None
+
+    db.session.commit()
+
+    assert product_detail_cache.get(1) is None
+    assert client.get("/products/1").json["product"]["name"] == "Renamed product"
@@ -1,5 +1,9 @@
-from models.order import CartItem
+import threading
+from sqlalchemy.exc import OperationalError
+from models.order import CartItem, OrderItem, ShoppingCart
 from models.product import Product, Promotion
+from repo.order import checkout_cart_items_repo, checkout_order_repo, get_cart_by_user_id_repo
+from schemas.order import OrderCreate
 # uv run pytest -v -s --cov=.
 # uv run pytest tests/test_order.py -v -s --cov=. --cov-report term-missing
 
@@ -17,6 +21,29 @@ def test_get_cart(client, mock_user_data, mock_token_data, roles_data_inject):
     assert len(get_cart.json["cart_items"]) == 0
 
 
+def test_get_cart_items_primary_image(
+    client,
+    mock_user_data,
+    mock_token_data,
+    cart_data_inject,
+    cart_item_data_inject,
+    products_data_inject,
+    image_data_inject,
+    roles_data_inject,
+    query_counter,
+):
+    register_user = client.post("/auth/register", json=mock_user_data)
+
+    assert register_user.status_code == 201
+
+    query_counter.statements.clear()
+    get_cart = client.get("/order/cart", headers=mock_token_data)
+
+    # read from the product row, the images table is not touched
+    assert get_cart.json["cart_items"][0]["product"]["image_url"] == "https://example.com/image1.jpg"
+    assert not any("product_images" in statement for statement in query_counter.statements)
+
+
 # ---------------------------------------------------------------------------- Add to cart test ----------------------------------------------------------------------------
 
 
@@ -528,6 +555,64 @@ def test_checkout_order_fixed_discount(
     assert order["total_amount"] == 11.98
 
 
+def test_checkout_order_promotion_usage_counted(
+    client,
+    mock_user_data,
+    mock_token_data,
+    mock_promotion_data,
+    mock_checkout_data,
+    cart_data_inject,
+    cart_item_data_inject,
+    products_data_inject,
+    category_data_inject,
+    admins_data_inject,
+    roles_data_inject,
+    db,
+    query_counter,
+):
+    register_user = client.post("/auth/register", json=mock_user_data)
+
+    assert register_user.status_code == 201
+
+    # promotion only through the category, usage limit of 1
+    mock_promotion_data["product_ids"] = []
+    mock_promotion_data["category_names"] = ["category1"]
+
+    create_promotion = client.post(
+        "/admin/promotions", json=mock_promotion_data, headers=mock_token_data
+    )
+
+    assert create_promotion.status_code == 201
+
+    query_counter.statements.clear()
+    checkout_order = client.post(
+        "/order/checkout", json=mock_checkout_data, headers=mock_token_data
+    )
+
+    assert checkout_order.status_code == 201
+    assert checkout_order.json["applied_promotion"]["eligible_items_ids"] == [1]
+
+    # eligibility is checked for the cart products, the category's products are never loaded
+    assert not any(
+        "? = products.category_id" in statement for statement in query_counter.statements
+    )
+
+    promotion = db.session.execute(db.select(Promotion).filter_by(id=1)).scalar_one()
+
+    assert promotion.usage_count == 1
+
+    # limit reached for the next checkout
+    db.session.add(CartItem(cart_id=1, product_id=1, quantity=1))
+    db.session.commit()
+
+    checkout_order = client.post(
+        "/order/checkout", json=mock_checkout_data, headers=mock_token_data
+    )
+
+    assert checkout_order.status_code == 400
+    assert checkout_order.json["message"] == "Promo usage limit reached"
+
+
 def test_checkout_order_not_enough_stock(
     client,
     mock_user_data,
@@ -752,6 +837,140 @@ def test_checkout_order_repo_error(
     assert checkout_order.json["location"] == "view checkout order repo"
 
 
+def test_checkout_order_single_transaction(
+    client,
+    mock_user_data,
+    mock_token_data,
+    mock_checkout_data,
+    cart_data_inject,
+    cart_item_data_inject,
+    products_data_inject,
+    roles_data_inject,
+    db,
+    query_counter,
+):
+    register_user = client.post("/auth/register", json=mock_user_data)
+
+    assert register_user.status_code == 201
+
+    # second product in the cart
+    db.session.add(CartItem(cart_id=1, product_id=2, quantity=3))
+    db.session.commit()
+
+    mock_checkout_data.pop("promotion_code")
+
+    query_counter.statements.clear()
+    checkout_order = client.post(
+        "/order/checkout", json=mock_checkout_data, headers=mock_token_data
+    )
+
+    assert checkout_order.status_code == 201
+    assert checkout_order.json["order"]["total_amount"] == round(10.99 * 2 + 19.99 * 3, 2)
+
+    # one stock update, one order item insert and one cart delete for the whole cart
+    statements = query_counter.statements
+
+    assert len([s for s in statements if s.startswith("UPDATE products")]) == 1
+    assert len([s for s in statements if s.startswith("INSERT INTO order_items")]) == 1
+    assert len([s for s in statements if s.startswith("DELETE FROM cart_items")]) == 1
+
+    stock = dict(db.session.execute(db.select(Product.id, Product.stock_quantity)).all())
+
+    assert stock == {1: 8, 2: 2}
+    assert db.session.execute(db.select(CartItem)).scalars().all() == []
+
+
+def test_checkout_order_invalidates_product_details(
+    client,
+    mock_user_data,
+    mock_token_data,
+    mock_checkout_data,
+    cart_data_inject,
+    cart_item_data_inject,
+    products_data_inject,
+    roles_data_inject,
+):
+    register_user = client.post("/auth/register", json=mock_user_data)
+
+    assert register_user.status_code == 201
+
+    # cached before the checkout
+    assert client.get("/products/1").json["product"]["stock_quantity"] == 10
+
+    mock_checkout_data.pop("promotion_code")
+    checkout_order = client.post(
+        "/order/checkout", json=mock_checkout_data, headers=mock_token_data
+    )
+
+    assert checkout_order.status_code == 201
+    assert client.get("/products/1").json["product"]["stock_quantity"] == 8
+
+
+def test_checkout_order_concurrent_no_oversell(
+    test_app, products_data_inject, roles_data_inject, db
+):
+    # ten carts racing for the five units of product 2
+    buyers = 10
+
+    for user_id in range(1, buyers + 1):
+        db.session.add(ShoppingCart(id=user_id, user_id=user_id))
+        db.session.add(CartItem(cart_id=user_id, product_id=2, quantity=1))
+    db.session.commit()
+
+    start = threading.Barrier(buyers)
+    results = []
+
+    def checkout(user_id):
+        with test_app.app_context():
+            start.wait()
+
+            try:
+                cart = get_cart_by_user_id_repo(user_id)
+                order = checkout_order_repo(
+                    cart,
+                    OrderCreate(shipping_address_id=1, payment_method_id=1),
+                    user_id,
+                    f"ORD-{user_id}",
+                )
+
+                results.append(checkout_cart_items_repo(order, cart) is None)
+
+                if results[-1]:
+                    db.session.commit()
+                else:
+                    db.session.rollback()
+
+            except OperationalError:
+                # sqlite gives up waiting for the write lock, the buyer simply failed
+                db.session.rollback()
+                results.append(False)
+
+            finally:
+                db.session.remove()
+
+    threads = [
+        threading.Thread(target=checkout, args=(user_id,))
+        for user_id in range(1, buyers + 1)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    db.session.expire_all()
+    remaining_stock = db.session.execute(
+        db.select(Product.stock_quantity).filter_by(id=2)
+    ).scalar()
+    ordered = db.session.execute(
+        db.select(db.func.coalesce(db.func.sum(OrderItem.quantity), 0)).filter_by(product_id=2)
+    ).scalar()
+
+    assert len(results) == buyers
+    assert remaining_stock >= 0
+    assert results.count(True) == ordered
+    assert ordered + remaining_stock == 5
+
+
 # ---------------------------------------------------------------------------- Get order test ----------------------------------------------------------------------------
 
 
@@ -862,6 +1081,122 @@ def test_get_all_orders(client, mock_user_data, mock_token_data, roles_data_inje
     assert len(get_all_orders.json["orders"][0]) == 7
 
 
+def add_order_history(db, count):
+    from datetime import timedelta
+    from models.order import Order, OrderItem
+    from shared.time import now
+
+    # one order a day, the newest has the highest number
+    for number in range(count):
+        order = Order(
+            user_id=1,
+            order_number=f"HISTORY{number:03d}",
+            status="delivered" if number % 2 else "pending",
+            total_amount=10.00,
+            created_at=now() - timedelta(days=count - number),
+        )
+        db.session.add(order)
+        db.session.flush()
+
+        db.session.add_all(
+            OrderItem(
+                order_id=order.id,
+                product_id=product_id,
+                quantity=1,
+                unit_price=5.00,
+                total_price=5.00,
+                vendor_id=1,
+            )
+            for product_id in (1, 2)
+        )
+
+    db.session.commit()
+
+
+def test_get_all_orders_paginated(
+    client, db, mock_user_data, mock_token_data, products_data_inject, roles_data_inject
+):
+    register_user = client.post("/auth/register", json=mock_user_data)
+
+    assert register_user.status_code == 201
+
+    add_order_history(db, 5)
+
+    order_numbers = []
+    url = "/order?per_page=2"
+
+    while url:
+        get_all_orders = client.get(url, headers=mock_token_data)
+
+        assert get_all_orders.status_code == 200
+        order_numbers += [order["order_number"] for order in get_all_orders.json["orders"]]
+
+        pagination = get_all_orders.json["pagination"]
+        url = pagination["has_next"] and f"/order?per_page=2&after={pagination['next_cursor']}"
+
+    # newest first, every order exactly once
+    assert order_numbers == [f"HISTORY{number:03d}" for number in range(4, -1, -1)]
+
+    # without per_page or after every order comes in one response
+    get_all_orders = client.get("/order", headers=mock_token_data)
+
+    assert [order["order_number"] for order in get_all_orders.json["orders"]] == order_numbers
+    assert get_all_orders.json["pagination"]["has_next"] is False
+
+    get_delivered = client.get("/order?status=delivered", headers=mock_token_data)
+
+    assert [order["order_number"] for order in get_delivered.json["orders"]] == [
+        "HISTORY003",
+        "HISTORY001",
+    ]
+
+
+def test_get_all_orders_constant_queries(
+    client,
+    db,
+    mock_user_data,
+    mock_token_data,
+    products_data_inject,
+    roles_data_inject,
+    query_counter,
+):
+    register_user = client.post("/auth/register", json=mock_user_data)
+
+    assert register_user.status_code == 201
+
+    add_order_history(db, 4)
+
+    # warm the identity cache so both pages authenticate the same way
+    client.get("/order?per_page=1", headers=mock_token_data)
+
+    # items, products and status history cost the same for one order as for a full page
+    query_counts = []
+
+    for per_page in (1, 4):
+        query_counter.statements.clear()
+        query_counter.count = 0
+        get_all_orders = client.get(f"/order?per_page={per_page}", headers=mock_token_data)
+
+        assert get_all_orders.status_code == 200
+        assert len(get_all_orders.json["orders"]) == per_page
+        query_counts.append(query_counter.count)
+
+    assert query_counts[0] == query_counts[1]
+    assert not any("product_images" in statement for statement in query_counter.statements)
+
+
+def test_get_all_orders_validation_error(client, mock_user_data, mock_token_data, roles_data_inject):
+    register_user = client.post("/auth/register", json=mock_user_data)
+
+    assert register_user.status_code == 201
+
+    get_all_orders = client.get("/order?after=not-a-cursor", headers=mock_token_data)
+
+    assert get_all_orders.status_code == 400
+    assert get_all_orders.json["success"] is False
+    assert get_all_orders.json["location"] == "view get all orders request validation"
+
+
 
 
 # views\order.py               137      9    93%   31-33, 413-415
@@ -1,4 +1,9 @@
+import json
 import models
+import pytest
+from instance.cache import product_detail_cache
+from shared.cursor import encode_cursor
+from repo.product_review import has_pending_rating_deltas_repo, reconcile_rating_stats_repo
 
 # uv run pytest -v -s --cov=.
 # uv run pytest tests/test_product.py -v -s --cov=. --cov-report term-missing
@@ -38,6 +43,48 @@ def test_create_product(
     assert len(sustainability_attributes) == 2
 
 
+def test_create_product_tags_resolved_in_bulk(
+    client,
+    mock_create_product_data,
+    mock_vendor_token_data,
+    mock_vendor_data,
+    db,
+    approved_vendor_profile_inject,
+    roles_data_inject,
+    query_counter,
+):
+    register_vendor = client.post("/auth/register", json=mock_vendor_data)
+
+    assert register_vendor.status_code == 201
+
+    # warm the identity cache so both requests authenticate the same way
+    client.get("/vendor/products", headers=mock_vendor_token_data)
+
+    # the same statements for two names as for ten, existing names are reused
+    query_counts = []
+
+    for count in (2, 10):
+        mock_create_product_data["tags"] = [f"tag-{number}" for number in range(count)]
+        mock_create_product_data["sustainability_attributes"] = [
+            f"attribute-{number}" for number in range(count // 2)
+        ]
+
+        query_counter.count = 0
+        product = client.post(
+            "/products", json=mock_create_product_data, headers=mock_vendor_token_data
+        )
+
+        assert product.status_code == 201
+        query_counts.append(query_counter.count)
+
+    assert query_counts[0] == query_counts[1]
+
+    tags = db.session.execute(db.select(models.ProductTag.name)).scalars().all()
+
+    assert sorted(tags) == sorted(f"tag-{number}" for number in range(10))
+    assert len(db.session.get(models.Product, product.json["product"]["id"]).tags) == 10
+
+
 def test_create_product_not_vendor(
     client,
     mock_create_product_data,
@@ -318,6 +365,147 @@ def test_create_product_Images_validation_error(
     assert product.json["location"] == "view create product request validation"
 
 
+# ---------------------------------------------------------------------------- Bulk import product Tests ----------------------------------------------------------------------------
+
+
+IMPORT_CSV = """name,description,price,category_id,stock_quantity,tags,sustainability_attributes,primary_image_url,images
+Bamboo brush,bamboo tooth brush,4.50,1,100,eco-friendly|bamboo,plastic-free,https://example.com/brush.jpg,https://example.com/brush2.jpg
+Cotton bag,organic cotton tote bag,12.00,,20,eco-friendly,,https://example.com/bag.jpg,
+Free lunch,too good to be true,-1,,5,,,https://example.com/lunch.jpg,
+Ghost,product in no category,3.00,999,5,,,https://example.com/ghost.jpg,
+"""
+
+
+def test_import_products_csv(
+    client,
+    db,
+    mock_vendor_data,
+    mock_vendor_token_data,
+    approved_vendor_profile_inject,
+    category_data_inject,
+    roles_data_inject,
+):
+    register_vendor = client.post("/auth/register", json=mock_vendor_data)
+
+    assert register_vendor.status_code == 201
+
+    import_products = client.post(
+        "/products/bulk",
+        data=IMPORT_CSV,
+        content_type="text/csv",
+        headers=mock_vendor_token_data,
+    )
+
+    assert import_products.status_code == 200
+    assert import_products.json["success"] is True
+    assert import_products.json["imported"] == 2
+    assert import_products.json["failed"] == 2
+    assert [error["line"] for error in import_products.json["errors"]] == [4, 5]
+    assert "price" in import_products.json["errors"][0]["message"]
+    assert import_products.json["errors"][1]["message"] == "Category not found"
+
+    brush = db.session.execute(
+        db.select(models.Product).filter_by(name="Bamboo brush")
+    ).scalar_one()
+
+    assert brush.vendor_id == 1
+    assert brush.primary_image_url == "https://example.com/brush.jpg"
+    assert sorted(tag.name for tag in brush.tags) == ["bamboo", "eco-friendly"]
+    assert [attribute.name for attribute in brush.sustainability_attributes] == ["plastic-free"]
+    assert len(brush.images) == 2
+
+    # searchable right away
+    search = client.get("/products/search?q=eco")
+
+    assert len(search.json["products"]) == 2
+
+
+def test_import_products_ndjson(
+    client,
+    mock_vendor_data,
+    mock_vendor_token_data,
+    mock_create_product_data,
+    approved_vendor_profile_inject,
+    roles_data_inject,
+):
+    register_vendor = client.post("/auth/register", json=mock_vendor_data)
+
+    assert register_vendor.status_code == 201
+
+    lines = [json.dumps(mock_create_product_data), "{not json", "", json.dumps(["a list"])]
+
+    import_products = client.post(
+        "/products/bulk?format=ndjson",
+        data="\n".join(lines),
+        headers=mock_vendor_token_data,
+    )
+
+    assert import_products.status_code == 200
+    assert import_products.json["imported"] == 1
+    assert [error["line"] for error in import_products.json["errors"]] == [2, 4]
+
+
+def test_import_products_constant_queries(
+    client,
+    mock_vendor_data,
+    mock_vendor_token_data,
+    mock_create_product_data,
+    approved_vendor_profile_inject,
+    roles_data_inject,
+    query_counter,
+):
+    register_vendor = client.post("/auth/register", json=mock_vendor_data)
+
+    assert register_vendor.status_code == 201
+
+    # warm the identity cache so both uploads authenticate the same way
+    client.get("/vendor/products", headers=mock_vendor_token_data)
+
+    # a chunk costs the same statements for two products as for fifty
+    query_counts = []
+
+    for count in (2, 50):
+        lines = [
+            json.dumps(
+                {
+                    **mock_create_product_data,
+                    "name": f"product {count} {number}",
+                    "tags": [f"tag-{count}", f"tag-{number}"],
+                    "sustainability_attributes": [f"attribute-{count}"],
+                }
+            )
+            for number in range(count)
+        ]
+
+        query_counter.count = 0
+        import_products = client.post(
+            "/products/bulk",
+            data="\n".join(lines),
+            content_type="application/x-ndjson",
+            headers=mock_vendor_token_data,
+        )
+
+        assert import_products.json["imported"] == count
+        query_counts.append(query_counter.count)
+
+    assert query_counts[0] == query_counts[1]
+
+
+def test_import_products_unsupported_format(
+    client, mock_vendor_data, mock_vendor_token_data, approved_vendor_profile_inject, roles_data_inject
+):
+    register_vendor = client.post("/auth/register", json=mock_vendor_data)
+
+    assert register_vendor.status_code == 201
+
+    import_products = client.post(
+        "/products/bulk", data="<products/>", content_type="text/xml", headers=mock_vendor_token_data
+    )
+
+    assert import_products.status_code == 400
+    assert import_products.json["location"] == "view import products request validation"
+
+
 # ---------------------------------------------------------------------------- Get product Tests ----------------------------------------------------------------------------
 
 
@@ -365,6 +553,114 @@ def test_get_product_with_args(
     assert product.json["pagination"]["total"] == 1
 
 
+def test_get_product_list_fixed_query_count(
+    client,
+    mock_multiple_create_product_data,
+    mock_vendor_token_data,
+    mock_vendor_data,
+    approved_vendor_profile_inject,
+    roles_data_inject,
+    query_counter,
+):
+    # register vendor
+    register_vendor = client.post("/auth/register", json=mock_vendor_data)
+
+    assert register_vendor.status_code == 201
+
+    # insert product
+    for product in mock_multiple_create_product_data:
+        product = client.post("/products", json=product, headers=mock_vendor_token_data)
+
+        assert product.status_code == 201
+
+    # id page, projection of those ids and the total, whatever the page size
+    query_counts = []
+
+    for per_page in (1, 20):
+        query_counter.count = 0
+        product = client.get(f"/products?per_page={per_page}")
+
+        assert product.status_code == 200
+        query_counts.append(query_counter.count)
+
+    assert query_counts == [3, 3]
+
+    query_counter.count = 0
+    product = client.get("/products?pagination=cursor&per_page=20")
+
+    assert product.status_code == 200
+    assert query_counter.count == 1
+
+    listed_product = product.json["products"][0]
+
+    assert listed_product["business_name"] is not None
+    assert listed_product["primary_image_url"] == "https://example.com/image.jpg"
+    assert "eco-friendly" in listed_product["tags"]
+
+
+def test_get_product_facets(
+    client,
+    mock_multiple_create_product_data,
+    mock_vendor_token_data,
+    mock_vendor_data,
+    approved_vendor_profile_inject,
+    roles_data_inject,
+    query_counter,
+):
+    register_vendor = client.post("/auth/register", json=mock_vendor_data)
+
+    assert register_vendor.status_code == 201
+
+    for product in mock_multiple_create_product_data:
+        product = client.post("/products", json=product, headers=mock_vendor_token_data)
+
+        assert product.status_code == 201
+
+    product = client.get("/products?facets=true")
+
+    assert product.status_code == 200
+    assert len(product.json["products"]) == 2
+
+    facets = product.json["facets"]
+
+    assert sorted(
+        (category["category_id"] or 0, category["count"])
+        for category in facets["categories"]
+    ) == [(0, 1), (1, 1)]
+    assert facets["tags"] == [
+        {"name": "eco-friendly", "count": 2},
+        {"name": "cheap", "count": 1},
+        {"name": "handmade", "count": 1},
+    ]
+    assert facets["price_buckets"] == [
+        {"min_price": 10, "max_price": 25, "count": 1},
+        {"min_price": 25, "max_price": 50, "count": 1},
+    ]
+
+    # facets follow the current filters
+    product = client.get("/products?facets=true&tags=handmade&pagination=cursor")
+
+    assert product.status_code == 200
+    assert product.json["facets"]["categories"] == [{"category_id": 1, "count": 1}]
+
+    # cached per filter set
+    query_counter.statements.clear()
+    product = client.get("/products?facets=true")
+
+    assert not any("GROUP BY" in statement for statement in query_counter.statements)
+
+    # product writes refresh them
+    product = client.post(
+        "/products", json=mock_multiple_create_product_data[0], headers=mock_vendor_token_data
+    )
+
+    assert product.status_code == 201
+
+    product = client.get("/products?facets=true")
+
+    assert product.json["facets"]["tags"][0] == {"name": "eco-friendly", "count": 3}
+
+
 def test_get_product_invalid_args(client, roles_data_inject):
     product = client.get("/products?min_price=-1")
 
@@ -379,6 +675,220 @@ def test_get_product_invalid_args(client, roles_data_inject):
     assert product.json["location"] == "view list products request validation"
 
 
+def test_get_product_cursor_pagination(
+    client,
+    products_data_inject,
+    approved_vendor_profile_inject,
+    roles_data_inject,
+    users_data_inject,
+):
+    first_page = client.get("/products?pagination=cursor&per_page=1")
+
+    assert first_page.status_code == 200
+    assert first_page.json["success"] is True
+    assert len(first_page.json["products"]) == 1
+    assert first_page.json["pagination"]["has_next"] is True
+    assert first_page.json["pagination"]["total"] is None
+
+    next_cursor = first_page.json["pagination"]["next_cursor"]
+    second_page = client.get(f"/products?after={next_cursor}&per_page=1")
+
+    assert second_page.status_code == 200
+    assert len(second_page.json["products"]) == 1
+    assert second_page.json["pagination"]["has_next"] is False
+    assert second_page.json["pagination"]["next_cursor"] is None
+    assert (
+        second_page.json["products"][0]["id"] != first_page.json["products"][0]["id"]
+    )
+
+
+def test_get_product_cursor_pagination_price_sort(
+    client,
+    products_data_inject,
+    approved_vendor_profile_inject,
+    roles_data_inject,
+    users_data_inject,
+):
+    ids = []
+    after = ""
+
+    for _ in range(2):
+        product = client.get(
+            f"/products?pagination=cursor&sort=price_desc&per_page=1{after}"
+        )
+
+        assert product.status_code == 200
+        ids.append(product.json["products"][0]["id"])
+        after = f"&after={product.json['pagination']['next_cursor']}"
+
+    assert ids == [2, 1]
+
+
+def test_get_product_cursor_pagination_total_cached(
+    client,
+    products_data_inject,
+    approved_vendor_profile_inject,
+    roles_data_inject,
+    users_data_inject,
+    query_counter,
+):
+    product = client.get("/products?pagination=cursor&include_total=true")
+
+    assert product.status_code == 200
+    assert product.json["pagination"]["total"] == 2
+
+    query_counter.statements.clear()
+    product = client.get("/products?pagination=cursor&include_total=true")
+
+    assert product.json["pagination"]["total"] == 2
+    assert not any("count(" in statement for statement in query_counter.statements)
+
+
+def test_get_product_invalid_cursor(client, roles_data_inject):
+    product = client.get("/products?after=not-a-cursor")
+
+    assert product.status_code == 400
+    assert product.json["success"] is False
+    assert product.json["location"] == "view list products request validation"
+
+    product = client.get("/products?pagination=cursor&sort=oldest")
+
+    assert product.status_code == 400
+    assert product.json["location"] == "view list products request validation"
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        encode_cursor("price_asc", "abc", 1),
+        encode_cursor("price_asc", "NaN", 1),
+        encode_cursor("newest", 5, 1),
+        encode_cursor("newest", "yesterday", 1),
+        encode_cursor("newest", None, 1),
+        encode_cursor("price_desc", "10.99", "1"),
+    ],
+)
+def test_get_product_edited_cursor(client, roles_data_inject, cursor):
+    # a well formed token with a sort key of the wrong type is rejected, not run
+    product = client.get(f"/products?after={cursor}")
+
+    assert product.status_code == 400
+    assert product.json["location"] == "view list products request validation"
+
+
+# ---------------------------------------------------------------------------- Search product Tests ----------------------------------------------------------------------------
+
+
+def test_search_products(
+    client,
+    mock_multiple_create_product_data,
+    mock_vendor_token_data,
+    mock_vendor_data,
+    approved_vendor_profile_inject,
+    roles_data_inject,
+):
+    register_vendor = client.post("/auth/register", json=mock_vendor_data)
+
+    assert register_vendor.status_code == 201
+
+    for product in mock_multiple_create_product_data:
+        product = client.post("/products", json=product, headers=mock_vendor_token_data)
+
+        assert product.status_code == 201
+
+    # prefix of a tag shared by both products
+    search = client.get("/products/search?q=eco")
+
+    assert search.status_code == 200
+    assert search.json["success"] is True
+    assert len(search.json["products"]) == 2
+    assert search.json["pagination"]["has_next"] is False
+
+    # all terms must match, name and tag
+    search = client.get("/products/search?q=testproduct handm")
+
+    assert [product["name"] for product in search.json["products"]] == ["testproduct 1"]
+
+    # sustainability attribute names are indexed too
+    search = client.get("/products/search?q=organic&per_page=1")
+
+    assert len(search.json["products"]) == 1
+    assert search.json["pagination"]["has_next"] is True
+
+    search = client.get("/products/search?q=nothing")
+
+    assert search.status_code == 200
+    assert search.json["products"] == []
+
+
+def test_search_products_index_updated_and_ranked(
+    client,
+    mock_multiple_create_product_data,
+    mock_vendor_token_data,
+    mock_vendor_data,
+    approved_vendor_profile_inject,
+    roles_data_inject,
+):
+    register_vendor = client.post("/auth/register", json=mock_vendor_data)
+
+    assert register_vendor.status_code == 201
+
+    for product in mock_multiple_create_product_data:
+        product = client.post("/products", json=product, headers=mock_vendor_token_data)
+
+        assert product.status_code == 201
+
+    # product 2 only mentions handmade in its description, product 1 has it as a tag
+    product = client.put(
+        "/products/2",
+        json={"description": "handmade in small batches"},
+        headers=mock_vendor_token_data,
+    )
+
+    assert product.status_code == 200
+
+    search = client.get("/products/search?q=handmade")
+
+    assert [product["id"] for product in search.json["products"]] == [1, 2]
+
+    # renamed product is found by its new name only
+    product = client.put(
+        "/products/1", json={"name": "bamboo brush"}, headers=mock_vendor_token_data
+    )
+
+    assert product.status_code == 200
+
+    search = client.get("/products/search?q=bamboo")
+
+    assert [product["id"] for product in search.json["products"]] == [1]
+
+    search = client.get("/products/search?q=testproduct")
+
+    assert [product["id"] for product in search.json["products"]] == [2]
+
+    # archived products are not returned
+    product = client.delete("/products/1", headers=mock_vendor_token_data)
+
+    assert product.status_code == 200
+
+    search = client.get("/products/search?q=bamboo")
+
+    assert search.json["products"] == []
+
+
+def test_search_products_invalid_query(client, roles_data_inject):
+    search = client.get("/products/search?q=%20%21")
+
+    assert search.status_code == 400
+    assert search.json["success"] is False
+    assert search.json["location"] == "view search products request validation"
+
+    search = client.get("/products/search")
+
+    assert search.status_code == 400
+    assert search.json["location"] == "view search products request validation"
+
+
 # ---------------------------------------------------------------------------- Get product details Tests ----------------------------------------------------------------------------
 
 
@@ -399,6 +909,117 @@ def test_get_product_details_repo_error(client, roles_data_inject):
     assert product.json["location"] == "view get product detail repo"
 
 
+def test_get_product_details_applies_pending_rating_changes(
+    client,
+    db,
+    mock_product_review_data,
+    mock_token_data,
+    mock_user_data,
+    products_data_inject,
+    roles_data_inject,
+):
+    register_user = client.post("/auth/register", json=mock_user_data)
+
+    assert register_user.status_code == 201
+
+    reconcile_rating_stats_repo()
+
+    product_review = client.post(
+        "/review", json=mock_product_review_data, headers=mock_token_data
+    )
+
+    assert product_review.status_code == 201
+
+    product = client.get("/products/1")
+
+    assert product.status_code == 200
+    assert product.json["product"]["review_count"] == 1
+    assert product.json["product"]["average_rating"] == 5.0
+    assert has_pending_rating_deltas_repo(1) is False
+
+
+def test_get_product_details_cost_independent_of_review_count(
+    client, db, query_counter, products_data_inject, roles_data_inject
+):
+    def detail_query_count():
+        query_counter.count = 0
+        query_counter.statements = []
+        product = client.get("/products/1")
+
+        assert product.status_code == 200
+        return query_counter.count
+
+    db.session.add(models.ProductReview(product_id=1, user_id=1, rating=4))
+    db.session.commit()
+
+    few_reviews = detail_query_count()
+
+    db.session.add_all(
+        [models.ProductReview(product_id=1, user_id=1, rating=4) for _ in range(200)]
+    )
+    db.session.commit()
+
+    # reviews are never loaded on the read path
+    assert detail_query_count() == few_reviews
+    assert not any("FROM product_reviews" in statement for statement in query_counter.statements)
+
+
+def test_get_product_details_cached(
+    client, db, query_counter, products_data_inject, roles_data_inject
+):
+    product = client.get("/products/1")
+
+    assert product.status_code == 200
+    assert product_detail_cache.stats()["misses"] == 1
+
+    query_counter.count = 0
+    cached_product = client.get("/products/1")
+
+    assert cached_product.json == product.json
+    assert query_counter.count == 0
+    assert product_detail_cache.stats()["hits"] == 1
+
+
+def test_get_product_details_cache_invalidated_on_write(
+    client,
+    db,
+    mock_product_review_data,
+    mock_token_data,
+    mock_user_data,
+    products_data_inject,
+    roles_data_inject,
+):
+    register_user = client.post("/auth/register", json=mock_user_data)
+
+    assert register_user.status_code == 201
+
+    reconcile_rating_stats_repo()
+
+    assert client.get("/products/1").json["product"]["review_count"] == 0
+
+    # review flush drops the cached entry
+    product_review = client.post(
+        "/review", json=mock_product_review_data, headers=mock_token_data
+    )
+
+    assert product_review.status_code == 201
+    assert client.get("/products/1").json["product"]["review_count"] == 1
+
+    # image and product column changes drop it as well
+    db.session.add(
+        models.ProductImage(product_id=1, image_url="https://example.com/new.jpg")
+    )
+    db.session.commit()
+
+    assert "new.jpg" in client.get("/products/1").json["product"]["images"]
+
+    product = db.session.get(models.Product, 1)
+    product.name = "Renamed product"
+    db.session.commit()
+
+    assert client.get("/products/1").json["product"]["name"] == "Renamed product"
+
+
 # ---------------------------------------------------------------------------- Update product details Tests ----------------------------------------------------------------------------
 
 
@@ -435,6 +1056,9 @@ def test_update_product_details(
     assert len(tags) == 2
     assert len(sustainability_attributes) == 2
 
+    # the product keeps a copy of the new primary image
+    assert db.session.get(models.Product, 1).primary_image_url == mock_update_product_data["primary_image_url"]
+
 
 def test_update_product_name_validation_error(
     client,
@@ -731,6 +1355,107 @@ def test_update_product_not_vendor(
     assert product.json["location"] == "view update product repo"
 
 
+# ---------------------------------------------------------------------------- Bulk update product Tests ----------------------------------------------------------------------------
+
+
+def test_bulk_update_products(
+    client,
+    db,
+    mock_vendor_data,
+    mock_vendor_token_data,
+    approved_vendor_profile_inject,
+    products_data_inject,
+    roles_data_inject,
+    query_counter,
+):
+    register_vendor = client.post("/auth/register", json=mock_vendor_data)
+
+    assert register_vendor.status_code == 201
+
+    # cached before the update
+    client.get("/products/1")
+
+    query_counter.statements.clear()
+    update_products = client.patch(
+        "/products/bulk",
+        json={
+            "products": [
+                {"product_id": 1, "stock_quantity": 3, "price": "9.50"},
+                {"product_id": 2, "is_active": False},
+            ]
+        },
+        headers=mock_vendor_token_data,
+    )
+
+    assert update_products.status_code == 200
+    assert update_products.json["success"] is True
+    assert update_products.json["updated"] == 2
+
+    # ownership and the update itself cost one statement each for the whole batch
+    assert sum("FROM products" in statement for statement in query_counter.statements) == 1
+    assert sum(statement.startswith("UPDATE products") for statement in query_counter.statements) == 1
+
+    db.session.expire_all()
+    product_1 = db.session.get(models.Product, 1)
+    product_2 = db.session.get(models.Product, 2)
+
+    assert (product_1.stock_quantity, float(product_1.price), product_1.is_active) == (3, 9.5, True)
+    assert (product_2.stock_quantity, float(product_2.price), product_2.is_active) == (5, 19.99, False)
+
+    # cached detail is dropped
+    product = client.get("/products/1")
+
+    assert product.json["product"]["stock_quantity"] == 3
+
+
+def test_bulk_update_products_not_owned(
+    client,
+    db,
+    mock_vendor_data,
+    mock_vendor_token_data,
+    approved_vendor_profile_inject,
+    products_data_different_vendors_inject,
+    roles_data_inject,
+):
+    register_vendor = client.post("/auth/register", json=mock_vendor_data)
+
+    assert register_vendor.status_code == 201
+
+    update_products = client.patch(
+        "/products/bulk",
+        json={
+            "products": [
+                {"product_id": 1, "stock_quantity": 0},
+                {"product_id": 2, "stock_quantity": 0},
+                {"product_id": 99, "stock_quantity": 0},
+            ]
+        },
+        headers=mock_vendor_token_data,
+    )
+
+    assert update_products.status_code == 404
+    assert update_products.json["product_ids"] == [2, 99]
+
+    # nothing of the batch is applied
+    assert db.session.get(models.Product, 1).stock_quantity == 10
+
+
+def test_bulk_update_products_validation_error(
+    client, mock_vendor_data, mock_vendor_token_data, approved_vendor_profile_inject, roles_data_inject
+):
+    register_vendor = client.post("/auth/register", json=mock_vendor_data)
+
+    assert register_vendor.status_code == 201
+
+    for products in ([{"product_id": 1}], [{"product_id": 1, "stock_quantity": -1}], []):
+        update_products = client.patch(
+            "/products/bulk", json={"products": products}, headers=mock_vendor_token_data
+        )
+
+        assert update_products.status_code == 400
+        assert update_products.json["location"] == "view bulk update products request validation"
+
+
 # ----------------------------------------------------------------------------  Delete product test ----------------------------------------------------------------------------
 
 
@@ -802,6 +1527,45 @@ def test_get_category(client, category_data_inject, roles_data_inject):
     assert category.json["success"] is True
 
 
+def test_get_category_tree_single_query_and_cached(
+    client, category_data_inject, roles_data_inject, db, query_counter
+):
+    # third level and an archived branch
+    db.session.add_all(
+        [
+            models.ProductCategory(id=3, name="category3", parent_category_id=2),
+            models.ProductCategory(id=4, name="category4", parent_category_id=1, is_active=False),
+        ]
+    )
+    db.session.commit()
+
+    query_counter.count = 0
+    category = client.get("/products/category")
+
+    assert category.status_code == 200
+    assert query_counter.count == 1
+
+    top_categories = category.json["data"]["categories"]
+
+    assert [top_category["id"] for top_category in top_categories] == [1]
+    assert [sub["id"] for sub in top_categories[0]["subcategories"]] == [2]
+    assert top_categories[0]["subcategories"][0]["subcategories"][0]["id"] == 3
+
+    # served from the cache until a category is written
+    query_counter.count = 0
+    category = client.get("/products/category")
+
+    assert category.json["data"]["categories"] == top_categories
+    assert query_counter.count == 0
+
+    db.session.add(models.ProductCategory(id=5, name="category5"))
+    db.session.commit()
+
+    category = client.get("/products/category")
+
+    assert [top_category["id"] for top_category in category.json["data"]["categories"]] == [1, 5]
+
+
 def test_get_category_by_id(client, category_data_inject, roles_data_inject):
     category = client.get("/products/category/1")
 
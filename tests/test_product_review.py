@@ -1,3 +1,6 @@
+import models
+from repo.product_review import apply_rating_deltas_repo, reconcile_rating_stats_repo
+
 # uv run pytest -v -s --cov=.
 # uv run pytest tests/test_product_review.py -v -s --cov=. --cov-report term-missing
 
@@ -169,3 +172,119 @@ def test_delete_product_review_by_id_not_found(
 
 # router\product_review.py          35      0   100%
 # repo\product_review.py            26      0   100%
+
+
+# ---------------------------------------------------------------------------- Rating Stats Tests ----------------------------------------------------------------------------
+
+
+def test_review_changes_apply_rating_deltas(
+    client,
+    db,
+    mock_product_review_data,
+    mock_token_data,
+    mock_user_data,
+    roles_data_inject,
+    products_data_inject,
+):
+    register_user = client.post("/auth/register", json=mock_user_data)
+
+    assert register_user.status_code == 201
+
+    # start from stats matching the (empty) reviews table
+    reconcile_rating_stats_repo()
+
+    for rating in (5, 3):
+        mock_product_review_data["rating"] = rating
+        product_review = client.post(
+            "/review", json=mock_product_review_data, headers=mock_token_data
+        )
+
+        assert product_review.status_code == 201
+
+    edit_review = client.put(
+        "/review/2/edit", json={"rating": 4}, headers=mock_token_data
+    )
+
+    assert edit_review.status_code == 200
+
+    # one delta per review change
+    assert len(db.session.execute(db.select(models.ProductRatingDelta)).scalars().all()) == 3
+
+    assert apply_rating_deltas_repo() == 3
+
+    product = db.session.get(models.Product, 1)
+    db.session.refresh(product)
+
+    assert product.review_count == 2
+    assert product.rating_sum == 9
+    assert float(product.average_rating) == 4.5
+    assert db.session.execute(db.select(models.ProductRatingDelta)).scalars().all() == []
+
+    # untouched product keeps its stats
+    assert db.session.get(models.Product, 2).review_count == 0
+
+    delete_review = client.delete("/review/1/delete", headers=mock_token_data)
+
+    assert delete_review.status_code == 200
+
+    apply_rating_deltas_repo()
+    db.session.refresh(product)
+
+    assert product.review_count == 1
+    assert float(product.average_rating) == 4.0
+
+
+def test_apply_rating_deltas_claims_by_delete(
+    client, db, roles_data_inject, products_data_inject, query_counter
+):
+    from repo.product_review import add_rating_delta_repo
+
+    reconcile_rating_stats_repo()
+
+    for rating in (5, 4, 3):
+        add_rating_delta_repo(1, 1, rating)
+    db.session.commit()
+
+    # small batches claim disjoint deltas, each one is counted once
+    query_counter.statements.clear()
+    applied = [apply_rating_deltas_repo(batch_size=2) for _ in range(3)]
+
+    assert applied == [2, 1, 0]
+    # deltas are taken with DELETE ... RETURNING, never read first and deleted later
+    assert not any(
+        statement.startswith("SELECT") and "product_rating_deltas" in statement
+        for statement in query_counter.statements
+    )
+
+    product = db.session.get(models.Product, 1)
+    db.session.refresh(product)
+
+    assert product.review_count == 3
+    assert product.rating_sum == 12
+    assert float(product.average_rating) == 4.0
+
+
+def test_apply_rating_deltas_nothing_pending(client, db, roles_data_inject):
+    assert apply_rating_deltas_repo() == 0
+
+
+def test_reconcile_rating_stats(
+    client,
+    db,
+    roles_data_inject,
+    products_data_inject,
+    product_review_data_inject,
+):
+    # injected products claim 5 and 3 reviews, only product 1 has a single review
+    reconcile_rating_stats_repo()
+
+    product_1 = db.session.get(models.Product, 1)
+    product_2 = db.session.get(models.Product, 2)
+    db.session.refresh(product_1)
+    db.session.refresh(product_2)
+
+    assert product_1.review_count == 1
+    assert product_1.rating_sum == 5
+    assert float(product_1.average_rating) == 5.0
+    assert product_2.review_count == 0
+    assert float(product_2.average_rating) == 0.0
@@ -1,5 +1,11 @@
 # test with products and review inject
 # test route /task-status
+from datetime import timedelta
+import threading
+import time
+import pytest
+from models.scheduled_job import ScheduledJob
+from scheduled.scheduler import Scheduler, utc_now
 
 # uv run pytest -v -s --cov=.
 # uv run pytest tests/test_scheduled.py -v -s --cov=. --cov-report term-missing
@@ -24,4 +30,177 @@ def test_scheduled_job(
     task_status = client.get("/task-status", headers=mock_token_data)
 
     assert task_status.status_code == 200
-    assert task_status.json["status"] == "running"
+    # the testing config does not run the jobs in the web process
+    assert task_status.json["status"] == "stopped"
+    assert task_status.json["scheduler"]["embedded"] is False
+
+    # jobs registered by a scheduler run show up with their history
+    scheduler = client.application.extensions["scheduler"]
+    scheduler.run_pending()
+
+    task_status = client.get("/task-status", headers=mock_token_data)
+    jobs = {job["name"]: job for job in task_status.json["jobs"]}
+
+    assert set(jobs) == set(scheduler.jobs)
+    assert jobs["apply_rating_deltas"]["run_count"] == 0
+
+
+def make_due(db, name):
+    db.session.execute(
+        db.update(ScheduledJob)
+        .where(ScheduledJob.name == name)
+        .values(next_run_at=utc_now() - timedelta(seconds=1))
+    )
+    db.session.commit()
+
+
+def scheduled_job(db, name):
+    db.session.expire_all()
+    return db.session.get(ScheduledJob, name)
+
+
+def test_scheduled_job_runs_in_one_process(test_app, db):
+    runs = []
+
+    # two processes with the same jobs
+    schedulers = [Scheduler(test_app), Scheduler(test_app)]
+    for scheduler in schedulers:
+        scheduler.add_job("count", lambda app: runs.append(1), interval=60)
+
+    # nothing is due until an interval after registration
+    assert [scheduler.run_pending() for scheduler in schedulers] == [[], []]
+
+    make_due(db, "count")
+
+    assert [scheduler.run_pending() for scheduler in schedulers] == [["count"], []]
+
+    schedulers[0].join()
+
+    assert len(runs) == 1
+
+    job = scheduled_job(db, "count")
+
+    assert job.run_count == 1
+    assert job.last_status == "succeeded"
+    assert job.owner is None
+    assert job.next_run_at >= utc_now() + timedelta(seconds=59)
+
+
+def test_scheduled_job_lease_held(test_app, db):
+    scheduler = Scheduler(test_app)
+    scheduler.add_job("count", lambda app: None, interval=60)
+    scheduler.run_pending()
+
+    make_due(db, "count")
+
+    # another process is still running it
+    db.session.execute(
+        db.update(ScheduledJob)
+        .where(ScheduledJob.name == "count")
+        .values(owner="other", lease_until=utc_now() + timedelta(seconds=30))
+    )
+    db.session.commit()
+
+    assert scheduler.run_pending() == []
+
+    # an expired lease is taken over
+    db.session.execute(
+        db.update(ScheduledJob)
+        .where(ScheduledJob.name == "count")
+        .values(lease_until=utc_now() - timedelta(seconds=1))
+    )
+    db.session.commit()
+
+    assert scheduler.run_pending() == ["count"]
+
+    scheduler.join()
+
+
+@pytest.mark.parametrize(
+    "func, timeout, status",
+    [
+        (lambda app: 1 / 0, None, "failed"),
+        (lambda app: time.sleep(0.5), 0.05, "timeout"),
+    ],
+)
+def test_scheduled_job_failure_recorded(test_app, db, func, timeout, status):
+    scheduler = Scheduler(test_app)
+    scheduler.add_job("broken", func, interval=60, timeout=timeout)
+    scheduler.run_pending()
+
+    make_due(db, "broken")
+
+    assert scheduler.run_pending() == ["broken"]
+
+    scheduler.join()
+    job = scheduled_job(db, "broken")
+
+    assert job.last_status == status
+    assert job.failure_count == 1
+    assert job.last_failed_at is not None
+    assert job.last_error
+
+
+def test_scheduled_job_lease_renewed_past_timeout(test_app, db):
+    release = threading.Event()
+
+    schedulers = [Scheduler(test_app), Scheduler(test_app)]
+    for scheduler in schedulers:
+        scheduler.add_job("slow", lambda app: release.wait(5), interval=60, timeout=0.05)
+    schedulers[0].run_pending()
+
+    make_due(db, "slow")
+
+    assert schedulers[0].run_pending() == ["slow"]
+
+    # well past the timeout, the run still holds its lease
+    time.sleep(0.2)
+    make_due(db, "slow")
+
+    assert schedulers[1].run_pending() == []
+    assert schedulers[0].run_pending() == []
+    assert scheduled_job(db, "slow").owner == schedulers[0].owner
+
+    release.set()
+    schedulers[0].join()
+    job = scheduled_job(db, "slow")
+
+    assert job.owner is None
+    assert job.last_status == "timeout"
+
+
+def test_scheduled_jobs_run_in_parallel(test_app, db):
+    release = threading.Event()
+    runs = []
+
+    scheduler = Scheduler(test_app)
+    scheduler.add_job("slow", lambda app: release.wait(5), interval=60)
+    scheduler.add_job("count", lambda app: runs.append(1), interval=60)
+    scheduler.run_pending()
+
+    make_due(db, "slow")
+    make_due(db, "count")
+
+    assert scheduler.run_pending() == ["slow", "count"]
+
+    # the short job is done while the long one is still going
+    scheduler._running_jobs["count"].join(5)
+
+    assert runs == [1]
+    assert scheduler._running_jobs["slow"].is_alive()
+
+    release.set()
+    scheduler.join()
+
+
+def test_scheduled_job_idle_poll(test_app, db, query_counter):
+    scheduler = Scheduler(test_app, poll_interval=5, max_poll_interval=600)
+    scheduler.add_job("count", lambda app: None, interval=60)
+    scheduler.run_pending()
+
+    # nothing due: one read, no lease writes, and the next poll waits for the job
+    query_counter.count = 0
+
+    assert scheduler.run_pending() == []
+    assert query_counter.count == 1
+    assert scheduler.next_poll_at >= utc_now() + timedelta(seconds=55)
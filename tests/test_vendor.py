@@ -488,6 +488,80 @@ def test_get_vendor_products(
     assert len(get_vendor_products.json["products"]) == 2
 
 
+def test_get_vendor_products_children_loaded_in_batch(
+    client,
+    mock_user_data,
+    mock_token_data,
+    approved_vendor_profile_inject,
+    products_data_inject,
+    roles_data_inject,
+    query_counter,
+):
+    register_user = client.post("/auth/register", json=mock_user_data)
+
+    assert register_user.status_code == 201
+
+    # images, tags and attributes cost one statement each for the whole page
+    query_counts = []
+
+    # warm the identity cache so both pages authenticate the same way
+    client.get("/vendor/products", headers=mock_token_data)
+
+    for per_page in (1, 2):
+        query_counter.count = 0
+        get_vendor_products = client.get(
+            f"/vendor/products?page=1&per_page={per_page}", headers=mock_token_data
+        )
+
+        assert get_vendor_products.status_code == 200
+        assert len(get_vendor_products.json["products"]) == per_page
+        query_counts.append(query_counter.count)
+
+    assert query_counts[0] == query_counts[1]
+
+
+def test_vendor_required_from_token_claims(
+    client,
+    db,
+    mock_user_data,
+    mock_login_data,
+    mock_vendor_apply_data,
+    mock_token_data,
+    roles_data_inject,
+    query_counter,
+):
+    from models.user import VendorProfile
+
+    register_user = client.post("/auth/register", json=mock_user_data)
+
+    assert register_user.status_code == 201
+
+    apply_vendor = client.post(
+        "/vendor/apply", json=mock_vendor_apply_data, headers=mock_token_data
+    )
+
+    assert apply_vendor.status_code == 201
+
+    login_user = client.post("/auth/login", json=mock_login_data)
+    headers = {"Authorization": f"Bearer {login_user.json['access_token']}"}
+
+    # vendor status comes from the token claims
+    query_counter.statements.clear()
+    get_vendor_stats = client.get("/vendor/stats", headers=headers)
+
+    assert get_vendor_stats.status_code == 403
+    assert get_vendor_stats.json["status"] == "pending"
+    assert not any("FROM vendor_profiles" in statement for statement in query_counter.statements)
+
+    # approval takes effect for tokens issued before it
+    db.session.get(VendorProfile, 1).vendor_status = "approved"
+    db.session.commit()
+
+    get_vendor_stats = client.get("/vendor/stats", headers=headers)
+
+    assert get_vendor_stats.status_code == 200
+
+
 # ----------------------------------------------------------------------------- Get vendor stats -----------------------------------------------------------
 
 def test_get_vendor_stats(
@@ -517,6 +591,183 @@ def test_get_vendor_stats(
     assert len(vendor_stats["monthly_orders"]) == 1
 
 
+def test_get_vendor_stats_from_rollups(
+    client,
+    mock_user_data,
+    mock_token_data,
+    mock_checkout_data,
+    approved_vendor_profile_inject,
+    cart_data_inject,
+    cart_item_data_inject,
+    products_data_inject,
+    roles_data_inject,
+    query_counter,
+):
+    register_user = client.post("/auth/register", json=mock_user_data)
+
+    assert register_user.status_code == 201
+
+    # the first read builds the rollups from the (empty) order history
+    get_vendor_stats = client.get("/vendor/stats", headers=mock_token_data)
+
+    assert get_vendor_stats.json["vendor_stats"]["total_orders"] == 0
+
+    mock_checkout_data.pop("promotion_code")
+    checkout_order = client.post("/order/checkout", json=mock_checkout_data, headers=mock_token_data)
+
+    assert checkout_order.status_code == 201
+
+    # checkout updated the rollups, stats no longer read order history
+    query_counter.statements.clear()
+    get_vendor_stats = client.get("/vendor/stats", headers=mock_token_data)
+    vendor_stats = get_vendor_stats.json["vendor_stats"]
+
+    assert not any("order_items" in statement for statement in query_counter.statements)
+    assert vendor_stats["total_orders"] == 1
+    assert vendor_stats["total_sales"] == 2
+    assert vendor_stats["total_revenue"] == 21.98
+    assert vendor_stats["total_customers"] == 1
+    assert vendor_stats["monthly_revenue"][0]["total_revenue"] == 21.98
+
+    # a cancelled order leaves the sales
+    cancel_order = client.put(
+        f"/order/{checkout_order.json['order']['order_number']}",
+        json={"status": "cancelled"},
+        headers=mock_token_data,
+    )
+
+    assert cancel_order.status_code == 200
+
+    vendor_stats = client.get("/vendor/stats", headers=mock_token_data).json["vendor_stats"]
+
+    assert vendor_stats["total_orders"] == 0
+    assert vendor_stats["total_revenue"] == 0.0
+    assert vendor_stats["monthly_revenue"] == []
+
+
+def test_vendor_sales_first_checkout_race(
+    client,
+    db,
+    monkeypatch,
+    mock_user_data,
+    mock_token_data,
+    mock_checkout_data,
+    approved_vendor_profile_inject,
+    cart_data_inject,
+    cart_item_data_inject,
+    products_data_inject,
+    roles_data_inject,
+):
+    import repo.vendor_sales as vendor_sales
+    from instance.database import dialect_insert
+    from models.order import VendorSalesRollup
+    from shared.time import now
+
+    register_user = client.post("/auth/register", json=mock_user_data)
+
+    assert register_user.status_code == 201
+
+    backfill_vendor_sales_repo = vendor_sales.backfill_vendor_sales_repo
+
+    def backfill_after_concurrent_checkout(vendor_id):
+        # another first checkout of the vendor backfilled first, without this order's lines
+        db.session.execute(
+            dialect_insert(VendorSalesRollup).on_conflict_do_nothing(),
+            [
+                vendor_sales.empty_rollup(vendor_id, period, period_start)
+                for period, period_start in vendor_sales.rollup_periods(now().date())
+            ],
+        )
+        return backfill_vendor_sales_repo(vendor_id)
+
+    monkeypatch.setattr(vendor_sales, "backfill_vendor_sales_repo", backfill_after_concurrent_checkout)
+
+    mock_checkout_data.pop("promotion_code")
+    checkout_order = client.post("/order/checkout", json=mock_checkout_data, headers=mock_token_data)
+
+    assert checkout_order.status_code == 201
+
+    monkeypatch.undo()
+
+    # the losing backfill was dropped, the order is still added to the rows
+    vendor_stats = client.get("/vendor/stats", headers=mock_token_data).json["vendor_stats"]
+
+    assert vendor_stats["total_orders"] == 1
+    assert vendor_stats["total_revenue"] == 21.98
+
+
+def test_reconcile_vendor_sales(
+    client,
+    db,
+    mock_user_data,
+    mock_token_data,
+    approved_vendor_profile_inject,
+    order_data_inject,
+    order_item_data_inject,
+    roles_data_inject,
+    query_counter,
+):
+    from datetime import date, datetime
+    from models.order import Order, OrderItem, VendorSalesRollup
+    from repo.vendor_sales import reconcile_vendor_sales_repo, vendor_sales_history_repo
+    from shared.time import now
+
+    register_user = client.post("/auth/register", json=mock_user_data)
+
+    assert register_user.status_code == 201
+
+    get_vendor_stats = client.get("/vendor/stats", headers=mock_token_data)
+
+    assert get_vendor_stats.json["vendor_stats"]["total_orders"] == 2
+
+    # order lines written around the rollups, today and in an earlier year
+    last_year = now().year - 1
+    old_order = Order(
+        user_id=1,
+        order_number="OLD0001",
+        status="delivered",
+        total_amount=7,
+        created_at=datetime(last_year, 6, 15, 12),
+    )
+    db.session.add(old_order)
+    db.session.flush()
+
+    db.session.add_all(
+        [
+            OrderItem(order_id=1, product_id=1, quantity=1, unit_price=5, total_price=5, vendor_id=1),
+            OrderItem(order_id=old_order.id, product_id=1, quantity=1, unit_price=7, total_price=7, vendor_id=1),
+        ]
+    )
+    db.session.commit()
+
+    # lifetime and every month of the year in one statement
+    query_counter.statements.clear()
+    history = vendor_sales_history_repo(1, now().year)
+
+    assert len(query_counter.statements) == 1
+    assert history["lifetime"]["order_count"] == 4
+    assert history["months"][now().month]["revenue"] == 35
+    assert history["first_sale_at"].year == last_year
+
+    assert reconcile_vendor_sales_repo(now().year) == 1
+
+    vendor_stats = client.get("/vendor/stats", headers=mock_token_data).json["vendor_stats"]
+
+    assert vendor_stats["total_orders"] == 4
+    assert vendor_stats["total_revenue"] == 42.0
+    assert vendor_stats["monthly_orders"] == [{"month": now().month, "total_orders": 3}]
+
+    # day rows and months of earlier years are corrected as well
+    rollups = {
+        (rollup.period, rollup.period_start): rollup.order_count
+        for rollup in db.session.execute(db.select(VendorSalesRollup)).scalars()
+    }
+
+    assert rollups[("day", now().date())] == 3
+    assert rollups[("day", date(last_year, 6, 15))] == 1
+    assert rollups[("month", date(last_year, 6, 1))] == 1
+
+
 # ----------------------------------------------------------------------------- Get vendor recent orders -----------------------------------------------------------
 
 
@@ -544,7 +795,101 @@ def test_get_vendor_recent_orders(
     assert len(recent_orders[0]) == 9
 
 
+def test_get_vendor_recent_orders_load_more(
+    client,
+    mock_user_data,
+    mock_token_data,
+    products_data_inject,
+    approved_vendor_profile_inject,
+    order_data_inject,
+    order_item_data_inject,
+    roles_data_inject,
+    query_counter,
+):
+    register_user = client.post("/auth/register", json=mock_user_data)
+
+    assert register_user.status_code == 201
+
+    query_counter.statements.clear()
+    first_page = client.get("/vendor/recent-orders?limit=1", headers=mock_token_data)
+
+    # the latest line is picked before anything is grouped or joined
+    assert not any("GROUP BY" in statement for statement in query_counter.statements)
+    assert first_page.json["has_next"] is True
+    assert [order["qty"] for order in first_page.json["recent_orders"]] == [1]
+
+    next_page = client.get(
+        f"/vendor/recent-orders?limit=1&after={first_page.json['next_cursor']}", headers=mock_token_data
+    )
+
+    assert next_page.json["has_next"] is False
+    assert next_page.json["next_cursor"] is None
+    assert [order["qty"] for order in next_page.json["recent_orders"]] == [2]
+
+    invalid_limit = client.get("/vendor/recent-orders?limit=0", headers=mock_token_data)
+
+    assert invalid_limit.status_code == 400
+
+
 # repo 41-53 in admin
 # repo 57-65 in admin
 
-# views\vendor.py               53     11    79%   65-66, 105-107, 141-142, 165-166, 202-203
\ No newline at end of file
+# views\vendor.py               53     11    79%   65-66, 105-107, 141-142, 165-166, 202-203
+
+# ----------------------------------------------------------------------------- Export vendor orders -----------------------------------------------------------
+
+
+def test_export_vendor_orders(
+    client,
+    mock_user_data,
+    mock_token_data,
+    approved_vendor_profile_inject,
+    order_data_inject,
+    order_item_data_inject,
+    products_data_inject,
+    roles_data_inject,
+):
+    import csv
+    import gzip
+    import io
+    import json
+
+    register_user = client.post("/auth/register", json=mock_user_data)
+
+    assert register_user.status_code == 201
+
+    export_csv = client.get("/vendor/orders/export", headers=mock_token_data)
+    rows = list(csv.DictReader(io.StringIO(export_csv.get_data(as_text=True))))
+
+    assert export_csv.status_code == 200
+    assert export_csv.mimetype == "text/csv"
+    assert [row["order_line_id"] for row in rows] == ["1", "2"]
+    assert rows[0]["total_price"] == "20.00"
+
+    # resume behind the first row
+    export_ndjson = client.get(
+        f"/vendor/orders/export?format=ndjson&after={rows[0]['cursor']}", headers=mock_token_data
+    )
+    lines = [json.loads(line) for line in export_ndjson.get_data(as_text=True).splitlines()]
+
+    assert export_ndjson.mimetype == "application/x-ndjson"
+    assert [line["order_line_id"] for line in lines] == [2]
+
+    # compressed while streaming
+    export_gzip = client.get(
+        "/vendor/orders/export?format=ndjson",
+        headers={**mock_token_data, "Accept-Encoding": "gzip"},
+    )
+
+    assert export_gzip.headers["Content-Encoding"] == "gzip"
+    assert len(gzip.decompress(export_gzip.data).splitlines()) == 2
+
+    # nothing ordered in the range
+    export_range = client.get("/vendor/orders/export?from=2000-01-01&to=2000-02-01", headers=mock_token_data)
+
+    assert len(export_range.get_data(as_text=True).splitlines()) == 1
+
+    invalid_format = client.get("/vendor/orders/export?format=xml", headers=mock_token_data)
+
+    assert invalid_format.status_code == 400
+    assert invalid_format.json["location"] == "view export vendor orders request validation"
@@ -1,7 +1,8 @@
-from flask import jsonify
+from flask import current_app, jsonify
 from flask_jwt_extended import current_user
 from models.article import Article
 from pydantic import ValidationError
+from instance.cache import caches
 from instance.database import db
 from models.user import VendorStatus
 from repo.admin import (
@@ -10,8 +11,9 @@ from repo.admin import (
     create_article_repo,
     create_category_repo,
     get_article_by_id_repo,
-    soft_delete_category_repo,
+    soft_delete_category_tree_repo,
     update_category_repo,
+    get_admin_logs_cursor_page_repo,
     get_admin_logs_repo,
     create_promotion_repo,
     update_promotion_repo,
@@ -24,6 +26,7 @@ from repo.vendor import (
     vendor_profile_by_user_id_repo,
 )
 from schemas.admin import (
+    AdminLogFilters,
     AdminLogsResponse,
     CategoryCreate,
     CategoryCreateResponse,
@@ -130,7 +133,7 @@ def update_category_view(category_request, category_id):
 
 def soft_delete_category_view(category_id):
     try:
-        soft_delete_category_tree(category_id)
+        soft_delete_category_tree_repo(category_id)
 
         return jsonify(
             {
@@ -150,16 +153,6 @@ def soft_delete_category_view(category_id):
         ), 500
 
 
-def soft_delete_category_tree(category_id):
-    # Recursively soft delete category tree structure
-    category = soft_delete_category_repo(category_id)
-
-    # soft delete its sub categories as well
-    if category.subcategories:
-        for sub_category in category.subcategories:
-            soft_delete_category_tree(sub_category.id)
-
-
 # ------------------------------------------------------ Get all vendors ---------------------------------------------------
 
 
@@ -283,27 +276,56 @@ def review_vendor_application_view(user_id, review_request):
 # ------------------------------------------------------ Get admin logs ---------------------------------------------------
 
 
-def get_admin_logs_view():
+def get_admin_logs_view(request_args):
     try:
-        logs = get_admin_logs_repo()
-
-        logs_response = [
-            AdminLogsResponse.model_validate(log).model_dump() for log in logs.items
-        ]
+        log_filters_validated = AdminLogFilters.model_validate(
+            request_args.to_dict(flat=False)
+        )
 
+    except ValidationError as e:
         return jsonify(
             {
+                "message": str(e),
+                "success": False,
+                "location": "view get admin logs request validation",
+            }
+        ), 400
+
+    try:
+        # entries still queued are written first so the admin sees their own actions
+        current_app.extensions["audit_log"].flush()
+
+        # keyset pagination, newest first and without a total count
+        if log_filters_validated.pagination == "cursor":
+            logs_page = get_admin_logs_cursor_page_repo(log_filters_validated)
+
+            logs_response = {
+                "success": True,
+                "message": "Admin logs fetched successfully",
+                "pagination": {
+                    "next_cursor": logs_page["next_cursor"],
+                    "has_next": logs_page["has_next"],
+                    "per_page": logs_page["per_page"],
+                },
+                "logs": serialize_admin_logs(logs_page["logs"]),
+            }
+
+        else:
+            logs = get_admin_logs_repo(log_filters_validated)
+
+            logs_response = {
+                "success": True,
+                "message": "Admin logs fetched successfully",
                 "pagination": {
                     "total": logs.total,
                     "pages": logs.pages,
                     "current_page": logs.page,
                     "per_page": logs.per_page,
                 },
-                "success": True,
-                "message": "Admin logs fetched successfully",
-                "logs": logs_response,
+                "logs": serialize_admin_logs(logs.items),
             }
-        ), 200
+
+        return jsonify(logs_response), 200
 
     except Exception as e:
         db.session.rollback()
@@ -316,6 +338,23 @@ def get_admin_logs_view():
         ), 500
 
 
+def serialize_admin_logs(logs):
+    return [AdminLogsResponse.model_validate(log).model_dump() for log in logs]
+
+
+# ------------------------------------------------------ Get cache stats ---------------------------------------------------
+
+
+def get_cache_stats_view():
+    return jsonify(
+        {
+            "success": True,
+            "message": "Cache stats fetched successfully",
+            "caches": {name: cache.stats() for name, cache in caches.items()},
+        }
+    ), 200
+
+
 # ------------------------------------------------------ Create Promotions --------------------------------------------------
 
 
@@ -5,6 +5,19 @@ from instance.database import db
 from repo.user import register_user_repo, update_last_login_repo, user_by_email_repo
 from schemas.auth import UserProfileResponse, UserRegisterRequest, UserLoginRequest
 
+def access_token_claims(user):
+    return {
+        "username": user.username,
+        "email": user.email,
+        # authorization claims, trusted by admin_required / vendor_required while authz_version is current
+        "authz_version": user.authz_version,
+        "roles": [role.name for role in user.role],
+        "is_admin": user.admin_profile is not None,
+        "admin_access_level": user.admin_profile.access_level if user.admin_profile else None,
+        "vendor_status": user.vendor_profile.vendor_status if user.vendor_profile else None,
+    }
+
+
 # ------------------------------------------------------ Register User --------------------------------------------------
 
 
@@ -76,10 +89,7 @@ def user_login_view(user_request):
     # create access token
     access_token = create_access_token(
         identity=str(user.id),
-        additional_claims={
-            "username": user.username,
-            "email": user.email,
-        },
+        additional_claims=access_token_claims(user),
     )
 
     refresh_token = create_refresh_token(
@@ -118,9 +128,6 @@ def get_user_view(user):
 def refresh_token_view(user):
     access_token = create_access_token(
         identity=str(user.id),
-        additional_claims={
-            "username": user.username,
-            "email": user.email,
-        },
+        additional_claims=access_token_claims(user),
     )
     return jsonify(access_token=access_token), 200
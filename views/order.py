@@ -2,9 +2,9 @@ import uuid
 from flask import json, jsonify
 from pydantic import ValidationError
 from instance.database import db
-from repo.order import add_item_to_shopping_cart_repo, add_order_status_history_repo, apply_promotion_to_order_repo, checkout_order_repo, clear_shopping_cart_item_repo, delete_shopping_cart_item_repo, get_all_orders_repo, get_cart_items_repo, get_cart_with_items_and_product_repo, get_order_repo, get_promotions_repo, get_shopping_cart_repo, pre_checkout_promotion_calculation, process_order_items, update_order_status_repo, update_shopping_cart_item_repo, validate_promotion_repo
-from repo.product import get_product_detail_repo, verify_product_repo
-from schemas.order import AddCartItemResponse, CartResponse, CartItemUpdate, CartItemCreate, OrderCreate, OrderResponse, OrderStatusUpdate
+from repo.order import add_item_to_shopping_cart_repo, add_order_status_history_repo, apply_promotion_to_order_repo, checkout_cart_items_repo, checkout_order_repo, claim_promotion_usage_repo, delete_shopping_cart_item_repo, get_all_orders_repo, get_cart_by_user_id_repo, get_cart_items_repo, get_cart_with_items_and_product_repo, get_order_repo, get_promotions_repo, get_shopping_cart_repo, pre_checkout_promotion_calculation, update_order_status_repo, update_shopping_cart_item_repo, validate_promotion_repo
+from repo.product import get_product_detail_repo
+from schemas.order import AddCartItemResponse, CartResponse, CartItemUpdate, CartItemCreate, OrderCreate, OrderHistoryParams, OrderResponse, OrderStatusUpdate
 from shared.time import now
 
 
@@ -190,11 +190,7 @@ def checkout_order_view(user, order_request):
     try:
         order_data_validated = OrderCreate.model_validate(order_request)
 
-        # get cart with items and product
-        cart = get_cart_with_items_and_product_repo(user.id)
-
-        # save cart items for promotions later
-        cart_items = cart.items
+        cart = get_cart_by_user_id_repo(user.id)
 
         # Generate unique order number
         order_number = generate_order_number()
@@ -202,37 +198,35 @@ def checkout_order_view(user, order_request):
         # Create order
         order = checkout_order_repo(cart, order_data_validated, user.id, order_number)
 
-        # convert cart items to order items
-        for item in cart_items:
-            product = item.product
+        # lock products, decrement stock, convert cart items to order items and empty the cart
+        checkout_issue = checkout_cart_items_repo(order, cart)
 
-            # Recheck product stock and status
-            issue, status = verify_product_repo(product, item.quantity)
+        if checkout_issue:
+            issue, product_name = checkout_issue
+            db.session.rollback()
 
-            if status is False:
-                return jsonify(
-                    {
-                        "message": f"{product.name} cannot be ordered",
-                        "issue": issue,
-                        "success": False,
-                    }
-                ), 400
-
-            # create order item, update product stock, update order total amount
-            process_order_items(order, item, product)
-
-            # delete cart item
-            clear_shopping_cart_item_repo(item)
+            return jsonify(
+                {
+                    "message": f"{product_name or 'Cart'} cannot be ordered",
+                    "issue": issue,
+                    "success": False,
+                }
+            ), 400
 
         promotion_response = {}
 
         # validate promotion
         if order_data_validated.promotion_code:
             promotion = validate_promotion_repo(
-                order_data_validated.promotion_code, cart_items
+                order_data_validated.promotion_code, order.items
             )
 
+            # take one use of the promotion, the limit is checked again by the same UPDATE
+            if not promotion.get("error") and not claim_promotion_usage_repo(promotion.get("promotion")):
+                promotion = {"valid": False, "error": "Promo usage limit reached"}
+
             if promotion.get("error"):  
+                db.session.rollback()
                 return jsonify(
                     {
                         "message": promotion.get("error"),
@@ -401,16 +395,35 @@ def get_order_view(user, order_number):
 # ------------------------------------------------------ Get all order --------------------------------------------------
 
 
-def get_all_orders_view(user):
+def get_all_orders_view(user, request_args):
     try:
+        order_filters_validated = OrderHistoryParams.model_validate(
+            request_args.to_dict(flat=False)
+        )
 
-        orders = get_all_orders_repo(user)
+    except ValidationError as e:
+        return jsonify(
+            {
+                "message": str(e),
+                "success": False,
+                "location": "view get all orders request validation",
+            }
+        ), 400
+
+    try:
+        # keyset pagination, newest first and without a total count
+        orders = get_all_orders_repo(user, order_filters_validated)
 
         return jsonify(
             {
+                "pagination": {
+                    "next_cursor": orders["next_cursor"],
+                    "has_next": orders["has_next"],
+                    "per_page": orders["per_page"],
+                },
                 "success": True,
                 "orders": [
-                    OrderResponse.model_validate(order).model_dump() for order in orders
+                    OrderResponse.model_validate(order).model_dump() for order in orders["orders"]
                 ],
             }
         ), 200
@@ -1,16 +1,26 @@
-from flask import jsonify
+import csv
+import io
+import json
+from flask import current_app, jsonify
 from pydantic import ValidationError
+from instance.cache import category_tree_cache, product_detail_cache
 from instance.database import db
+from models.product import TAG_NAME_SEPARATOR
 from repo.admin import get_promotion_by_id_repo, list_active_promotions_repo
 from repo.product import (
     add_product_to_wishlist_by_user_id_repo,
+    bulk_update_products_repo,
     create_product_repo,
+    existing_category_ids_repo,
     get_category_by_id_repo,
+    get_category_tree_repo,
     get_product_detail_repo,
+    get_product_facets_repo,
+    get_products_cursor_page_repo,
     get_products_list_repo,
     get_public_vendor_products_repo,
-    get_top_level_categories_repo,
     get_wishlist_by_user_id_repo,
+    import_products_repo,
     process_product_images_repo,
     process_sustainability_repo,
     process_tags_repo,
@@ -18,15 +28,21 @@ from repo.product import (
     soft_delete_product_repo,
     update_product_repo,
     update_product_image_repo,
+    vendor_product_ids_repo,
 )
+from repo.product_review import apply_rating_deltas_repo, has_pending_rating_deltas_repo
+from repo.product_search import index_product_repo, index_products_repo, search_products_repo
 from schemas.admin import CategoryResponse, CategoryTreeResponse
 from schemas.product import (
+    ProductBulkUpdateRequest,
     ProductCreateRequest,
     ProductCreatedResponse,
     ProductDeleteResponse,
     ProductDetailResponse,
+    ProductImportParams,
     ProductListFilters,
     ProductListResponse,
+    ProductSearchParams,
     ProductUpdateRequest,
     PromotionDetailResponse,
     PromotionListResponse,
@@ -50,17 +66,20 @@ def create_product_view(user, product_request):
         process_product_images_repo(
             product_data_validated.primary_image_url,
             product_data_validated.images,
-            product.id,
+            product,
         )
 
-        # add new tags to tags table and append relationship of product to association table
+        # add new tags to tags table and write the product's rows to the association table
         process_tags_repo(product_data_validated.tags, product)
 
-        # add new sus attrs to sus_attrs table and append relationship of product to association table
+        # add new sus attrs to sus_attrs table and write the product's rows to the association table
         process_sustainability_repo(
             product_data_validated.sustainability_attributes, product
         )
 
+        # keep the search index in the same transaction as the product
+        index_product_repo(product)
+
         db.session.commit()
 
         return jsonify(
@@ -91,6 +110,166 @@ def create_product_view(user, product_request):
         ), 500
 
 
+# ------------------------------------------------------ Bulk Import Products --------------------------------------------------
+
+
+IMPORT_MIMETYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+}
+# csv cells holding several values, e.g. "eco-friendly|handmade"
+IMPORT_LIST_COLUMNS = ("tags", "sustainability_attributes", "images")
+IMPORT_LIST_SEPARATOR = "|"
+
+
+def import_rows(stream, import_format):
+    # yields (line, row or None, error) one line at a time, the upload is never read whole
+    lines = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+    if import_format == "csv":
+        reader = csv.DictReader(lines)
+
+        for row in reader:
+            # empty cells fall back to the defaults of ProductCreateRequest
+            row = {key: value for key, value in row.items() if key and value not in (None, "")}
+
+            for column in IMPORT_LIST_COLUMNS:
+                if column in row:
+                    row[column] = [
+                        value.strip()
+                        for value in row[column].split(IMPORT_LIST_SEPARATOR)
+                        if value.strip()
+                    ]
+
+            yield reader.line_num, row, None
+        return
+
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f"Invalid JSON: {str(e)}"
+            continue
+
+        if not isinstance(row, dict):
+            yield line_number, None, "Each line must be a JSON object"
+            continue
+
+        yield line_number, row, None
+
+
+def import_products_chunk(user, chunk, errors):
+    # one transaction per chunk, a failing chunk does not undo the ones before it
+    category_ids = existing_category_ids_repo(
+        {product_data.category_id for _, product_data in chunk if product_data.category_id}
+    )
+
+    valid = []
+    for line, product_data in chunk:
+        if product_data.category_id and product_data.category_id not in category_ids:
+            errors.append({"line": line, "message": "Category not found"})
+        else:
+            valid.append((line, product_data))
+
+    if not valid:
+        return 0
+
+    try:
+        products_data = [product_data for _, product_data in valid]
+        product_ids = import_products_repo(products_data, user.id)
+
+        index_products_repo(
+            [
+                {
+                    "product_id": product_id,
+                    "name": product_data.name,
+                    "description": product_data.description,
+                    "tags": " ".join(dict.fromkeys(product_data.tags)),
+                    "attributes": " ".join(dict.fromkeys(product_data.sustainability_attributes)),
+                }
+                for product_id, product_data in zip(product_ids, products_data)
+            ]
+        )
+
+        db.session.commit()
+
+    except Exception as e:
+        db.session.rollback()
+        errors.extend({"line": line, "message": str(e)} for line, _ in valid)
+        return 0
+
+    return len(valid)
+
+
+def import_products_view(user, request):
+    try:
+        import_params = ProductImportParams.model_validate(request.args.to_dict(flat=False))
+        import_format = import_params.format or IMPORT_MIMETYPES.get(request.mimetype)
+
+        if import_format is None:
+            raise ValueError("Upload must be text/csv or application/x-ndjson")
+
+    except (ValidationError, ValueError) as e:
+        return jsonify(
+            {
+                "message": str(e),
+                "success": False,
+                "location": "view import products request validation",
+            }
+        ), 400
+
+    try:
+        chunk_size = current_app.config.get("PRODUCT_IMPORT_CHUNK_SIZE", 500)
+        imported = 0
+        errors = []
+        chunk = []
+
+        # rows are validated as they are read and written a chunk at a time
+        for line, row, error in import_rows(request.stream, import_format):
+            if error is None:
+                try:
+                    chunk.append((line, ProductCreateRequest.model_validate(row)))
+                except ValidationError as e:
+                    error = "; ".join(
+                        f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}"
+                        for detail in e.errors()
+                    )
+
+            if error is not None:
+                errors.append({"line": line, "message": error})
+
+            if len(chunk) >= chunk_size:
+                imported += import_products_chunk(user, chunk, errors)
+                chunk = []
+
+        if chunk:
+            imported += import_products_chunk(user, chunk, errors)
+
+        return jsonify(
+            {
+                "message": "Products imported",
+                "success": True,
+                "imported": imported,
+                "failed": len(errors),
+                "errors": sorted(errors, key=lambda error: error["line"]),
+            }
+        ), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify(
+            {
+                "message": str(e),
+                "success": False,
+                "location": "view import products repo",
+            }
+        ), 500
+
+
 # ------------------------------------------------------ Get Products List --------------------------------------------------
 
 
@@ -100,40 +279,29 @@ def list_products_view(request_args):
             request_args.to_dict(flat=False)
         )
 
-        paginated_product = get_products_list_repo(
-            filtered_products_data_validated, request_args
-        )
-
-        products_response = []
-
-        for product in paginated_product.items:
-            # # update rating stats
+        # keyset pagination, cost of a page does not depend on how deep it is
+        if filtered_products_data_validated.pagination == "cursor":
+            products_page = get_products_cursor_page_repo(filtered_products_data_validated)
 
-            # get primary image
-            primary_image = next(
-                (img.image_url for img in product.images if img.is_primary), None
-            )
+            products_response = {
+                "success": True,
+                "products": serialize_products_list(products_page["products"]),
+                "pagination": {
+                    "next_cursor": products_page["next_cursor"],
+                    "has_next": products_page["has_next"],
+                    "per_page": products_page["per_page"],
+                    "total": products_page["total"],
+                },
+            }
 
-            # serialize data
-            products_response.append(
-                ProductListResponse(
-                    primary_image_url=primary_image,
-                    id=product.id,
-                    name=product.name,
-                    price=product.price,
-                    category_id=product.category_id,
-                    tags=product.tags,
-                    vendor_id=product.vendor_id,
-                    review_count=product.review_count,
-                    average_rating=product.average_rating if product.average_rating else 0.0,
-                    business_name=product.vendor.vendor_profile.business_name,
-                ).model_dump()
+        else:
+            paginated_product = get_products_list_repo(
+                filtered_products_data_validated, request_args
             )
 
-        return jsonify(
-            {
+            products_response = {
                 "success": True,
-                "products": products_response,
+                "products": serialize_products_list(paginated_product.items),
                 "pagination": {
                     "total": paginated_product.total,
                     "pages": paginated_product.pages,
@@ -141,7 +309,14 @@ def list_products_view(request_args):
                     "per_page": paginated_product.per_page,
                 },
             }
-        ), 200
+
+        # category, tag and price bucket counts for the same filters
+        if filtered_products_data_validated.facets:
+            products_response["facets"] = get_product_facets_repo(
+                filtered_products_data_validated
+            )
+
+        return jsonify(products_response), 200
 
     except ValidationError as e:
         return jsonify(
@@ -159,19 +334,88 @@ def list_products_view(request_args):
         ), 500
 
 
+def serialize_products_list(products):
+    products_response = []
+
+    # rows of the list projection, tag names come aggregated in one column
+    for product in products:
+        products_response.append(
+            ProductListResponse(
+                primary_image_url=product.primary_image_url,
+                id=product.id,
+                name=product.name,
+                price=product.price,
+                category_id=product.category_id,
+                tags=product.tag_names.split(TAG_NAME_SEPARATOR) if product.tag_names else [],
+                vendor_id=product.vendor_id,
+                review_count=product.review_count,
+                average_rating=product.average_rating if product.average_rating else 0.0,
+                business_name=product.business_name,
+            ).model_dump()
+        )
+
+    return products_response
+
+
+# ------------------------------------------------------ Search Products --------------------------------------------------
+
+
+def search_products_view(request_args):
+    try:
+        search_params_validated = ProductSearchParams.model_validate(
+            request_args.to_dict(flat=False)
+        )
+
+        search_results = search_products_repo(search_params_validated)
+
+        return jsonify(
+            {
+                "success": True,
+                "products": serialize_products_list(search_results["products"]),
+                "pagination": {
+                    "current_page": search_results["page"],
+                    "per_page": search_results["per_page"],
+                    "has_next": search_results["has_next"],
+                },
+            }
+        ), 200
+
+    except ValidationError as e:
+        return jsonify(
+            {
+                "message": str(e),
+                "success": False,
+                "location": "view search products request validation",
+            }
+        ), 400
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify(
+            {"message": str(e), "success": False, "location": "view search products repo"}
+        ), 500
+
+
 # ------------------------------------------------------ Get Product Detail --------------------------------------------------
 
 
 def get_product_detail_view(product_id):
     try:
-        product = get_product_detail_repo(product_id)
+        # read-through cache, entries are dropped when the product or its children are flushed
+        serialized_product = product_detail_cache.get(product_id)
+
+        if serialized_product is None:
+            product = get_product_detail_repo(product_id)
 
-        # update_rating
-        product.update_rating_stats()
+            # serve the stored rating stats, only fold in review changes that are still pending
+            if has_pending_rating_deltas_repo(product_id):
+                apply_rating_deltas_repo(product_id=product_id)
 
-        serialized_product = ProductDetailResponse.model_validate(
-            product
-        ).model_dump()
+            serialized_product = ProductDetailResponse.model_validate(
+                product
+            ).model_dump()
+
+            product_detail_cache.set(product_id, serialized_product)
 
         return jsonify({"success": True, "product": serialized_product}), 200
 
@@ -197,17 +441,11 @@ def update_product_view(user, update_request, product_id):
         product = update_product_repo(user.id, product_id, update_data_validated)
 
         if update_data_validated.tags:
-            # clear existing tags
-            product.tags.clear()
-
-            # add new tags to tags table and append relationship of product to association table
+            # add new tags to tags table and replace the product's rows in the association table
             process_tags_repo(update_data_validated.tags, product)
 
         if update_data_validated.sustainability_attributes:
-            # clear existing sustainability attributes
-            product.sustainability_attributes.clear()
-
-            # add new sus attrs to sus_attrs table and append relationship of product to association table
+            # add new sus attrs to sus_attrs table and replace the product's rows in the association table
             process_sustainability_repo(
                 update_data_validated.sustainability_attributes, product
             )
@@ -217,6 +455,8 @@ def update_product_view(user, update_request, product_id):
                 product, update_data_validated.primary_image_url, update_data_validated.images
             )
 
+        # keep the search index in the same transaction as the product
+        index_product_repo(product)
 
         db.session.commit()
 
@@ -248,6 +488,62 @@ def update_product_view(user, update_request, product_id):
         ), 500
 
 
+# ------------------------------------------------------ Bulk Update Products --------------------------------------------------
+
+
+def bulk_update_products_view(user, update_request):
+    try:
+        update_data_validated = ProductBulkUpdateRequest.model_validate(update_request)
+
+    except ValidationError as e:
+        return jsonify(
+            {
+                "message": str(e),
+                "success": False,
+                "location": "view bulk update products request validation",
+            }
+        ), 400
+
+    try:
+        updates = update_data_validated.products
+        product_ids = [update.product_id for update in updates]
+
+        # all or nothing, a batch with a product of another vendor is not applied at all
+        owned_ids = vendor_product_ids_repo(user.id, product_ids)
+        missing_ids = [product_id for product_id in product_ids if product_id not in owned_ids]
+
+        if missing_ids:
+            return jsonify(
+                {
+                    "message": f"No products with ids {missing_ids} and vendor id '{user.id}'.",
+                    "success": False,
+                    "product_ids": missing_ids,
+                }
+            ), 404
+
+        bulk_update_products_repo(updates)
+
+        db.session.commit()
+
+        return jsonify(
+            {
+                "message": "Products updated successfully",
+                "success": True,
+                "updated": len(updates),
+            }
+        ), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify(
+            {
+                "message": str(e),
+                "success": False,
+                "location": "view bulk update products repo",
+            }
+        ), 500
+
+
 # ------------------------------------------------------ Delete Product --------------------------------------------------
 
 
@@ -375,9 +671,7 @@ def get_wishlist_view(user):
                 average_rating=float(product.average_rating)
                 if product.average_rating
                 else None,
-                primary_image=next(
-                    (img.image_url for img in product.images if img.is_primary), None
-                ),
+                primary_image=product.primary_image_url,
             ).model_dump()
             for product in wishlist.products
         ]
@@ -404,19 +698,22 @@ def get_wishlist_view(user):
 
 def get_category_tree_view():
     try:
-        # active categories with no parents
-        top_categories = get_top_level_categories_repo()
+        categories_tree = category_tree_cache.get("tree")
+
+        if categories_tree is None:
+            # active categories reachable from the top level ones
+            categories = get_category_tree_repo()
 
-        # build category tree
-        categories_tree = []
+            categories_tree = CategoryTreeResponse(
+                categories=build_category_tree(categories)
+            ).model_dump()
 
-        for category in top_categories:
-            categories_tree.append(build_category_tree(category))
+            category_tree_cache.set("tree", categories_tree)
 
         return {
             "success": True,
             "message": "Category tree fetched successfully",
-            "data": CategoryTreeResponse(categories=categories_tree).model_dump(),
+            "data": categories_tree,
         }, 200
 
     except Exception as e:
@@ -427,14 +724,22 @@ def get_category_tree_view():
         }, 500
 
 
-def build_category_tree(category):
-    # Recursively build category tree structure
-    category_data = CategoryResponse.model_validate(category)
-    if category.subcategories:
-        category_data.subcategories = [
-            build_category_tree(sub) for sub in category.subcategories
-        ]
-    return category_data
+def build_category_tree(categories):
+    # attach every category to its parent in one pass over the rows
+    nodes = {
+        category.id: CategoryResponse.model_validate(category) for category in categories
+    }
+    top_categories = []
+
+    for category in categories:
+        parent = nodes.get(category.parent_category_id)
+
+        if parent is None:
+            top_categories.append(nodes[category.id])
+        else:
+            parent.subcategories.append(nodes[category.id])
+
+    return top_categories
 
 
 # ------------------------------------------------------ Get category detail --------------------------------------------------
@@ -1,14 +1,21 @@
-from flask import jsonify
+import csv
+import io
+import json
+import zlib
+from flask import Response, current_app, jsonify, stream_with_context
 from pydantic import ValidationError
 from instance.database import db
 from repo.product import get_vendor_products_repo
-from repo.vendor import get_vendor_recent_orders_repo, get_vendor_stats_repo, update_vendor_profile_repo, vendor_register_repo
+from repo.vendor import get_vendor_recent_orders_repo, get_vendor_stats_repo, stream_vendor_order_lines_repo, update_vendor_profile_repo, vendor_register_repo
 from schemas.product import VendorProductsResponse
 from schemas.vendor import (
     VendorCreateRequest,
+    VendorOrdersExportParams,
     VendorProfileResponse,
+    VendorRecentOrdersParams,
     VendorUpdateRequest,
 )
+from shared.cursor import encode_cursor
 
 # -------------------------------------------------------------- Register Vendor ---------------------------------------------------------------------------
 
@@ -151,13 +158,35 @@ def get_vendor_stats_view(user):
 # -------------------------------------------------------------- Get vendor recent orders ---------------------------------------------------------------------------
 
 
-def get_vendor_recent_orders_view(user):
+def get_vendor_recent_orders_view(user, request_args):
     try:
-        recent_orders = get_vendor_recent_orders_repo(user)
+        recent_orders_params = VendorRecentOrdersParams.model_validate(
+            request_args.to_dict(flat=False)
+        )
+
+    except ValidationError as e:
+        return jsonify(
+            {
+                "message": str(e),
+                "success": False,
+                "location": "view get vendor recent orders request validation",
+            }
+        ), 400
+
+    try:
+        recent_orders_page = get_vendor_recent_orders_repo(
+            user,
+            recent_orders_params.limit or current_app.config.get("VENDOR_RECENT_ORDERS_LIMIT", 5),
+            recent_orders_params.after,
+        )
+        recent_orders = recent_orders_page["orders"]
 
         return jsonify(
             {
                 "success": True,
+                # load more with after=next_cursor
+                "next_cursor": recent_orders_page["next_cursor"],
+                "has_next": recent_orders_page["has_next"],
                 "recent_orders": [
                     {
                         "order_id": order.id,
@@ -176,4 +205,105 @@ def get_vendor_recent_orders_view(user):
         ), 200
 
     except Exception as e:
-        return jsonify({"message": str(e), "success": False, "location": "view get vendor recent orders repo",}), 500
\ No newline at end of file
+        return jsonify({"message": str(e), "success": False, "location": "view get vendor recent orders repo",}), 500
+
+
+# -------------------------------------------------------------- Export vendor orders ---------------------------------------------------------------------------
+
+
+EXPORT_COLUMNS = [
+    "order_line_id",
+    "order_number",
+    "created_at",
+    "status",
+    "customer_id",
+    "product_id",
+    "product_name",
+    "quantity",
+    "unit_price",
+    "total_price",
+    # resume token, pass it as after= to continue behind this row
+    "cursor",
+]
+
+# bytes buffered before a chunk is sent
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+EXPORT_MIMETYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def export_chunks(order_lines, export_format):
+    # only the current chunk is held in memory
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    if export_format == "csv":
+        writer.writerow(EXPORT_COLUMNS)
+
+    for order_line in order_lines:
+        row = order_line._asdict()
+        row["created_at"] = order_line.created_at.isoformat()
+        row["cursor"] = encode_cursor(row["created_at"], order_line.order_line_id)
+
+        if export_format == "csv":
+            writer.writerow([row[column] for column in EXPORT_COLUMNS])
+        else:
+            buffer.write(json.dumps(row, default=str) + "\n")
+
+        if buffer.tell() >= EXPORT_CHUNK_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue().encode()
+
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+
+    for chunk in chunks:
+        if compressed := compressor.compress(chunk):
+            yield compressed
+
+    yield compressor.flush()
+
+
+def export_vendor_orders_view(user, request_args, accept_gzip):
+    try:
+        export_params = VendorOrdersExportParams.model_validate(
+            request_args.to_dict(flat=False)
+        )
+
+    except ValidationError as e:
+        return jsonify(
+            {
+                "message": str(e),
+                "success": False,
+                "location": "view export vendor orders request validation",
+            }
+        ), 400
+
+    try:
+        export_format = export_params.format or "csv"
+        order_lines = stream_vendor_order_lines_repo(user.id, export_params)
+
+        chunks = export_chunks(order_lines, export_format)
+        headers = {
+            "Content-Disposition": f"attachment; filename=orders.{export_format}",
+            "Vary": "Accept-Encoding",
+        }
+
+        if accept_gzip:
+            chunks = gzip_chunks(chunks)
+            headers["Content-Encoding"] = "gzip"
+
+        # rows are read from the database while the response is sent
+        return Response(
+            stream_with_context(chunks),
+            mimetype=EXPORT_MIMETYPES[export_format],
+            headers=headers,
+        )
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"message": str(e), "success": False, "location": "view export vendor orders repo"}), 500